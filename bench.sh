@@ -0,0 +1,4 @@
+for bench in src/bench_*.py; do
+    echo "== $bench"
+    python3 "$bench"
+done
@@ -0,0 +1,241 @@
+"""A module for writing the built site straight into a deploy archive.
+
+While an archive is configured, every output file is added to it as it is
+written, optionally besides writing the file itself, so no second pass
+over the output directory is needed. Entries are added in build order,
+which is deterministic, and get fixed timestamps, owners and modes, so
+the same site always gives the same archive bytes.
+
+Like the build log, the archive is module state: worker processes buffer
+their entries with configure_worker() and the parent adds them in order.
+"""
+import gzip
+import io
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+from contextlib import contextmanager
+
+# Timestamp of every entry unless SOURCE_DATE_EPOCH is set; zip files
+# can't hold earlier dates than 1980-01-01
+DEFAULT_EPOCH = 315532800
+
+FORMATS = {".tar.gz": "tar", ".tgz": "tar", ".zip": "zip"}
+
+
+def archive_format(path):
+    """Return "tar" or "zip" for an archive path, or raise ValueError."""
+    for suffix, kind in FORMATS.items():
+        if path.endswith(suffix):
+            return kind
+    raise ValueError(f"Unsupported archive {path!r}, expected .tar.gz, .tgz or .zip")
+
+
+def source_date_epoch():
+    """Return the timestamp given to every entry."""
+    return int(os.environ.get("SOURCE_DATE_EPOCH", DEFAULT_EPOCH))
+
+
+class SiteArchive:
+    """A .tar.gz or .zip archive of an output directory, written as a stream.
+
+    The archive is written to a temporary file that replaces path when it
+    is closed, so a failed build never leaves a partial archive behind.
+    """
+
+    def __init__(self, path, root, keep_files=True):
+        """Open an archive for writing.
+
+        Args:
+            path: Path of the .tar.gz, .tgz or .zip file
+            root: The output directory; files below it are archived
+            keep_files: Also write the output files themselves
+        """
+        self.path = path
+        self.root = root
+        self.keep_files = keep_files
+        self.format = archive_format(path)
+        self.mtime = source_date_epoch()
+        self.count = 0
+        self._tmp_path = f"{path}.tmp"
+        self._file = open(self._tmp_path, "wb")
+        if self.format == "tar":
+            self._gzip = gzip.GzipFile(filename="", mode="wb", fileobj=self._file, mtime=self.mtime)
+            self._tar = tarfile.open(fileobj=self._gzip, mode="w|", format=tarfile.PAX_FORMAT)
+        else:
+            self._zip = zipfile.ZipFile(self._file, "w", zipfile.ZIP_DEFLATED)
+
+    def name_of(self, path):
+        """Return the entry name of an output path, or None if it isn't below root."""
+        name = os.path.relpath(path, self.root).replace(os.sep, "/")
+        return None if name == ".." or name.startswith("../") else name
+
+    def add(self, name, data):
+        """Add an entry holding bytes."""
+        self.add_stream(name, io.BytesIO(data), len(data))
+
+    def add_file(self, name, source_path):
+        """Add an entry copied from a file, without reading it into memory."""
+        with open(source_path, "rb") as f:
+            self.add_stream(name, f, os.fstat(f.fileno()).st_size)
+
+    def add_stream(self, name, stream, size):
+        """Add an entry read from a binary stream of known size."""
+        self.count += 1
+        if self.format == "tar":
+            info = tarfile.TarInfo(name)
+            info.size = size
+            info.mtime = self.mtime
+            info.mode = 0o644
+            self._tar.addfile(info, stream)
+            return
+        info = zipfile.ZipInfo(name, time.gmtime(self.mtime)[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        with self._zip.open(info, "w") as entry:
+            shutil.copyfileobj(stream, entry)
+
+    def close(self):
+        """Finish the archive and move it into place."""
+        if self.format == "tar":
+            self._tar.close()
+            self._gzip.close()
+        else:
+            self._zip.close()
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def __repr__(self):
+        """Return a string representation of the archive."""
+        return f"SiteArchive(path={self.path!r}, entries={self.count})"
+
+
+class BufferedArchive:
+    """Collects the entries of a worker process for the parent's archive."""
+
+    def __init__(self, root, keep_files=True):
+        self.root = root
+        self.keep_files = keep_files
+        self.entries = []
+
+    name_of = SiteArchive.name_of
+
+    def add(self, name, data):
+        """Buffer an entry holding bytes."""
+        self.entries.append((name, data))
+
+    def drain(self):
+        """Return and forget the buffered (name, data) entries."""
+        entries, self.entries = self.entries, []
+        return entries
+
+
+class ArchivedFile(io.StringIO):
+    """A text file that is added to the archive, and optionally written, when closed."""
+
+    def __init__(self, archive, name, path):
+        super().__init__()
+        self.archive = archive
+        self.name = name
+        self.path = path
+
+    def close(self):
+        """Add the written text to the archive."""
+        if not self.closed:
+            data = self.getvalue().encode("utf-8")
+            self.archive.add(self.name, data)
+            if self.archive.keep_files:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "wb") as f:
+                    f.write(data)
+        super().close()
+
+    def __exit__(self, exc_type, exc, traceback):
+        """Close the file; if the block raised, its partial text is neither archived nor written."""
+        if exc_type is None:
+            self.close()
+        else:
+            super().close()
+        return False
+
+
+_archive = None
+
+# The set the paths of output files are added to while they are tracked, or None
+_outputs = None
+
+
+def configure(archive):
+    """Set the archive output files are added to, or None for none."""
+    global _archive
+    _archive = archive
+    return archive
+
+
+def configure_worker(root, keep_files):
+    """Buffer the entries of a worker process for the parent's archive."""
+    return configure(BufferedArchive(root, keep_files))
+
+
+def current():
+    """Return the configured archive, or None."""
+    return _archive
+
+
+def track_outputs(outputs):
+    """Add the path of every output file from now on to a set, or to none if outputs is None.
+
+    Only files written in this process are tracked, not those of worker
+    processes.
+    """
+    global _outputs
+    _outputs = outputs
+    return outputs
+
+
+def keep_output(path):
+    """Count path as an output file if outputs are tracked, e.g. one that is left as it is."""
+    if _outputs is not None:
+        _outputs.add(os.path.normpath(path))
+
+
+@contextmanager
+def open_output(path):
+    """Open an output file for writing text in a with block, creating its directory if needed.
+
+    Files below the configured archive's root are added to the archive
+    when the block ends; otherwise, and if the archive keeps files, the
+    file is written as usual. Either way nothing is kept if the block
+    raises: a plain file is written to a temporary file that only replaces
+    path when the block completes.
+    """
+    keep_output(path)
+    name = _archive.name_of(path) if _archive is not None else None
+    if name is not None:
+        with ArchivedFile(_archive, name, path) as f:
+            yield f
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            yield f
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+
+def add_copy(dest_path, source_path):
+    """Add a file copied to dest_path to the configured archive, if any."""
+    keep_output(dest_path)
+    name = _archive.name_of(dest_path) if _archive is not None else None
+    if name is not None:
+        _archive.add_file(name, source_path)
+
+
+def writes_files():
+    """Return True unless the output only goes into the archive."""
+    return _archive is None or _archive.keep_files
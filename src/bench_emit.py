@@ -0,0 +1,54 @@
+"""Benchmark the direct HTML emitter against rendering through the node tree.
+
+Both render the golden corpus (the content/ pages and the test cases) with
+syntax highlighting off, so only the markdown rendering itself is timed.
+
+Run with: python3 src/bench_emit.py
+"""
+import timeit
+
+import golden
+from emit import markdown_to_html
+from helpers import markdown_to_html_node
+
+# Number of times the corpus is rendered per measurement
+ROUNDS = 5
+
+
+def tree(documents):
+    """Render every document through an HTMLNode tree."""
+    for markdown in documents:
+        markdown_to_html_node(markdown).to_html()
+
+
+def direct(documents):
+    """Render every document with the direct emitter."""
+    for markdown in documents:
+        markdown_to_html(markdown)
+
+
+def timed(render, documents):
+    """Return the best time of rendering the documents ROUNDS times, in milliseconds."""
+    return min(timeit.repeat(lambda: render(documents), number=ROUNDS, repeat=3)) * 1000
+
+
+def main():
+    """Time both renderers on the corpus, and on one large document of it."""
+    documents = []
+    for _, source_path, _ in golden.corpus():
+        with open(source_path, "r", encoding="utf-8") as f:
+            documents.append(f.read())
+    inputs = {
+        f"corpus ({len(documents)} documents)": documents,
+        "corpus as one document": ["\n\n".join(documents)],
+    }
+    with golden.no_highlighting():
+        for name, docs in inputs.items():
+            tree_ms = timed(tree, docs)
+            direct_ms = timed(direct, docs)
+            print(f"{name}, {ROUNDS} rounds")
+            print(f"  tree {tree_ms:8.1f} ms   direct {direct_ms:8.1f} ms   ({tree_ms / direct_ms:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Benchmark HTML escaping against the previous unescaped serializer.
+
+Run with: python3 src/bench_escape.py
+"""
+import glob
+import os
+import timeit
+
+import htmlnode
+from helpers import markdown_to_html_node
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "content")
+
+
+def load_corpus():
+    """Return the rendered trees of all content pages."""
+    nodes = []
+    for path in sorted(glob.glob(os.path.join(CONTENT_DIR, "**", "*.md"), recursive=True)):
+        with open(path, "r", encoding="utf-8") as f:
+            nodes.append(markdown_to_html_node(f.read()))
+    return nodes
+
+
+def render(nodes):
+    """Serialize every tree."""
+    for node in nodes:
+        node.to_html()
+
+
+def main():
+    """Time serialization with and without escaping."""
+    nodes = load_corpus()
+    number = 200
+
+    escaped = min(timeit.repeat(lambda: render(nodes), number=number, repeat=5))
+
+    escape_text, escape_attribute = htmlnode.escape_text, htmlnode.escape_attribute
+    htmlnode.escape_text = htmlnode.escape_attribute = lambda value: value
+    try:
+        unescaped = min(timeit.repeat(lambda: render(nodes), number=number, repeat=5))
+    finally:
+        htmlnode.escape_text, htmlnode.escape_attribute = escape_text, escape_attribute
+
+    print(f"unescaped: {unescaped / number * 1000:.3f} ms per corpus")
+    print(f"escaped:   {escaped / number * 1000:.3f} ms per corpus")
+    print(f"overhead:  {(escaped / unescaped - 1) * 100:+.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark the cost of the extension hooks in the parsers.
+
+The golden corpus is rendered with no extensions registered, which must be
+as fast as before the hooks existed, then with a block and an inline
+extension keyed by characters the corpus rarely starts lines or spans
+with, which shows the cost of having extensions at all. Syntax
+highlighting is off, so only the markdown rendering itself is timed.
+
+Run with: python3 src/bench_extensions.py
+"""
+import timeit
+
+import extensions
+import golden
+from emit import markdown_to_html
+from extensions import BlockExtension, InlineExtension
+from htmlnode import LeafNode
+from textnode import TextNode, TextType
+
+# Number of times the corpus is rendered per measurement
+ROUNDS = 5
+
+
+def render(documents):
+    """Render every document with the direct emitter."""
+    for markdown in documents:
+        markdown_to_html(markdown)
+
+
+def timed(documents):
+    """Return the best time of rendering the documents ROUNDS times, in milliseconds."""
+    return min(timeit.repeat(lambda: render(documents), number=ROUNDS, repeat=5)) * 1000
+
+
+def register_unused():
+    """Register a table block and a shortcode span extension."""
+    extensions.register(BlockExtension("table", r"\|", lambda lines, references: LeafNode("table", ""), r"\|"))
+    extensions.register(InlineExtension(
+        "shortcode", r"\{\{< (\w+) >\}\}", lambda match, references: TextNode(match.group(1), TextType.HTML)
+    ))
+
+
+def main():
+    """Time the corpus without and with extensions registered."""
+    documents = []
+    for _, source_path, _ in golden.corpus():
+        with open(source_path, "r", encoding="utf-8") as f:
+            documents.append(f.read())
+    with golden.no_highlighting():
+        none_ms = timed(documents)
+        register_unused()
+        try:
+            unused_ms = timed(documents)
+        finally:
+            extensions.clear()
+    print(f"corpus ({len(documents)} documents), {ROUNDS} rounds")
+    print(f"  no extensions {none_ms:8.1f} ms   unused extensions {unused_ms:8.1f} ms   "
+          f"({unused_ms / none_ms:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
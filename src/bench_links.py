@@ -0,0 +1,65 @@
+"""Benchmark the link scanner on pathological inputs.
+
+Each input, a repeated unit or a function of the size, is doubled in size
+a few times. A linear scanner takes about twice as long per doubling; the
+previous lazy regular expressions took four or more times as long.
+
+Run with: python3 src/bench_links.py
+"""
+import re
+import timeit
+
+from inline import References, find_link_spans
+
+OLD_LINK_RE = re.compile(r"(?<!!)\[(.*?)]\((.*?)\)")
+OLD_IMAGE_RE = re.compile(r"!\[(.*?)]\((.*?)\)")
+
+INPUTS = {
+    "open brackets": "[a",
+    "unclosed links": "[a](b",
+    "closers": "](",
+    "nested": "[[",
+    "nested with text": lambda size: "[" * size + "x " * size + "]" * size,
+    "images": "![a]",
+    "autolinks": "<http:",
+}
+SIZES = [500, 1000, 2000, 4000]
+
+# The old scanner is skipped for larger sizes once it takes this long
+OLD_LIMIT_MS = 500
+
+
+def old_scan(text):
+    """Scan text with the previous regular expressions."""
+    OLD_LINK_RE.findall(text)
+    OLD_IMAGE_RE.findall(text)
+
+
+def new_scan(text):
+    """Scan text with the linear scanner."""
+    references = References()
+    references.define_link("a", "/a")
+    find_link_spans(text, references)
+
+
+def timed(scan, text):
+    """Return the best time of one scan in milliseconds."""
+    return min(timeit.repeat(lambda: scan(text), number=1, repeat=3)) * 1000
+
+
+def main():
+    """Time both scanners on every input and size."""
+    for name, unit in INPUTS.items():
+        print(f"{name}" if callable(unit) else f"{name} ({unit!r} repeated)")
+        old_ms = 0
+        for size in SIZES:
+            text = unit(size) if callable(unit) else unit * size
+            old = "skipped"
+            if old_ms <= OLD_LIMIT_MS:
+                old_ms = timed(old_scan, text)
+                old = f"{old_ms:.2f} ms"
+            print(f"  {len(text):>6} chars: old {old:>12}   new {timed(new_scan, text):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark rendering one huge page in parts against rendering it in one process.
+
+The page is a synthetic API reference: a section per function with a
+heading, prose with inline markup and links to reference definitions, a
+parameter list and a code example. Syntax highlighting is off, so only the
+markdown rendering itself is timed. The speedup is bounded by the number
+of CPUs and by the parse of the whole document in the parent process.
+
+Run with: python3 src/bench_split.py [SECTIONS]
+"""
+import os
+import sys
+import time
+
+import golden
+from render import Template, render_markdown
+from splitrender import render_markdown_split
+
+# Number of function sections of the page, about 230 bytes each
+DEFAULT_SECTIONS = 20000
+
+
+def api_reference(sections):
+    """Return the markdown of a synthetic API reference page."""
+    parts = ["# API reference"]
+    for i in range(sections):
+        parts.append(
+            f"## `module.func_{i}(value, *args)`\n\n"
+            f"Returns the **result** of calling [`func_{i}`](/api/func_{i}) on *value*; see the "
+            f"[helpers][helpers] for `snake_case_{i}`.\n\n"
+            f"- `value`: the input\n- `args`: more _values_\n\n"
+            f"```python\nfunc_{i}(1, 2)\n```"
+        )
+    parts.append("[helpers]: /api/helpers")
+    return "\n\n".join(parts)
+
+
+def timed(render):
+    """Return the time of one call of render, in seconds, and its result."""
+    start = time.perf_counter()
+    result = render()
+    return time.perf_counter() - start, result
+
+
+def main():
+    """Time the page rendered in one process and in parts by 2, 4 and all CPUs."""
+    sections = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SECTIONS
+    markdown = api_reference(sections)
+    template = Template("<title>{{ Title }}</title>{{ Content }}")
+    cpus = os.cpu_count() or 1
+    print(f"API reference page, {len(markdown) / 1024 ** 2:.1f} MB of markdown, {cpus} CPUs")
+    with golden.no_highlighting():
+        sequential, expected = timed(lambda: render_markdown(markdown, template, direct=True))
+        print(f"  one process {sequential:7.2f} s")
+        for jobs in sorted({2, 4, max(cpus, 2)}):
+            seconds, page = timed(lambda: render_markdown_split(markdown, template, jobs=jobs))
+            assert page.html == expected.html
+            print(f"  {jobs:2d} jobs      {seconds:7.2f} s   ({sequential / seconds:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
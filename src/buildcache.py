@@ -0,0 +1,127 @@
+"""A module for a build cache shared between machines and CI runs.
+
+Rendered pages are stored as JSON files named by their page_cache_key, a
+hash of everything the output depends on, so any directory (a local one,
+or a mounted or restored CI cache path) can serve as the backend and
+entries never need invalidating. Writes are atomic renames, so several
+processes and builds can share the directory. The least recently used
+entries are evicted when the cache outgrows its size bound.
+"""
+import json
+import os
+import tempfile
+
+from memory import format_size
+
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+
+class DiskPageCache:
+    """A content-addressed cache of rendered pages in a directory.
+
+    It has the get(key) and put(key, value) interface of the in-memory
+    page cache. Reading an entry updates its modification time, which
+    orders the entries for eviction.
+    """
+
+    # Safe to use from several processes at once
+    shared = True
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        """Create a cache.
+
+        Args:
+            directory: The cache directory, created when first written to
+            max_bytes: The size the cache is pruned to
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evicted = 0
+        # Total size of the entries, as of the last prune
+        self.size = 0
+
+    def path(self, key):
+        """Return the file holding the entry of a key."""
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Return the cached value for key, or None."""
+        path = self.path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            # Missing, or removed or replaced by another build meanwhile
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store a JSON-serializable value."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.writes += 1
+
+    def add_stats(self, hits, misses, writes):
+        """Add the counts of a copy of the cache used by a worker process."""
+        self.hits += hits
+        self.misses += misses
+        self.writes += writes
+
+    def prune(self):
+        """Evict the least recently used entries until the cache fits max_bytes.
+
+        Returns:
+            The number of evicted entries.
+        """
+        entries = []
+        total = 0
+        if os.path.isdir(self.directory):
+            for shard in os.scandir(self.directory):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(".json"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime_ns, entry.path, stat.st_size))
+                        total += stat.st_size
+        entries.sort()
+        evicted = 0
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        self.evicted += evicted
+        self.size = total
+        return evicted
+
+    def summary(self):
+        """Return the hit/miss statistics as one line."""
+        lookups = self.hits + self.misses
+        rate = f" ({self.hits / lookups:.0%} hit rate)" if lookups else ""
+        return (
+            f"Build cache: {self.hits} hits, {self.misses} misses{rate}, {self.writes} written, "
+            f"{self.evicted} evicted, {format_size(self.size)} of {format_size(self.max_bytes)}"
+        )
+
+    def __repr__(self):
+        """Return a string representation of the cache."""
+        return f"DiskPageCache(directory={self.directory!r}, max_bytes={self.max_bytes})"
@@ -0,0 +1,148 @@
+"""A module for build progress reporting.
+
+Per-file events are counted instead of printed. They are only written as
+log lines in verbose mode, and optionally as JSON lines to an event log for
+tooling. By default a single progress line and a final summary are shown.
+"""
+import json
+import logging
+import sys
+import time
+
+QUIET = 0
+NORMAL = 1
+VERBOSE = 2
+
+MESSAGES = {
+    "delete_dir": "Deleting existing directory: {path}",
+    "create_dir": "Creating directory: {path}",
+    "delete_file": "Deleting stale file: {path}",
+    "copy_file": "Copying file: {source} -> {dest}",
+    "link_file": "Linking unchanged file: {source} -> {dest}",
+    "page": "Generating page from {source} to {dest} using {template} (base_url: {base_url})",
+    "page_memory": "Peak RSS {peak_rss} bytes while generating {source}",
+    "unresolved_link": "Unresolved link [[{target}]] in {source}",
+    "duplicate_title": "Duplicate title {title!r} in {source}, links go to {other}",
+    "page_failed": "Failed to generate {location}: {error}",
+}
+
+# Events that are problems with the content, reported together at the end
+PROBLEMS = ("unresolved_link", "duplicate_title", "page_failed")
+
+# Minimum seconds between two redraws of the progress line
+PROGRESS_INTERVAL = 0.1
+
+logger = logging.getLogger("ssg")
+
+
+class BuildLog:
+    """Counts build events and reports them according to the verbosity."""
+
+    def __init__(self, verbosity=NORMAL, events_path=None, stream=None, buffered=False):
+        """Create a build log.
+
+        Args:
+            verbosity: QUIET, NORMAL or VERBOSE
+            events_path: Optional path of a JSON-lines event log
+            stream: Stream for the progress line, defaults to stderr
+            buffered: Keep the recorded events for drain(), e.g. in a worker
+                process whose events are replayed by the parent
+        """
+        self.verbosity = verbosity
+        self.buffer = [] if buffered else None
+        self.stream = stream or sys.stderr
+        self.counters = {}
+        # The recorded (kind, fields) events of the PROBLEMS kinds
+        self.problems = []
+        self.started = time.monotonic()
+        self._events = open(events_path, "a", encoding="utf-8") if events_path else None
+        self._show_progress = verbosity == NORMAL and self.stream.isatty()
+        self._last_draw = 0.0
+
+    def record(self, kind, **fields):
+        """Record one build event, e.g. a copied file or a generated page."""
+        self.counters[kind] = self.counters.get(kind, 0) + 1
+        if kind in PROBLEMS:
+            self.problems.append((kind, fields))
+        if self.buffer is not None:
+            self.buffer.append((kind, fields))
+        if self.verbosity >= VERBOSE:
+            logger.debug(MESSAGES.get(kind, kind).format(**fields))
+        if self._events is not None:
+            event = {"event": kind, "time": round(time.time(), 3), **fields}
+            self._events.write(json.dumps(event, default=str) + "\n")
+        if self._show_progress:
+            now = time.monotonic()
+            if now - self._last_draw >= PROGRESS_INTERVAL:
+                self._last_draw = now
+                self.stream.write(f"\r{self.progress_line()}")
+                self.stream.flush()
+
+    def drain(self):
+        """Return and forget the buffered (kind, fields) events."""
+        events, self.buffer = self.buffer, []
+        return events
+
+    def count(self, kind):
+        """Return how many events of a kind were recorded."""
+        return self.counters.get(kind, 0)
+
+    def progress_line(self):
+        """Return the current progress as one line."""
+        line = f"{self.count('page')} pages, {self.count('copy_file')} files copied"
+        if self.count("link_file"):
+            line += f", {self.count('link_file')} linked"
+        if self.problems:
+            line += f", {len(self.problems)} problems"
+        return line
+
+    def summary(self):
+        """Return the end-of-build summary."""
+        elapsed = time.monotonic() - self.started
+        return f"Built {self.progress_line()} in {elapsed:.2f}s"
+
+    def close(self):
+        """Finish the progress line, log the summary and close the event log."""
+        if self._show_progress:
+            self.stream.write("\r\033[K")
+            self.stream.flush()
+        for kind, fields in self.problems:
+            logger.warning(MESSAGES[kind].format(**fields))
+        logger.info(self.summary())
+        if self._events is not None:
+            self._events.write(json.dumps({"event": "summary", "counters": self.counters}) + "\n")
+            self._events.close()
+            self._events = None
+
+
+_log = BuildLog(QUIET)
+
+
+def configure(verbosity=NORMAL, events_path=None):
+    """Set up logging for a build and return its BuildLog."""
+    global _log
+    level = {QUIET: logging.WARNING, NORMAL: logging.INFO, VERBOSE: logging.DEBUG}[verbosity]
+    logging.basicConfig(level=level, format="%(message)s", stream=sys.stderr, force=True)
+    _log = BuildLog(verbosity, events_path)
+    return _log
+
+
+def configure_worker():
+    """Buffer the events of a worker process instead of reporting them.
+
+    Unlike configure, this leaves logging alone and doesn't touch the event
+    log file inherited from the parent.
+    """
+    global _log
+    _log = BuildLog(QUIET, buffered=True)
+    return _log
+
+
+def record(kind, **fields):
+    """Record a build event on the current BuildLog."""
+    _log.record(kind, **fields)
+
+
+def current():
+    """Return the current BuildLog."""
+    return _log
@@ -0,0 +1,256 @@
+"""A long-running build server and its thin client.
+
+The server keeps the renderer imported and the compiled layouts, the
+pages found with their titles and the rendered pages in memory between
+builds, so a rebuild only renders the pages whose source or layout
+changed and only writes the files that changed. It listens on a Unix
+socket that only the current user can access.
+
+Usage:
+    python3 src/daemon.py serve          start the server
+    python3 src/daemon.py build [ARGS]   rebuild, ARGS as for main.py
+    python3 src/daemon.py stop           stop the server
+"""
+import json
+import os
+import socket
+import sys
+from collections import OrderedDict
+
+import buildlog
+
+SOCKET_PATH = "./.cache/ssg.sock"
+
+# Number of rendered pages kept in memory
+MAX_CACHED_PAGES = 50000
+
+
+class MemoryPageCache:
+    """A bounded in-memory cache of rendered pages, evicting the least recently used."""
+
+    def __init__(self, max_entries=MAX_CACHED_PAGES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """Return the cached value for key, or None."""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store a value, evicting the oldest entries above the bound."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SiteIndex:
+    """The pages of the content directory and their titles, kept between builds.
+
+    The pages are only found again once a directory's modification time
+    changes, i.e. files were added, removed or renamed in it, and a title
+    is only read again once its file changes. The cache keys of the pages
+    written, by destination path, are kept for main.generate_page.
+    """
+
+    def __init__(self, discover, title_of):
+        """Create an empty index.
+
+        Args:
+            discover: Function finding the pages, like main.discover_pages
+            title_of: Function reading a page's title, like wikilinks.page_title
+        """
+        self.discover = discover
+        self.title_of = title_of
+        self.written = {}
+        # (directory modification times, pages) by discover arguments
+        self._pages = {}
+        # (modification time, size, title) by source path
+        self._titles = {}
+
+    def pages(self, dir_path_content, dest_dir_path, url_path="/"):
+        """Return the pages found in a content directory, like discover."""
+        key = (dir_path_content, dest_dir_path, url_path)
+        cached = self._pages.get(key)
+        if cached is not None and _directory_mtimes(cached[0]) == cached[0]:
+            return cached[1]
+        # Taken first, so changes made while pages are found show next time
+        mtimes = _directory_mtimes(_directories(dir_path_content))
+        found = self.discover(dir_path_content, dest_dir_path, url_path)
+        self._pages[key] = (mtimes, found)
+        sources = {source_path for _, pages in self._pages.values() for source_path, _, _ in pages}
+        self._titles = {path: title for path, title in self._titles.items() if path in sources}
+        return found
+
+    def title(self, source_path):
+        """Return the title of a page, like title_of."""
+        stat = os.stat(source_path)
+        cached = self._titles.get(source_path)
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            cached = self._titles[source_path] = (stat.st_mtime_ns, stat.st_size, self.title_of(source_path))
+        return cached[2]
+
+
+def _directories(path):
+    """Return a directory and all directories below it."""
+    return [dir_path for dir_path, _, _ in os.walk(path)]
+
+
+def _directory_mtimes(directories):
+    """Return the modification times of directories by path, None for those that are gone."""
+    mtimes = {}
+    for path in directories:
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            mtimes[path] = None
+    return mtimes
+
+
+class BuildServer:
+    """Runs builds on request, keeping state between them."""
+
+    def __init__(self):
+        # Imported here so the client doesn't pay for the renderer
+        import main
+        from wikilinks import page_title
+
+        self.main = main
+        self.templates = main.TemplateResolver(main.TEMPLATE_PATH, main.LAYOUTS_DIR)
+        self.page_cache = MemoryPageCache()
+        self.site = SiteIndex(main.discover_pages, page_title)
+
+    def handle(self, request):
+        """Run one request and return the response."""
+        command = request.get("command")
+        if command == "ping":
+            return {"ok": True}
+        if command != "build":
+            return {"ok": False, "error": f"Unknown command: {command}"}
+
+        hits, misses = self.page_cache.hits, self.page_cache.misses
+        try:
+            args = self.main.parse_args(request.get("args", []))
+            self.templates.refresh()
+            log = self.main.build(args, self.templates, self.page_cache, self.site)
+        except (Exception, SystemExit) as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        failures = [buildlog.MESSAGES[kind].format(**fields) for kind, fields in log.problems if kind == "page_failed"]
+        if failures:
+            return {"ok": False, "error": "\n".join(failures), "summary": log.summary()}
+        return {
+            "ok": True,
+            "summary": log.summary(),
+            "rendered": self.page_cache.misses - misses,
+            "cached": self.page_cache.hits - hits,
+        }
+
+
+def serve(socket_path=SOCKET_PATH):
+    """Serve build requests on a Unix socket until a stop request.
+
+    Raises:
+        RuntimeError: If a server already listens on socket_path
+    """
+    try:
+        request({"command": "ping"}, socket_path)
+    except FileNotFoundError:
+        pass
+    except ConnectionRefusedError:
+        # Left behind by a server that didn't stop cleanly
+        os.remove(socket_path)
+    else:
+        raise RuntimeError(f"A build server already listens on {socket_path}")
+    server = BuildServer()
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        listener.bind(socket_path)
+    finally:
+        os.umask(old_umask)
+    listener.listen()
+    print(f"Build server listening on {socket_path}", file=sys.stderr)
+
+    try:
+        while True:
+            connection, _ = listener.accept()
+            with connection:
+                message = _receive(connection)
+                if message.get("command") == "stop":
+                    _send(connection, {"ok": True})
+                    break
+                _send(connection, server.handle(message))
+    finally:
+        listener.close()
+        os.remove(socket_path)
+
+
+def request(message, socket_path=SOCKET_PATH):
+    """Send one request to the server and return its response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        _send(connection, message)
+        return _receive(connection)
+
+
+def _send(connection, message):
+    """Send a message as one JSON line."""
+    connection.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def _receive(connection):
+    """Read one JSON line message."""
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = connection.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    return json.loads(data) if data else {}
+
+
+def main(argv=None):
+    """The command line entry point."""
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "build"
+    if command == "serve":
+        try:
+            serve()
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 1
+        return 0
+    if command == "stop":
+        request({"command": "stop"})
+        return 0
+    if command != "build":
+        print(__doc__, file=sys.stderr)
+        return 2
+
+    try:
+        response = request({"command": "build", "args": argv[1:]})
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"No build server at {SOCKET_PATH}, start one with: python3 src/daemon.py serve", file=sys.stderr)
+        return 1
+    if not response.get("ok"):
+        print(f"Build failed: {response.get('error')}", file=sys.stderr)
+        return 1
+    print(f"{response['summary']} ({response['rendered']} rendered, {response['cached']} from memory)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""A module for rendering markdown straight to HTML, without an HTMLNode tree.
+
+The emitter walks the block tree of parse_blocks and the TextNodes of
+parse_inline and appends HTML fragments to a list, so no HTMLNode is
+created and nothing is serialized twice. Its output is byte-identical to
+markdown_to_html_node(markdown).to_html(); golden.py checks that on the
+corpus and on random documents.
+"""
+import extensions
+from helpers import HEADING_RE, Block, BlockType, code_block_to_html_node, parse_blocks
+from htmlnode import TEXT_TAGS, ParentNode, escape_attribute, escape_text, prefix_url
+from inline import References, parse_inline
+from pages import lead_text
+from textnode import TextType
+
+
+class HTMLEmitter:
+    """Appends the HTML of a document's blocks to a list of fragments.
+
+    The text of the first top-level paragraph holding plain prose is kept
+    in lead_text, so page excerpts can be built without a tree.
+    """
+
+    def __init__(self, base_url="/"):
+        """Create an emitter.
+
+        Args:
+            base_url: Prefix of root-relative link and image URLs
+        """
+        self.parts = []
+        self.lead_text = None
+        self.base_url = base_url
+
+    def block(self, block: Block, references: References | None = None, top_level: bool = False):
+        """Emit a parsed Block and its children.
+
+        The references are those of the enclosing document; a document block
+        uses its own.
+        """
+        block_type = block.block_type
+        out = self.parts.append
+
+        if block_type == BlockType.DOCUMENT:
+            references = block.references
+            out("<div>")
+            for child in block.children:
+                self.block(child, references, True)
+            if references is not None and references.footnote_order:
+                self.footnotes(references)
+            out("</div>")
+
+        elif block_type == BlockType.PARAGRAPH:
+            nodes = parse_inline(" ".join(block.lines), references)
+            if top_level and self.lead_text is None and _has_prose(nodes):
+                self.lead_text = _text_content(nodes)
+            out("<p>")
+            self.inline(nodes)
+            out("</p>")
+
+        elif block_type == BlockType.HEADING:
+            match = HEADING_RE.match(block.lines[0])
+            level = len(match.group(1))
+            out(f"<h{level}>")
+            self.inline(parse_inline(match.group(2), references))
+            out(f"</h{level}>")
+
+        elif block_type == BlockType.CODE:
+            # One node per code block; it shares the highlighting logic
+            out(code_block_to_html_node("\n".join(block.lines)).to_html())
+
+        elif block_type == BlockType.QUOTE:
+            out("<blockquote>")
+            # Quotes of plain text keep their line breaks and get no <p> wrappers
+            if all(child.block_type == BlockType.PARAGRAPH for child in block.children):
+                quote_text = "\n".join(line.strip() for line in block.lines)
+                self.inline(parse_inline(quote_text, references))
+            else:
+                for child in block.children:
+                    self.block(child, references)
+            out("</blockquote>")
+
+        elif block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
+            if block_type == BlockType.UNORDERED_LIST:
+                out("<ul>")
+            else:
+                out(f'<ol start="{block.start}">' if block.start != 1 else "<ol>")
+            for child in block.children:
+                self.block(child, references)
+            out("</ul>" if block_type == BlockType.UNORDERED_LIST else "</ol>")
+
+        elif block_type == BlockType.LIST_ITEM:
+            # A single paragraph is rendered inline, several get <p> wrappers
+            paragraphs = sum(1 for child in block.children if child.block_type == BlockType.PARAGRAPH)
+            out("<li>")
+            for child in block.children:
+                if child.block_type == BlockType.PARAGRAPH and paragraphs == 1:
+                    self.inline(parse_inline(" ".join(child.lines), references))
+                else:
+                    self.block(child, references)
+            out("</li>")
+
+        elif block_type == BlockType.EXTENSION:
+            node = extensions.get(block.extension).render(block.lines, references)
+            if top_level and self.lead_text is None and node.tag == "p":
+                self.lead_text = lead_text(ParentNode("div", [node]))
+            out(node.to_html(self.base_url))
+
+        else:
+            out("<div>")
+            for child in block.children:
+                self.block(child, references)
+            out("</div>")
+
+    def footnotes(self, references: References):
+        """Emit the referenced footnotes of a document as a numbered list.
+
+        Footnotes referenced only from other footnotes are numbered, and
+        appended, while the list is emitted.
+        """
+        out = self.parts.append
+        out('<section class="footnotes"><ol>')
+        number = 0
+        while number < len(references.footnote_order):
+            block = references.footnotes[references.footnote_order[number]]
+            number += 1
+            out(f'<li id="fn-{number}">')
+            self.inline(parse_inline(" ".join(block.lines), references))
+            out(f' <a href="#fnref-{number}" class="footnote-backref">↩</a></li>')
+        out("</ol></section>")
+
+    def inline(self, nodes):
+        """Emit the HTML of TextNodes."""
+        out = self.parts.append
+        for node in nodes:
+            text_type = node.text_type
+            if text_type is None or text_type == TextType.TEXT:
+                out(escape_text(node.text))
+            elif text_type == TextType.HTML:
+                out(node.text)
+            elif text_type == TextType.IMAGE:
+                src = escape_attribute(prefix_url(node.url, self.base_url))
+                out(f'<img src="{src}" alt="{escape_attribute(node.text)}"></img>')
+            elif text_type == TextType.FOOTNOTE:
+                # The text is the footnote number, the url the id of the reference
+                out(
+                    f'<sup id="{escape_attribute(node.url)}" class="footnote-ref">'
+                    f'<a href="#fn-{escape_attribute(node.text)}">{escape_text(node.text)}</a></sup>'
+                )
+            else:
+                tag = TEXT_TAGS[text_type]
+                if text_type == TextType.LINK:
+                    out(f'<a href="{escape_attribute(prefix_url(node.url, self.base_url))}">')
+                else:
+                    out(f"<{tag}>")
+                if node.children is not None:
+                    self.inline(node.children)
+                else:
+                    out(escape_text(node.text))
+                out(f"</{tag}>")
+
+    def stream_document(self, document: Block):
+        """Emit a parsed document, yielding its HTML after each top-level block.
+
+        The yielded fragments are dropped, and each top-level block is
+        released once emitted, so a streamed page never holds more than one
+        top-level block's HTML. The chunks join to the HTML of block(document).
+        """
+        references = document.references
+        children = document.children
+        self.parts.append("<div>")
+        for i, child in enumerate(children):
+            children[i] = None
+            self.block(child, references, True)
+            yield "".join(self.parts)
+            self.parts.clear()
+        if references is not None and references.footnote_order:
+            self.footnotes(references)
+        self.parts.append("</div>")
+        yield "".join(self.parts)
+        self.parts.clear()
+
+    def to_html(self) -> str:
+        """Return the HTML emitted so far."""
+        return "".join(self.parts)
+
+
+def _has_prose(nodes) -> bool:
+    """Return True if any top-level node is plain (or extension markup), non-blank text."""
+    return any(
+        (node.text_type is None or node.text_type in (TextType.TEXT, TextType.HTML)) and node.text.strip()
+        for node in nodes
+    )
+
+
+def _text_content(nodes) -> str:
+    """Return the text of nodes as rendered, without images and footnote references."""
+    parts = []
+    for node in nodes:
+        if node.children is not None:
+            parts.append(_text_content(node.children))
+        elif node.text_type not in (TextType.IMAGE, TextType.FOOTNOTE):
+            parts.append(node.text)
+    return "".join(parts)
+
+
+def emit_markdown(markdown: str, base_url: str = "/") -> HTMLEmitter:
+    """Emit a full markdown document and return the emitter holding its HTML."""
+    emitter = HTMLEmitter(base_url)
+    emitter.block(parse_blocks(markdown))
+    return emitter
+
+
+def markdown_to_html(markdown: str) -> str:
+    """Convert a full markdown document into HTML without building a node tree."""
+    return emit_markdown(markdown).to_html()
@@ -0,0 +1,206 @@
+"""A module for registering custom block and inline markdown syntax.
+
+A BlockExtension adds a kind of leaf block, e.g. admonitions or tables,
+and an InlineExtension a kind of inline span, e.g. shortcodes. Each one is
+keyed by the characters its syntax can start with: the block parser only
+tries the block extensions of a line's first character, and the inline
+parser only stops at, and tries the extensions of, the trigger characters.
+With nothing registered the parsers take the same paths as without this
+module, apart from one check of an empty dict.
+
+Like the highlighting settings, the registry is module state; worker
+processes inherit it when they are forked.
+"""
+import contextvars
+import re
+from contextlib import contextmanager
+
+# Block extensions by the first character of their opening line, and
+# inline extensions by their trigger character; the parsers read these,
+# which are only ever changed in place
+BLOCK_EXTENSIONS = {}
+INLINE_EXTENSIONS = {}
+# Every registered extension by name
+_by_name = {}
+# The list the (kind, fields) problems reported by extensions are collected
+# in, set by collecting(); a context variable, so each thread has its own
+_reports = contextvars.ContextVar("reports", default=None)
+
+
+class BlockExtension:
+    """A custom leaf block.
+
+    The block opens on a line whose text, without its indentation, matches
+    pattern; following lines matching continuation join it until a blank
+    line. Extension blocks can interrupt paragraphs.
+    """
+
+    def __init__(self, name, pattern, render, continuation=None, chars=None, version=""):
+        """Create a block extension.
+
+        Args:
+            name: A unique name, e.g. "table"
+            pattern: Regex matched at the start of an opening line
+            render: Called with the block's lines, stripped, and the
+                document's References; returns the HTMLNode of the block
+            continuation: Regex matched at the start of the lines that
+                continue the block, "" for any line, or None for
+                single-line blocks
+            chars: The characters an opening line can start with; by default
+                the first character of pattern, which must be a literal
+            version: Changed whenever the extension's output changes, so
+                pages cached with the old output are rendered again
+        """
+        self.name = name
+        self.pattern = re.compile(pattern)
+        self.render = render
+        self.continuation = re.compile(continuation) if continuation is not None else None
+        self.chars = chars or _first_char(self.pattern)
+        self.version = version
+
+    def opens(self, text):
+        """Return True if a stripped line opens the block."""
+        return self.pattern.match(text) is not None
+
+    def continues(self, text):
+        """Return True if a stripped line continues the block."""
+        return self.continuation is not None and self.continuation.match(text) is not None
+
+    def __repr__(self):
+        """Return a string representation of the extension."""
+        return f"BlockExtension({self.name!r}, chars={self.chars!r})"
+
+
+class InlineExtension:
+    """A custom inline span, tried wherever one of its characters occurs."""
+
+    def __init__(self, name, pattern, render, chars=None, version=""):
+        """Create an inline extension.
+
+        Args:
+            name: A unique name, e.g. "kbd"
+            pattern: Regex matched at a trigger character
+            render: Called with the match object and the document's
+                References (or None); returns a TextNode, e.g. a link or a
+                TextType.HTML node holding markup, or None if the text
+                isn't a span after all
+            chars: The characters a span can start with; by default the
+                first character of pattern, which must be a literal
+            version: Changed whenever the extension's output changes, so
+                pages cached with the old output are rendered again
+        """
+        self.name = name
+        self.pattern = re.compile(pattern)
+        self.render = render
+        self.chars = chars or _first_char(self.pattern)
+        self.version = version
+
+    def match(self, text, i, references=None):
+        """Return the (TextNode, end) of a span at text[i], or None."""
+        match = self.pattern.match(text, i)
+        if match is None:
+            return None
+        node = self.render(match, references)
+        return (node, match.end()) if node is not None else None
+
+    def __repr__(self):
+        """Return a string representation of the extension."""
+        return f"InlineExtension({self.name!r}, chars={self.chars!r})"
+
+
+def _first_char(pattern):
+    """Return the literal first character of a compiled pattern, or raise ValueError."""
+    source = pattern.pattern
+    if source.startswith("\\") and len(source) > 1 and not source[1].isalnum():
+        return source[1]
+    if source and source[0] not in ".^$*+?{}[]()|\\":
+        return source[0]
+    raise ValueError(f"Can't tell which character {source!r} starts with, pass chars")
+
+
+def register(extension):
+    """Register a BlockExtension or InlineExtension, replacing one of the same name.
+
+    Returns:
+        The extension.
+    """
+    unregister(extension.name)
+    table = BLOCK_EXTENSIONS if isinstance(extension, BlockExtension) else INLINE_EXTENSIONS
+    for char in extension.chars:
+        table.setdefault(char, []).append(extension)
+    _by_name[extension.name] = extension
+    return extension
+
+
+def unregister(name):
+    """Remove the extension of a name, if there is one."""
+    extension = _by_name.pop(name, None)
+    if extension is None:
+        return
+    table = BLOCK_EXTENSIONS if isinstance(extension, BlockExtension) else INLINE_EXTENSIONS
+    for char in extension.chars:
+        table[char].remove(extension)
+        if not table[char]:
+            del table[char]
+
+
+def clear():
+    """Remove every extension."""
+    for name in list(_by_name):
+        unregister(name)
+
+
+def get(name):
+    """Return the registered extension of a name, or raise KeyError."""
+    return _by_name[name]
+
+
+def fingerprint():
+    """Return the names and versions of the registered extensions as one string, for cache keys."""
+    return "\n".join(f"{name}\0{_by_name[name].version}" for name in sorted(_by_name))
+
+
+def block_opener(text):
+    """Return the block extension a stripped line opens, or None."""
+    for extension in BLOCK_EXTENSIONS.get(text[:1], ()):
+        if extension.opens(text):
+            return extension
+    return None
+
+
+def match_inline(text, i, references=None):
+    """Return the (TextNode, end) of an inline extension's span at text[i], or None."""
+    for extension in INLINE_EXTENSIONS.get(text[i], ()):
+        result = extension.match(text, i, references)
+        if result is not None:
+            return result
+    return None
+
+
+def report(kind, **fields):
+    """Report a problem found while rendering, e.g. a link to an unknown page.
+
+    The problem goes to the list of the enclosing collecting() block, e.g.
+    the RenderedPage being rendered, and is dropped outside of one.
+    """
+    reports = _reports.get()
+    if reports is not None:
+        reports.append((kind, fields))
+
+
+@contextmanager
+def collecting():
+    """Collect the problems reported in the block into the yielded list of (kind, fields) pairs.
+
+    A nested block collects into the list of the outermost one.
+    """
+    reports = _reports.get()
+    if reports is not None:
+        yield reports
+        return
+    reports = []
+    token = _reports.set(reports)
+    try:
+        yield reports
+    finally:
+        _reports.reset(token)
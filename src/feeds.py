@@ -0,0 +1,152 @@
+"""A module for the sitemap and Atom feed.
+
+Entries are streamed to disk one at a time from the page summaries.
+"""
+import os
+from xml.sax.saxutils import escape, quoteattr
+
+from archive import open_output
+
+SITEMAP_LIMIT = 50000
+FEED_LIMIT = 20
+EPOCH = "1970-01-01"
+
+
+def is_absolute(base_url):
+    """Return True if base_url includes a scheme and host."""
+    return base_url.startswith(("http://", "https://"))
+
+
+def absolute_url(base_url, path, site_url=""):
+    """Return the absolute URL of a site path.
+
+    Args:
+        base_url: The base URL for the site, either absolute or a path prefix
+        path: The site-relative URL of the page, starting with "/"
+        site_url: Scheme and host used when base_url is only a path
+    """
+    if not is_absolute(base_url):
+        if not site_url:
+            raise ValueError("An absolute base_url or a site_url is required for feeds")
+        base_url = site_url.rstrip("/") + "/" + base_url.lstrip("/")
+    return base_url.rstrip("/") + path
+
+
+def timestamp(date):
+    """Return an RFC 3339 timestamp for an ISO date."""
+    return f"{date or EPOCH}T00:00:00Z"
+
+
+def sitemap_entries(pages):
+    """Return the (url, lastmod) pairs of the sitemap in URL order."""
+    return sorted((page.url, page.date) for page in pages)
+
+
+def write_sitemaps(entries, dest_dir, base_url, site_url="", limit=SITEMAP_LIMIT):
+    """Write sitemap.xml, split into an index and parts above limit URLs.
+
+    Args:
+        entries: Sorted (url, lastmod) pairs
+        dest_dir: Root of the generated site
+        base_url: The base URL for the site
+        site_url: Scheme and host used when base_url is only a path
+        limit: Maximum number of URLs per sitemap file
+
+    Returns:
+        The paths of the written files.
+    """
+    if len(entries) <= limit:
+        path = os.path.join(dest_dir, "sitemap.xml")
+        _write_urlset(path, entries, base_url, site_url)
+        return [path]
+
+    paths = []
+    index_path = os.path.join(dest_dir, "sitemap.xml")
+    with open_output(index_path) as index:
+        index.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        index.write('<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for number, start in enumerate(range(0, len(entries), limit), start=1):
+            name = f"sitemap-{number}.xml"
+            path = os.path.join(dest_dir, name)
+            _write_urlset(path, entries[start:start + limit], base_url, site_url)
+            paths.append(path)
+            loc = escape(absolute_url(base_url, "/" + name, site_url))
+            index.write(f"<sitemap><loc>{loc}</loc></sitemap>\n")
+        index.write("</sitemapindex>\n")
+    return [index_path] + paths
+
+
+def _write_urlset(path, entries, base_url, site_url):
+    """Stream one sitemap file to disk."""
+    with open_output(path) as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for url, lastmod in entries:
+            loc = escape(absolute_url(base_url, url, site_url))
+            if lastmod:
+                f.write(f"<url><loc>{loc}</loc><lastmod>{escape(lastmod)}</lastmod></url>\n")
+            else:
+                f.write(f"<url><loc>{loc}</loc></url>\n")
+        f.write("</urlset>\n")
+
+
+def feed_entries(pages, section="/blog/", limit=FEED_LIMIT):
+    """Return the (url, title, date, excerpt) tuples of the newest posts."""
+    posts = [page for page in pages if page.url.startswith(section) and page.url != section]
+    posts.sort(key=lambda page: page.url)
+    posts.sort(key=lambda page: page.date or EPOCH, reverse=True)
+    return [(page.url, page.title, page.date, page.excerpt) for page in posts[:limit]]
+
+
+def write_atom_feed(entries, dest_path, base_url, site_url="", title="Feed", section="/blog/"):
+    """Stream an Atom feed of the given entries to dest_path.
+
+    Args:
+        entries: (url, title, date, excerpt) tuples, newest first
+        dest_path: Path of the feed file
+        base_url: The base URL for the site
+        site_url: Scheme and host used when base_url is only a path
+        title: Title of the feed
+        section: Site URL of the section the feed covers
+    """
+    updated = timestamp(entries[0][2] if entries else None)
+    feed_url = absolute_url(base_url, "/" + os.path.basename(dest_path), site_url)
+    with open_output(dest_path) as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        f.write('<feed xmlns="http://www.w3.org/2005/Atom">\n')
+        f.write(f"<title>{escape(title)}</title>\n")
+        f.write(f"<id>{escape(feed_url)}</id>\n")
+        f.write(f"<link rel=\"self\" href={quoteattr(feed_url)}/>\n")
+        f.write(f"<link href={quoteattr(absolute_url(base_url, section, site_url))}/>\n")
+        f.write(f"<updated>{updated}</updated>\n")
+        for url, entry_title, date, excerpt in entries:
+            link = absolute_url(base_url, url, site_url)
+            f.write("<entry>")
+            f.write(f"<title>{escape(entry_title)}</title>")
+            f.write(f"<id>{escape(link)}</id>")
+            f.write(f"<link href={quoteattr(link)}/>")
+            f.write(f"<updated>{timestamp(date)}</updated>")
+            if excerpt:
+                f.write(f"<summary>{escape(excerpt)}</summary>")
+            f.write("</entry>\n")
+        f.write("</feed>\n")
+
+
+def generate_feeds(pages, dest_dir, base_url, site_url="", feed_title="Feed", section="/blog/"):
+    """Write the sitemap and Atom feed.
+
+    Args:
+        pages: Page summaries collected by generate_pages_recursive
+        dest_dir: Root of the generated site
+        base_url: The base URL for the site
+        site_url: Scheme and host used when base_url is only a path
+        feed_title: Title of the Atom feed
+        section: Site URL of the section the feed covers
+
+    Returns:
+        The paths of the written files.
+    """
+    written = write_sitemaps(sitemap_entries(pages), dest_dir, base_url, site_url)
+    feed_path = os.path.join(dest_dir, "atom.xml")
+    write_atom_feed(feed_entries(pages, section), feed_path, base_url, site_url, feed_title, section)
+    return written + [feed_path]
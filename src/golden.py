@@ -0,0 +1,265 @@
+"""A golden-output regression corpus and a differential fuzzer for the renderer.
+
+The corpus is every page in content/ plus the cases in testdata/golden/cases,
+hand-written edge cases and generated ones. The HTML of each is stored next
+to it (content pages under testdata/golden/content) and compared on every
+test run. Syntax highlighting is turned off so the output doesn't depend on
+the installed Pygments.
+
+The fuzzer renders random markdown with every alternate renderer and compares
+the result with the reference renderer, shrinking any mismatch to a small
+reproducer.
+
+Usage:
+    python3 src/golden.py check              diff the corpus against the goldens
+    python3 src/golden.py update             rewrite the goldens
+    python3 src/golden.py fuzz [--count N] [--seed S] [--renderer NAME]
+    python3 src/golden.py generate [--count N]
+                                             write generated cases
+"""
+import argparse
+import difflib
+import glob
+import os
+import random
+import sys
+from contextlib import contextmanager
+
+import highlight
+from emit import markdown_to_html
+from helpers import markdown_to_html_node
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+CONTENT_DIR = os.path.join(SRC_DIR, "..", "content")
+GOLDEN_DIR = os.path.join(SRC_DIR, "testdata", "golden")
+CASES_DIR = os.path.join(GOLDEN_DIR, "cases")
+
+# Renderers by name; every one must match the reference byte for byte
+RENDERERS = {
+    "tree": lambda markdown: markdown_to_html_node(markdown).to_html(),
+    "chunks": lambda markdown: "".join(markdown_to_html_node(markdown).to_html_chunks()),
+    "direct": markdown_to_html,
+}
+REFERENCE = "tree"
+
+
+@contextmanager
+def no_highlighting():
+    """Turn syntax highlighting off for the duration of the block."""
+    highlight.set_enabled(False)
+    try:
+        yield
+    finally:
+        highlight.set_enabled(True)
+
+
+def corpus():
+    """Return the (name, markdown path, golden path) triples of the corpus."""
+    entries = []
+    for path in sorted(glob.glob(os.path.join(CONTENT_DIR, "**", "*.md"), recursive=True)):
+        name = "content/" + os.path.relpath(path, CONTENT_DIR).replace(os.sep, "/")
+        entries.append((name, path, os.path.join(GOLDEN_DIR, name[:-3] + ".html")))
+    for path in sorted(glob.glob(os.path.join(CASES_DIR, "*.md"))):
+        entries.append(("cases/" + os.path.basename(path), path, path[:-3] + ".html"))
+    return entries
+
+
+def render(markdown, renderer=REFERENCE):
+    """Render markdown with a named renderer and without highlighting."""
+    with no_highlighting():
+        return RENDERERS[renderer](markdown)
+
+
+def _read(path):
+    """Return the contents of a text file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _write(path, text):
+    """Write a text file, creating its directory if needed."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def html_diff(expected, actual):
+    """Return a line diff of two HTML strings, split between tags for reading."""
+    return "\n".join(difflib.unified_diff(
+        expected.replace("><", ">\n<").split("\n"),
+        actual.replace("><", ">\n<").split("\n"),
+        "golden", "rendered", lineterm="",
+    ))
+
+
+def check(renderer=REFERENCE):
+    """Render the corpus and return the (name, diff) pairs of mismatches."""
+    failures = []
+    for name, source_path, golden_path in corpus():
+        if not os.path.exists(golden_path):
+            failures.append((name, "missing golden, run: python3 src/golden.py update"))
+            continue
+        expected = _read(golden_path)
+        actual = render(_read(source_path), renderer)
+        if actual != expected:
+            failures.append((name, html_diff(expected, actual)))
+    return failures
+
+
+def update():
+    """Rewrite the goldens from the reference renderer and return their count."""
+    entries = corpus()
+    for _, source_path, golden_path in entries:
+        _write(golden_path, render(_read(source_path)))
+    return len(entries)
+
+
+# Pieces random inline text is assembled from
+INLINE_PIECES = [
+    "word", "Tom", "merry", "snake_case_name", "2 * 3", " ", " ", " ", "*", "**", "***", "_", "__",
+    "`", "``", "[", "]", "(", ")", "![", "](/a)", "](/b \"t\")", "[ref]", "[ref][]", "][ref]", "[^1]",
+    "[^2]", "<https://boot.dev>", "<me@boot.dev>", "<", ">", "&", "\"", "'", "!", "#", "-", "1.", ".",
+    "é", "—",
+]
+
+
+def random_inline(rng, pieces=8):
+    """Return a random line of inline markdown."""
+    return "".join(rng.choice(INLINE_PIECES) for _ in range(rng.randint(1, pieces))).strip() or "x"
+
+
+def random_block(rng, depth=0):
+    """Return the lines of a random block."""
+    kind = rng.choice(["paragraph", "paragraph", "heading", "list", "ordered", "quote", "code", "definition"])
+    if kind == "paragraph":
+        return [random_inline(rng) for _ in range(rng.randint(1, 3))]
+    if kind == "heading":
+        return ["#" * rng.randint(1, 6) + " " + random_inline(rng)]
+    if kind in ("list", "ordered") and depth < 2:
+        lines = []
+        for i in range(rng.randint(1, 4)):
+            marker = f"{i + 1}. " if kind == "ordered" else rng.choice(["- ", "* "])
+            lines.append(marker + random_inline(rng))
+            if rng.random() < 0.3:
+                lines += [" " * len(marker) + line for line in random_block(rng, depth + 1)]
+        return lines
+    if kind == "quote" and depth < 2:
+        return ["> " + line if line else ">" for line in random_block(rng, depth + 1)]
+    if kind == "code":
+        language = rng.choice(["", "python", "x"])
+        return ["```" + language] + [random_inline(rng) for _ in range(rng.randint(0, 3))] + ["```"]
+    if kind == "definition":
+        return [rng.choice(["[ref]: /ref", "[^1]: " + random_inline(rng), "[^2]: note"])]
+    return [random_inline(rng)]
+
+
+def random_markdown(rng, blocks=6):
+    """Return a random markdown document."""
+    lines = []
+    for _ in range(rng.randint(1, blocks)):
+        lines += random_block(rng)
+        lines += [""] * rng.choice([0, 1, 1, 2])
+    return "\n".join(lines)
+
+
+def compare(markdown, renderer):
+    """Return a description of how a renderer differs from the reference, or None."""
+    try:
+        expected = render(markdown)
+    except Exception as e:
+        return f"reference renderer failed: {type(e).__name__}: {e}"
+    try:
+        actual = render(markdown, renderer)
+    except Exception as e:
+        return f"{renderer} failed: {type(e).__name__}: {e}"
+    if actual != expected:
+        return html_diff(expected, actual)
+    return None
+
+
+def shrink(markdown, renderer):
+    """Remove lines, then characters, while the mismatch persists."""
+    lines = markdown.split("\n")
+    i = 0
+    while i < len(lines):
+        candidate = lines[:i] + lines[i + 1:]
+        if compare("\n".join(candidate), renderer) is not None:
+            lines = candidate
+        else:
+            i += 1
+    text = "\n".join(lines)
+    i = 0
+    while i < len(text):
+        candidate = text[:i] + text[i + 1:]
+        if compare(candidate, renderer) is not None:
+            text = candidate
+        else:
+            i += 1
+    return text
+
+
+def fuzz(count=1000, seed=0, renderers=None):
+    """Compare renderers on random markdown.
+
+    Returns:
+        A list of (renderer, seed, shrunk markdown, difference) tuples, at
+        most one per renderer.
+    """
+    if renderers is None:
+        renderers = [name for name in RENDERERS if name != REFERENCE]
+    failures = []
+    for renderer in renderers:
+        for case_seed in range(seed, seed + count):
+            markdown = random_markdown(random.Random(case_seed))
+            if compare(markdown, renderer) is not None:
+                markdown = shrink(markdown, renderer)
+                failures.append((renderer, case_seed, markdown, compare(markdown, renderer)))
+                break
+    return failures
+
+
+def generate(count):
+    """Write generated cases, replacing earlier ones, and return their paths."""
+    for path in glob.glob(os.path.join(CASES_DIR, "generated-*.md")):
+        os.remove(path)
+    paths = []
+    for seed in range(count):
+        path = os.path.join(CASES_DIR, f"generated-{seed:03d}.md")
+        _write(path, random_markdown(random.Random(seed), blocks=12) + "\n")
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    """The command line entry point."""
+    parser = argparse.ArgumentParser(description="Check the renderer against golden output.")
+    parser.add_argument("command", nargs="?", default="check", choices=["check", "update", "fuzz", "generate"])
+    parser.add_argument("--count", type=int, default=None, help="Number of fuzz or generated cases")
+    parser.add_argument("--seed", type=int, default=0, help="First fuzz seed")
+    parser.add_argument("--renderer", choices=sorted(RENDERERS), help="Only fuzz this renderer")
+    args = parser.parse_args(argv)
+
+    if args.command == "update":
+        print(f"Wrote {update()} goldens")
+        return 0
+    if args.command == "generate":
+        print(f"Wrote {len(generate(args.count or 60))} cases, now run: python3 src/golden.py update")
+        return 0
+    if args.command == "fuzz":
+        count = args.count or 1000
+        failures = fuzz(count, args.seed, [args.renderer] if args.renderer else None)
+        for renderer, seed, markdown, difference in failures:
+            print(f"{renderer} differs from {REFERENCE} (seed {seed}) on:\n{markdown!r}\n{difference}\n")
+        if not failures:
+            print(f"{count} random documents rendered identically")
+        return 1 if failures else 0
+
+    failures = check()
+    for name, difference in failures:
+        print(f"{name}:\n{difference}\n")
+    print(f"{len(corpus()) - len(failures)} of {len(corpus())} match their goldens")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,23 @@
 import re
+import textwrap
 from enum import Enum
 from textnode import TextNode, TextType
 from htmlnode import HTMLNode, ParentNode, LeafNode
+from highlight import CSS_CLASS, highlight_code
+from inline import References, find_link_spans, parse_inline
+import extensions
+from extensions import BLOCK_EXTENSIONS, block_opener
+
+CODE_LANGUAGE_RE = re.compile(r"^[\w+#.-]+$")
+HEADING_RE = re.compile(r"^(#{1,6}) (.+)")
+LIST_ITEM_RE = re.compile(r"([-*]|\d+\.) ")
+REFERENCE_DEF_RE = re.compile(
+    r"^\[([^\[\]^][^\[\]]*)]:[ \t]*<?([^\s<>]+)>?(?:[ \t]+(?:\"[^\"]*\"|'[^']*'|\([^()]*\)))?$"
+)
+# Most quotes, lists and list items open at once; deeper markers are text,
+# so rendering the tree stays well within the recursion limit
+MAX_NESTING_DEPTH = 100
+FOOTNOTE_DEF_RE = re.compile(r"^\[\^([^\[\]\s]+)]:[ \t]*(.*)$")
 
 
 class BlockType(Enum):
@@ -11,18 +27,27 @@ class BlockType(Enum):
     QUOTE = "quote"
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
+    LIST_ITEM = "list_item"
+    DOCUMENT = "document"
+    EXTENSION = "extension"
 
 
 def split_nodes_delimiter(
         old_nodes: list[TextNode], delimiter: str, text_type: TextType
 ) -> list[TextNode]:
-    """Split the nodes into a list of nodes delimited by the delimiter."""
+    """Split the nodes into a list of nodes delimited by the delimiter.
+
+    Delimiters are paired from the left; an unmatched last delimiter is
+    kept as text. text_to_textnodes uses parse_inline instead, which also
+    nests and applies the delimiter-run rules.
+    """
     new_nodes = []
     for node in old_nodes:
         if node.text_type is None or node.text_type == TextType.TEXT:
             parts = node.text.split(delimiter)
             if len(parts) % 2 == 0:
-                raise ValueError(f"Invalid markdown: unmatched delimiter '{delimiter}'")
+                # Keep the unmatched delimiter as text
+                parts[-2:] = [delimiter.join(parts[-2:])]
             for i, part in enumerate(parts):
                 if part == "":
                     continue
@@ -37,76 +62,67 @@ def split_nodes_delimiter(
 
 def extract_markdown_images(text: str) -> list[tuple[str, str]]:
     """Extract alt text and URL of Markdown images from text."""
-    return re.findall(r"!\[(.*?)]\((.*?)\)", text)
+    return [
+        (node.text, node.url) for _, _, node in find_link_spans(text) if node.text_type == TextType.IMAGE
+    ]
 
 
 def extract_markdown_links(text: str) -> list[tuple[str, str]]:
     """Extract Markdown links from text."""
-    return re.findall(r"(?<!!)\[(.*?)]\((.*?)\)", text)
+    return [
+        (node.text, node.url) for _, _, node in find_link_spans(text) if node.text_type == TextType.LINK
+    ]
 
 
-def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
-    """Split nodes by images."""
+def split_nodes_links(
+        old_nodes: list[TextNode], references: References | None = None, text_types=None
+) -> list[TextNode]:
+    """Split nodes by links, images, autolinks and footnote references.
+
+    Args:
+        old_nodes: The nodes to split; only TEXT nodes are scanned
+        references: The document's definitions, if any
+        text_types: Optional set of the TextTypes to split out, by default all
+    """
     new_nodes = []
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
-        original_text = node.text
-        images = extract_markdown_images(original_text)
-        if len(images) == 0:
+        text = node.text
+        spans = find_link_spans(text, references)
+        if text_types is not None:
+            spans = [span for span in spans if span[2].text_type in text_types]
+        if not spans:
             new_nodes.append(node)
             continue
-        for image in images:
-            sections = original_text.split(f"![{image[0]}]({image[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown, image section not found")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(
-                TextNode(image[0], TextType.IMAGE, image[1])
-            )
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
+        position = 0
+        for start, end, link in spans:
+            if start > position:
+                new_nodes.append(TextNode(text[position:start], TextType.TEXT))
+            new_nodes.append(link)
+            position = end
+        if position < len(text):
+            new_nodes.append(TextNode(text[position:], TextType.TEXT))
     return new_nodes
 
 
+def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
+    """Split nodes by images."""
+    return split_nodes_links(old_nodes, text_types={TextType.IMAGE})
+
+
 def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
     """Split nodes by links."""
-    new_nodes = []
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
-            continue
-        original_text = node.text
-        links = extract_markdown_links(original_text)
-        if len(links) == 0:
-            new_nodes.append(node)
-            continue
-        for link in links:
-            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown, link section not found")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
-    return new_nodes
+    return split_nodes_links(old_nodes, text_types={TextType.LINK})
+
 
+def text_to_textnodes(text: str, references: References | None = None) -> list[TextNode]:
+    """Convert a raw string of Markdown into a list of TextNodes.
 
-def text_to_textnodes(text: str) -> list[TextNode]:
-    """Convert a raw string of Markdown into a list of TextNodes."""
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    return nodes
+    Emphasis and links may nest; see parse_inline.
+    """
+    return parse_inline(text, references)
 
 
 def markdown_to_blocks(markdown: str) -> list[str]:
@@ -130,6 +146,8 @@ def block_to_block_type(block: str) -> BlockType:
     """Determine the block type of a block string."""
     lines = block.split("\n")
 
+    if BLOCK_EXTENSIONS and block_opener(lines[0].strip()) is not None:
+        return BlockType.EXTENSION
     if re.match(r"^#{1,6} ", lines[0]) and len(lines) == 1:
         return BlockType.HEADING
     if block.startswith("```") and block.endswith("```"):
@@ -143,79 +161,361 @@ def block_to_block_type(block: str) -> BlockType:
     return BlockType.PARAGRAPH
 
 
-def text_to_children(text: str) -> list[LeafNode]:
+def text_to_children(text: str, references: References | None = None) -> list[HTMLNode]:
     """Convert a string of text with inline markdown into a list of HTMLNodes."""
-    text_nodes = text_to_textnodes(text)
+    text_nodes = text_to_textnodes(text, references)
     return [LeafNode.text_node_to_html_node(node) for node in text_nodes]
 
 
+def code_block_to_html_node(block: str) -> ParentNode:
+    """Convert a fenced code block into a <pre><code> node.
+
+    An optional language name after the opening fence is used to highlight
+    the code. Relative indentation of the code is preserved.
+    """
+    # Extract code content (remove surrounding ```)
+    code_text = block[3:-3]
+    lines = code_text.split("\n")
+    language = None
+    if len(lines) > 1 and CODE_LANGUAGE_RE.match(lines[0]):
+        language = lines[0]
+        lines = lines[1:]
+    # Remove empty first/last lines
+    if lines and lines[0].strip() == "":
+        lines = lines[1:]
+    if lines and lines[-1].strip() == "":
+        lines = lines[:-1]
+    # Remove the indentation common to all lines
+    code_text = textwrap.dedent("\n".join(lines))
+    if lines:  # Add trailing newline if there's content
+        code_text += "\n"
+
+    # Code blocks don't parse inline markdown
+    if language is None:
+        return ParentNode("pre", [LeafNode("code", code_text)])
+    code_props = {"class": f"language-{language}"}
+    highlighted = highlight_code(code_text, language)
+    if highlighted is None:
+        return ParentNode("pre", [LeafNode("code", code_text, code_props)])
+    # Highlighted code is already escaped HTML
+    return ParentNode("pre", [LeafNode("code", highlighted, code_props, escaped=True)], {"class": CSS_CLASS})
+
+
+class Block:
+    """A node of the block structure of a markdown document.
+
+    Container blocks (the document, quotes, lists and list items) hold
+    child blocks; leaf blocks (paragraphs, headings and code) hold lines.
+    """
+
+    def __init__(self, block_type: BlockType, indent: int = 0):
+        self.block_type = block_type
+        self.indent = indent
+        self.children = []
+        self.lines = []
+        self.start = 1
+        # The 1-based line the block starts on in the parsed markdown
+        self.line = 0
+        # The References of a document block
+        self.references = None
+        # The name of the BlockExtension of an extension block
+        self.extension = None
+
+    def __repr__(self):
+        """Return a string representation of the block."""
+        return f"Block({self.block_type.value}, children={len(self.children)}, lines={self.lines!r})"
+
+
+def _starts_block(text: str) -> bool:
+    """Return True if a line opens a block instead of continuing a paragraph."""
+    stripped = text.lstrip(" ")
+    return (
+            stripped.startswith((">", "```"))
+            or HEADING_RE.match(stripped) is not None
+            or LIST_ITEM_RE.match(stripped) is not None
+            or bool(BLOCK_EXTENSIONS) and block_opener(stripped) is not None
+    )
+
+
+def _strip_quote_marker(stripped: str) -> str:
+    """Remove the ">" (and one following space) from the start of a line."""
+    return stripped[2:] if stripped.startswith("> ") else stripped[1:]
+
+
+def parse_blocks(markdown: str) -> Block:
+    """Parse a markdown document into a tree of Blocks in one pass over its lines.
+
+    Open container blocks are kept on an explicit stack. Each line is first
+    matched against the open containers from the outside in, then new
+    containers are opened for any quote or list markers, and what remains
+    of the line continues or opens a leaf block.
+    """
+    document = Block(BlockType.DOCUMENT)
+    document.references = References()
+    stack = [document]
+    leaf = None
+    # The paragraph of the latest footnote definition
+    footnote = None
+    previous_blank = False
+
+    for number, line in enumerate(markdown.split("\n"), start=1):
+        # Match the line against the open containers
+        rest = line
+        matched = 1
+        for container in stack[1:]:
+            if container.block_type == BlockType.QUOTE:
+                stripped = rest.lstrip(" ")
+                if not stripped.startswith(">"):
+                    break
+                rest = _strip_quote_marker(stripped)
+                container.lines.append(rest)
+            elif container.block_type == BlockType.LIST_ITEM and rest.strip():
+                if len(rest) - len(rest.lstrip(" ")) < container.indent:
+                    break
+                rest = rest[container.indent:]
+            matched += 1
+
+        # Fenced code continues until its closing fence or its container ends
+        if leaf is not None and leaf.block_type == BlockType.CODE:
+            if matched == len(stack):
+                leaf.lines.append(rest.rstrip() if rest.rstrip().endswith("```") else rest)
+                if rest.rstrip().endswith("```"):
+                    leaf = None
+                continue
+            leaf.lines.append("```")
+            leaf = None
+
+        if matched < len(stack):
+            # Lazy continuation of a paragraph in an unmatched container
+            if (
+                    leaf is not None and leaf.block_type == BlockType.PARAGRAPH
+                    and rest.strip() and not _starts_block(rest)
+            ):
+                leaf.lines.append(rest.strip())
+                for container in stack[matched:]:
+                    if container.block_type == BlockType.QUOTE:
+                        container.lines.append(rest.strip())
+                previous_blank = False
+                continue
+            del stack[matched:]
+            leaf = None
+
+        # Open new quotes, lists and list items
+        while True:
+            stripped = rest.lstrip(" ")
+            top = stack[-1]
+            top_is_list = top.block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST)
+            if stripped.startswith(">") and len(stack) - top_is_list < MAX_NESTING_DEPTH:
+                if top_is_list:
+                    stack.pop()
+                quote = Block(BlockType.QUOTE)
+                quote.line = number
+                stack[-1].children.append(quote)
+                stack.append(quote)
+                rest = _strip_quote_marker(stripped)
+                quote.lines.append(rest)
+                leaf = None
+                continue
+            match = LIST_ITEM_RE.match(stripped)
+            if match:
+                marker = match.group(1)
+                ordered = marker[0].isdigit()
+                list_type = BlockType.ORDERED_LIST if ordered else BlockType.UNORDERED_LIST
+                # A blank line between items starts a new list
+                if top_is_list and (top.block_type != list_type or previous_blank):
+                    stack.pop()
+                    top = stack[-1]
+                if len(stack) + (top.block_type != list_type) >= MAX_NESTING_DEPTH:
+                    # Nested too deeply, the marker is text
+                    if top.block_type == list_type:
+                        stack.pop()
+                    break
+                if top.block_type != list_type:
+                    # Only "1." may interrupt a paragraph
+                    interrupting = leaf is not None and leaf.block_type == BlockType.PARAGRAPH
+                    if interrupting and ordered and marker != "1.":
+                        break
+                    new_list = Block(list_type)
+                    new_list.line = number
+                    if ordered:
+                        new_list.start = int(marker[:-1])
+                    top.children.append(new_list)
+                    stack.append(new_list)
+                item = Block(BlockType.LIST_ITEM, len(rest) - len(stripped) + len(match.group(0)))
+                item.line = number
+                stack[-1].children.append(item)
+                stack.append(item)
+                rest = stripped[len(match.group(0)):]
+                leaf = None
+                continue
+            # Anything other than an item ends a list
+            if top_is_list:
+                stack.pop()
+            break
+
+        # Continue or open a leaf block
+        stripped = rest.strip()
+        if not stripped:
+            leaf = None
+            previous_blank = True
+            continue
+        previous_blank = False
+        if BLOCK_EXTENSIONS:
+            if leaf is not None and leaf.block_type == BlockType.EXTENSION:
+                if extensions.get(leaf.extension).continues(stripped):
+                    leaf.lines.append(stripped)
+                    continue
+                leaf = None
+            extension = block_opener(stripped)
+            if extension is not None:
+                leaf = Block(BlockType.EXTENSION)
+                leaf.line = number
+                leaf.extension = extension.name
+                leaf.lines.append(stripped)
+                stack[-1].children.append(leaf)
+                if extension.continuation is None:
+                    leaf = None
+                continue
+        if stripped.startswith("```"):
+            leaf = Block(BlockType.CODE)
+            leaf.line = number
+            leaf.lines.append(stripped)
+            stack[-1].children.append(leaf)
+            if len(stripped) >= 6 and stripped.endswith("```"):
+                leaf = None
+        elif HEADING_RE.match(stripped):
+            heading = Block(BlockType.HEADING)
+            heading.line = number
+            heading.lines.append(stripped)
+            stack[-1].children.append(heading)
+            leaf = None
+        elif (leaf is None or leaf is footnote) and REFERENCE_DEF_RE.match(stripped):
+            # Definitions can't interrupt a paragraph and render nothing
+            match = REFERENCE_DEF_RE.match(stripped)
+            document.references.define_link(match.group(1), match.group(2))
+            leaf = None
+        elif (leaf is None or leaf is footnote) and FOOTNOTE_DEF_RE.match(stripped):
+            # The footnote's paragraph is kept out of the tree
+            match = FOOTNOTE_DEF_RE.match(stripped)
+            leaf = footnote = Block(BlockType.PARAGRAPH)
+            leaf.line = number
+            if match.group(2):
+                leaf.lines.append(match.group(2))
+            document.references.define_footnote(match.group(1), leaf)
+        elif leaf is not None:
+            leaf.lines.append(stripped)
+        else:
+            leaf = Block(BlockType.PARAGRAPH)
+            leaf.line = number
+            leaf.lines.append(stripped)
+            stack[-1].children.append(leaf)
+
+    if leaf is not None and leaf.block_type == BlockType.CODE:
+        leaf.lines.append("```")
+    return document
+
+
+def block_to_html_node(block: Block, references: References | None = None) -> HTMLNode:
+    """Convert a parsed Block and its children into an HTMLNode.
+
+    The references are those of the enclosing document; a document block
+    uses its own.
+    """
+    block_type = block.block_type
+
+    if block_type == BlockType.DOCUMENT:
+        references = block.references
+        children = [block_to_html_node(child, references) for child in block.children]
+        if references is not None and references.footnote_order:
+            children.append(footnotes_to_html_node(references))
+        return ParentNode("div", children)
+
+    if block_type == BlockType.PARAGRAPH:
+        # Join lines within the paragraph with spaces
+        return ParentNode("p", text_to_children(" ".join(block.lines), references))
+
+    if block_type == BlockType.HEADING:
+        # Extract heading level and text
+        match = HEADING_RE.match(block.lines[0])
+        level = len(match.group(1))
+        return ParentNode(f"h{level}", text_to_children(match.group(2), references))
+
+    if block_type == BlockType.CODE:
+        return code_block_to_html_node("\n".join(block.lines))
+
+    if block_type == BlockType.EXTENSION:
+        return extensions.get(block.extension).render(block.lines, references)
+
+    if block_type == BlockType.QUOTE:
+        # Quotes of plain text keep their line breaks and get no <p> wrappers
+        if all(child.block_type == BlockType.PARAGRAPH for child in block.children):
+            quote_text = "\n".join(line.strip() for line in block.lines)
+            return ParentNode("blockquote", text_to_children(quote_text, references))
+        return ParentNode("blockquote", [block_to_html_node(child, references) for child in block.children])
+
+    if block_type == BlockType.UNORDERED_LIST:
+        return ParentNode("ul", [block_to_html_node(child, references) for child in block.children])
+
+    if block_type == BlockType.ORDERED_LIST:
+        props = {"start": str(block.start)} if block.start != 1 else None
+        return ParentNode("ol", [block_to_html_node(child, references) for child in block.children], props)
+
+    if block_type == BlockType.LIST_ITEM:
+        # A single paragraph is rendered inline, several get <p> wrappers
+        paragraphs = sum(1 for child in block.children if child.block_type == BlockType.PARAGRAPH)
+        children = []
+        for child in block.children:
+            if child.block_type == BlockType.PARAGRAPH and paragraphs == 1:
+                children.extend(text_to_children(" ".join(child.lines), references))
+            else:
+                children.append(block_to_html_node(child, references))
+        return ParentNode("li", children)
+
+    return ParentNode("div", [block_to_html_node(child, references) for child in block.children])
+
+
+def footnotes_to_html_node(references: References) -> ParentNode:
+    """Render the referenced footnotes of a document as a numbered list.
+
+    Footnotes referenced only from other footnotes are numbered, and
+    appended, while the list is rendered.
+    """
+    items = []
+    number = 0
+    while number < len(references.footnote_order):
+        block = references.footnotes[references.footnote_order[number]]
+        number += 1
+        children = text_to_children(" ".join(block.lines), references)
+        children.append(LeafNode(None, " "))
+        children.append(LeafNode("a", "\u21a9", {"href": f"#fnref-{number}", "class": "footnote-backref"}))
+        items.append(ParentNode("li", children, {"id": f"fn-{number}"}))
+    return ParentNode("section", [ParentNode("ol", items)], {"class": "footnotes"})
+
+
 def markdown_to_html_node(markdown: str) -> HTMLNode:
     """Convert a full markdown document into a single parent HTMLNode."""
-    blocks = markdown_to_blocks(markdown)
-    children = []
-
-    for block in blocks:
-        block_type = block_to_block_type(block)
-
-        if block_type == BlockType.HEADING:
-            # Extract heading level and text
-            match = re.match(r"^(#{1,6}) (.+)", block)
-            level = len(match.group(1))
-            text = match.group(2)
-            children.append(ParentNode(f"h{level}", text_to_children(text)))
-
-        elif block_type == BlockType.CODE:
-            # Extract code content (remove surrounding ```)
-            code_text = block[3:-3]
-            # Remove leading/trailing newlines and strip each line
-            lines = code_text.split("\n")
-            # Remove empty first/last lines
-            if lines and lines[0].strip() == "":
-                lines = lines[1:]
-            if lines and lines[-1].strip() == "":
-                lines = lines[:-1]
-            # Strip leading indentation from each line
-            stripped_lines = [line.strip() for line in lines]
-            code_text = "\n".join(stripped_lines)
-            if stripped_lines:  # Add trailing newline if there's content
-                code_text += "\n"
-            # Code blocks don't parse inline markdown
-            code_node = LeafNode("code", code_text)
-            children.append(ParentNode("pre", [code_node]))
-
-        elif block_type == BlockType.QUOTE:
-            # Remove leading ">" from each line
-            lines = block.split("\n")
-            quote_text = "\n".join(line[1:].strip() if line.startswith("> ") else line[1:] for line in lines)
-            children.append(ParentNode("blockquote", text_to_children(quote_text)))
-
-        elif block_type == BlockType.UNORDERED_LIST:
-            # Split into list items
-            lines = block.split("\n")
-            list_items = []
-            for line in lines:
-                # Remove "- " or "* " prefix
-                item_text = line[2:]
-                list_items.append(ParentNode("li", text_to_children(item_text)))
-            children.append(ParentNode("ul", list_items))
-
-        elif block_type == BlockType.ORDERED_LIST:
-            # Split into list items
-            lines = block.split("\n")
-            list_items = []
-            for line in lines:
-                # Remove "N. " prefix
-                item_text = re.sub(r"^\d+\. ", "", line)
-                list_items.append(ParentNode("li", text_to_children(item_text)))
-            children.append(ParentNode("ol", list_items))
-
-        else:  # PARAGRAPH
-            # Join lines within the paragraph with spaces, stripping each line
-            lines = [line.strip() for line in block.split("\n")]
-            paragraph_text = " ".join(lines)
-            children.append(ParentNode("p", text_to_children(paragraph_text)))
-
-    return ParentNode("div", children)
+    return block_to_html_node(parse_blocks(markdown))
+
+
+def extract_front_matter(markdown: str) -> tuple[dict[str, str], str]:
+    """Split optional front matter off a markdown document.
+
+    Front matter is a leading block of `key: value` lines fenced by `---`.
+    Returns the metadata dict and the remaining markdown.
+    """
+    if not markdown.startswith("---\n"):
+        return {}, markdown
+    end = markdown.find("\n---\n", 3)
+    if end == -1:
+        if not markdown.endswith("\n---"):
+            return {}, markdown
+        end = len(markdown) - 4
+    metadata = {}
+    for line in markdown[4:end].split("\n"):
+        key, sep, value = line.partition(":")
+        if sep and key.strip():
+            metadata[key.strip().lower()] = value.strip()
+    return metadata, markdown[end + 5:]
 
 
 def extract_title(markdown):
@@ -0,0 +1,140 @@
+"""A module for syntax highlighting code blocks.
+
+Highlighting uses Pygments when it is installed. Highlighted HTML is
+memoized in memory, for the most recently used blocks, and, if a cache
+directory is configured, on disk keyed by language and a hash of the code.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+try:
+    import pygments
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:  # pragma: no cover - depends on the environment
+    pygments = None
+
+CSS_CLASS = "highlight"
+
+# Number of highlighted blocks memoized in memory
+MAX_MEMORY_ENTRIES = 10000
+
+_cache_dir = None
+_enabled = True
+# The highlighted HTML of blocks by cache key, least recently used first
+_memory = OrderedDict()
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+
+
+def set_cache_dir(path):
+    """Set the directory highlighted blocks are cached in, or None to disable."""
+    global _cache_dir
+    _cache_dir = path
+
+
+def set_enabled(enabled):
+    """Turn highlighting on or off, e.g. for output that mustn't depend on Pygments."""
+    global _enabled
+    _enabled = enabled
+
+
+def is_available():
+    """Return True if Pygments is installed."""
+    return pygments is not None
+
+
+def fingerprint():
+    """Return what highlighted output depends on besides the code: whether and which Pygments is used."""
+    if pygments is None or not _enabled:
+        return "off"
+    return f"pygments-{pygments.__version__}"
+
+
+def cache_key(language, code):
+    """Return the cache key of a code block."""
+    version = pygments.__version__ if pygments else "none"
+    digest = hashlib.sha256(code.encode("utf-8")).hexdigest()
+    return f"{language}-{version}-{digest}"
+
+
+def highlight_code(code, language):
+    """Return highlighted HTML for code, or None if it can't be highlighted.
+
+    Args:
+        code: The source code of the block
+        language: The language name from the fence, e.g. "python"
+    """
+    if pygments is None or not _enabled or not language:
+        return None
+
+    key = cache_key(language, code)
+    with _lock:
+        if key in _memory:
+            stats["hits"] += 1
+            _memory.move_to_end(key)
+            return _memory[key]
+
+    html = _read_cache(key)
+    if html is None:
+        try:
+            lexer = get_lexer_by_name(language)
+        except ClassNotFound:
+            html = ""
+        else:
+            html = pygments.highlight(code, lexer, HtmlFormatter(nowrap=True))
+        _write_cache(key, html)
+        with _lock:
+            stats["misses"] += 1
+    else:
+        with _lock:
+            stats["hits"] += 1
+
+    with _lock:
+        _memory[key] = html or None
+        if len(_memory) > MAX_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+    return html or None
+
+
+def stylesheet():
+    """Return the CSS rules for highlighted blocks.
+
+    Without Pygments the stylesheet only holds a comment, so templates can
+    always link it.
+    """
+    if pygments is None:
+        return "/* Pygments is not installed, code blocks are not highlighted */\n"
+    return HtmlFormatter().get_style_defs(f".{CSS_CLASS}")
+
+
+def _cache_path(key):
+    """Return the on-disk path of a cache entry."""
+    return os.path.join(_cache_dir, key[-2:], f"{key}.html")
+
+
+def _read_cache(key):
+    """Return a cached entry, or None on a miss."""
+    if _cache_dir is None:
+        return None
+    try:
+        with open(_cache_path(key), "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_cache(key, html):
+    """Atomically store a cache entry."""
+    if _cache_dir is None:
+        return
+    path = _cache_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(html)
+    os.replace(tmp_path, path)
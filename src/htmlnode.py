@@ -2,6 +2,44 @@
 
 from textnode import TextNode, TextType
 
+# The tags of the text types rendered as one element around their text
+TEXT_TAGS = {
+    TextType.BOLD: "b",
+    TextType.ITALIC: "i",
+    TextType.CODE: "code",
+    TextType.LINK: "a",
+}
+
+# Attributes whose root-relative URLs are prefixed with the base URL
+URL_ATTRIBUTES = ("href", "src")
+
+
+def escape_text(value):
+    """Escape a string for use as HTML text content.
+
+    Most strings contain no special characters, so they are returned
+    unchanged without building a new string.
+    """
+    if "&" not in value and "<" not in value and ">" not in value:
+        return value
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def prefix_url(url, base_url):
+    """Return a URL with a leading "/" replaced by the base URL."""
+    if base_url != "/" and url.startswith("/"):
+        return base_url + url[1:]
+    return url
+
+
+def escape_attribute(value):
+    """Escape a string for use as a double-quoted HTML attribute value."""
+    if "&" not in value and "<" not in value and ">" not in value and '"' not in value:
+        return value
+    return (
+        value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+    )
+
 
 class HTMLNode:
     """A node in the HTML tree."""
@@ -12,16 +50,29 @@ class HTMLNode:
         self.children = children or []
         self.props = props or {}
 
-    def to_html(self):
-        """Return the HTML representation of the node."""
+    def to_html(self, base_url="/"):
+        """Return the HTML representation of the node.
+
+        Root-relative href and src URLs are prefixed with base_url.
+        """
         raise NotImplementedError("Subclasses must implement this method")
 
-    def props_to_html(self):
+    def to_html_chunks(self, base_url="/"):
+        """Yield the HTML representation of the node in pieces."""
+        yield self.to_html(base_url)
+
+    def props_to_html(self, base_url="/"):
         """Return the HTML representation of the node's properties."""
         if self.props is None:
             return ""
 
-        return " ".join([f'{key}="{value}"' for key, value in self.props.items()])
+        props = self.props
+        if base_url != "/":
+            props = {
+                key: prefix_url(str(value), base_url) if key in URL_ATTRIBUTES else value
+                for key, value in props.items()
+            }
+        return " ".join([f'{key}="{escape_attribute(str(value))}"' for key, value in props.items()])
 
     def __repr__(self):
         """Return a string representation of the node."""
@@ -39,22 +90,28 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
-    """A leaf node in the HTML tree."""
+    """A leaf node in the HTML tree.
 
-    def __init__(self, tag=None, value=None, props=None):
+    The value is escaped when rendered, unless escaped is True because it
+    already is HTML (e.g. highlighted code).
+    """
+
+    def __init__(self, tag=None, value=None, props=None, escaped=False):
         super().__init__(tag, value, [], props)
+        self.escaped = escaped
 
-    def to_html(self):
+    def to_html(self, base_url="/"):
         """Return the HTML representation of the node."""
         if self.value is None:
             raise ValueError("All leaf nodes must have a value")
-        elif self.tag is None:
-            return self.value
+        value = self.value if self.escaped else escape_text(self.value)
+        if self.tag is None:
+            return value
         else:
-            props_html = self.props_to_html()
+            props_html = self.props_to_html(base_url)
             if props_html:
-                return f"<{self.tag} {props_html}>{self.value}</{self.tag}>"
-            return f"<{self.tag}>{self.value}</{self.tag}>"
+                return f"<{self.tag} {props_html}>{value}</{self.tag}>"
+            return f"<{self.tag}>{value}</{self.tag}>"
 
     def __repr__(self):
         """Return a string representation of the node."""
@@ -70,24 +127,27 @@ class LeafNode(HTMLNode):
         )
 
     @staticmethod
-    def text_node_to_html_node(text_node: TextNode) -> "LeafNode":
+    def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
         """Convert a text node to an HTML node."""
-        if text_node.text_type is None or text_node.text_type == TextType.TEXT:
+        text_type = text_node.text_type
+        if text_type is None or text_type == TextType.TEXT:
             return LeafNode(None, text_node.text)
-
-        type_mapping = {
-            TextType.BOLD: ("b", text_node.text, None),
-            TextType.ITALIC: ("i", text_node.text, None),
-            TextType.CODE: ("code", text_node.text, None),
-            TextType.LINK: ("a", text_node.text, {"href": text_node.url}),
-            TextType.IMAGE: ("img", "", {"src": text_node.url, "alt": text_node.text}),
-        }
-
-        if text_node.text_type not in type_mapping:
-            raise ValueError(f"Unsupported text type: {text_node.text_type}")
-
-        tag, value, props = type_mapping[text_node.text_type]
-        return LeafNode(tag, value, props)
+        if text_type == TextType.IMAGE:
+            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        if text_type == TextType.HTML:
+            return LeafNode(None, text_node.text, escaped=True)
+        if text_type == TextType.FOOTNOTE:
+            # The text is the footnote number, the url the id of the reference
+            link = LeafNode("a", text_node.text, {"href": f"#fn-{text_node.text}"})
+            return ParentNode("sup", [link], {"id": text_node.url, "class": "footnote-ref"})
+
+        if text_type not in TEXT_TAGS:
+            raise ValueError(f"Unsupported text type: {text_type}")
+        tag = TEXT_TAGS[text_type]
+        props = {"href": text_node.url} if text_type == TextType.LINK else None
+        if text_node.children is not None:
+            return ParentNode(tag, [LeafNode.text_node_to_html_node(child) for child in text_node.children], props)
+        return LeafNode(tag, text_node.text, props)
 
 
 class ParentNode(HTMLNode):
@@ -96,18 +156,34 @@ class ParentNode(HTMLNode):
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def to_html(self, base_url="/"):
         """Return the HTML representation of the node."""
         if self.tag is None:
             raise ValueError("All parent nodes must have a tag")
         if self.children is None:
             raise ValueError("All parent nodes must have children")
-        props_html = self.props_to_html()
-        children_html = self.children_to_html()
+        props_html = self.props_to_html(base_url)
+        children_html = self.children_to_html(base_url)
         if props_html:
             return f"<{self.tag} {props_html}>{children_html}</{self.tag}>"
         return f"<{self.tag}>{children_html}</{self.tag}>"
 
-    def children_to_html(self):
+    def to_html_chunks(self, base_url="/"):
+        """Yield the HTML representation of the node in pieces.
+
+        Unlike to_html, the HTML of the whole subtree is never held in
+        memory at once.
+        """
+        if self.tag is None:
+            raise ValueError("All parent nodes must have a tag")
+        if self.children is None:
+            raise ValueError("All parent nodes must have children")
+        props_html = self.props_to_html(base_url)
+        yield f"<{self.tag} {props_html}>" if props_html else f"<{self.tag}>"
+        for child in self.children:
+            yield from child.to_html_chunks(base_url)
+        yield f"</{self.tag}>"
+
+    def children_to_html(self, base_url="/"):
         """Return the HTML representation of the node's children."""
-        return "".join([child.to_html() for child in self.children])
+        return "".join([child.to_html(base_url) for child in self.children])
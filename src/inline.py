@@ -0,0 +1,553 @@
+"""A module for parsing inline markdown into a tree of TextNodes.
+
+The text is scanned once from left to right. Code spans and autolinks are
+resolved as soon as they are seen. Brackets and runs of `*` and `_` are
+kept on stacks: a closing bracket turns its opener into a link if a
+destination or reference follows, and emphasis is resolved with the
+delimiter-run rules of CommonMark, so `snake_case_name` and `2 * 3` stay
+text while `***bold italic***` nests. Every step is linear in the length of
+the text.
+"""
+import re
+import unicodedata
+
+from extensions import INLINE_EXTENSIONS, match_inline
+from textnode import TextNode, TextType
+
+AUTOLINK_RE = re.compile(r"<([A-Za-z][A-Za-z0-9+.-]{1,31}:[^\s<>]*)>")
+EMAIL_AUTOLINK_RE = re.compile(r"<([\w.+-]+@[\w-]+(?:\.[\w-]+)+)>")
+# Characters the link scanner stops at
+LINK_SPECIAL_RE = re.compile(r"[\[\]<]")
+# Characters the inline parser stops at
+INLINE_SPECIAL_RE = re.compile(r"!\[|[`*_\[\]<]")
+BACKTICKS_RE = re.compile(r"`+")
+PAREN_RE = re.compile(r"[()]")
+# Longer labels aren't looked up as references or footnotes, as in CommonMark
+MAX_LABEL_LENGTH = 999
+DELIMITER_RUN_RE = {"*": re.compile(r"\*+"), "_": re.compile(r"_+")}
+# INLINE_SPECIAL_RE extended with the trigger characters of inline
+# extensions, by the string of those characters
+_SPECIAL_RES = {}
+
+
+class References:
+    """The link reference definitions and footnotes of one document.
+
+    Definitions are collected by parse_blocks. Footnotes are numbered in
+    the order they are first referenced while the document is rendered.
+    """
+
+    def __init__(self):
+        self.links = {}
+        self.footnotes = {}
+        self.footnote_order = []
+        self._footnote_numbers = {}
+        self._footnote_refs = {}
+
+    @staticmethod
+    def normalize(label: str) -> str:
+        """Return the key of a label: case-folded with collapsed whitespace."""
+        return " ".join(label.split()).casefold()
+
+    def define_link(self, label: str, url: str):
+        """Record a `[label]: url` definition; the first one of a label wins."""
+        self.links.setdefault(self.normalize(label), url)
+
+    def define_footnote(self, label: str, block):
+        """Record the paragraph Block of a `[^label]: text` definition."""
+        self.footnotes.setdefault(self.normalize(label), block)
+
+    def link(self, label: str) -> str | None:
+        """Return the URL defined for a label, or None."""
+        return self.links.get(self.normalize(label))
+
+    def footnote_ref(self, label: str) -> TextNode | None:
+        """Return the node of a reference to a defined footnote, or None."""
+        key = self.normalize(label)
+        if key not in self.footnotes:
+            return None
+        number = self._footnote_numbers.get(key)
+        if number is None:
+            self.footnote_order.append(key)
+            number = self._footnote_numbers[key] = len(self.footnote_order)
+        count = self._footnote_refs[key] = self._footnote_refs.get(key, 0) + 1
+        ref_id = f"fnref-{number}" if count == 1 else f"fnref-{number}-{count}"
+        return TextNode(str(number), TextType.FOOTNOTE, ref_id)
+
+
+class _Parens:
+    """The balanced parentheses of a text, matched on first use."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._matches = None
+
+    def closing(self, index: int) -> int | None:
+        """Return the index of the ")" matching the "(" at index, or None."""
+        if self._matches is None:
+            self._matches = {}
+            stack = []
+            for match in PAREN_RE.finditer(self.text):
+                if match.group() == "(":
+                    stack.append(match.start())
+                elif stack:
+                    self._matches[stack.pop()] = match.start()
+        return self._matches.get(index)
+
+
+def _link_destination(content: str) -> str:
+    """Return the URL of an inline link's (destination "title") content."""
+    parts = content.strip().split(None, 1)
+    if not parts:
+        return ""
+    if len(parts) == 2 and parts[1][:1] in "\"'(":
+        return parts[0].strip("<>")
+    return content.strip()
+
+
+def _match_link(text, i, start, is_image, references, parens):
+    """Match what follows the "]" at text[i] closing the label starting at text[start].
+
+    The label is only sliced and normalized for a reference lookup if it
+    is at most MAX_LABEL_LENGTH long, so closing nested brackets stays
+    linear in the length of the text.
+
+    Returns:
+        A (node, end) pair, where node is a FOOTNOTE node, or an IMAGE or
+        LINK node holding the raw label, and end is the index after the
+        link; node is None if the brackets aren't a link.
+    """
+    short = i - start <= MAX_LABEL_LENGTH
+    if references is not None and short and not is_image and text.startswith("^", start):
+        node = references.footnote_ref(text[start + 1:i])
+        if node is not None:
+            return node, i + 1
+    text_type = TextType.IMAGE if is_image else TextType.LINK
+    if text.startswith("(", i + 1):
+        close = parens.closing(i + 1)
+        if close is not None:
+            return TextNode(text[start:i], text_type, _link_destination(text[i + 2:close])), close + 1
+    if references is None:
+        return None, i + 1
+    if text.startswith("[", i + 1):
+        close = text.find("]", i + 2, i + 3 + MAX_LABEL_LENGTH)
+        if close != -1 and "[" not in text[i + 2:close] and (close > i + 2 or short):
+            url = references.link(text[i + 2:close] or text[start:i])
+            if url is not None:
+                return TextNode(text[start:i], text_type, url), close + 1
+    if short:
+        label = text[start:i]
+        url = references.link(label)
+        if url is not None:
+            return TextNode(label, text_type, url), i + 1
+    return None, i + 1
+
+
+def _match_autolink(text, i):
+    """Return the (node, end) of an autolink at text[i], or (None, i + 1)."""
+    match = AUTOLINK_RE.match(text, i)
+    if match is not None:
+        return TextNode(match.group(1), TextType.LINK, match.group(1)), match.end()
+    match = EMAIL_AUTOLINK_RE.match(text, i)
+    if match is not None:
+        return TextNode(match.group(1), TextType.LINK, f"mailto:{match.group(1)}"), match.end()
+    return None, i + 1
+
+
+def find_link_spans(text: str, references: References | None = None) -> list[tuple[int, int, TextNode]]:
+    """Find the links, images, autolinks and footnote references in text.
+
+    Brackets are matched with a stack in a single left-to-right scan, so
+    the time taken is linear in the length of the text however the
+    brackets are nested or unbalanced. A link may not contain another link;
+    an outer image or link swallows anything found inside it.
+
+    Args:
+        text: The text to scan
+        references: The document's definitions, for `[text][id]`, `[text]`
+            and `[^note]`
+
+    Returns:
+        A list of non-overlapping (start, end, TextNode) spans, in order.
+    """
+    spans = []
+    # Open brackets as (index of "[", is image) pairs
+    openers = []
+    # Openers below this depth are inside a link and can't start one
+    inactive_depth = 0
+    parens = _Parens(text)
+    position = 0
+    while True:
+        match = LINK_SPECIAL_RE.search(text, position)
+        if match is None:
+            break
+        i = match.start()
+        position = i + 1
+        char = text[i]
+
+        if char == "[":
+            openers.append((i, i > 0 and text[i - 1] == "!"))
+            continue
+
+        if char == "<":
+            node, end = _match_autolink(text, i)
+            if node is not None:
+                spans.append((i, end, node))
+                position = end
+            continue
+
+        # A closing bracket
+        if not openers:
+            continue
+        start, is_image = openers.pop()
+        inactive = not is_image and len(openers) < inactive_depth
+        inactive_depth = min(inactive_depth, len(openers))
+        if inactive:
+            continue
+        node, end = _match_link(text, i, start + 1, is_image, references, parens)
+        if node is None:
+            continue
+
+        if is_image:
+            start -= 1
+        else:
+            # Links may not contain links
+            inactive_depth = len(openers)
+        while spans and spans[-1][0] >= start:
+            spans.pop()
+        spans.append((start, end, node))
+        position = end
+
+    return spans
+
+
+class _Item:
+    """An entry of the doubly linked list of parsed inline nodes."""
+
+    __slots__ = ("node", "prev", "next")
+
+    def __init__(self, node):
+        self.node = node
+        self.prev = None
+        self.next = None
+
+
+class _Delimiter:
+    """A run of `*` or `_` that may open or close emphasis."""
+
+    __slots__ = ("item", "char", "count", "length", "can_open", "can_close", "prev", "next")
+
+    def __init__(self, item, char, length, can_open, can_close):
+        self.item = item
+        self.char = char
+        self.count = length
+        self.length = length
+        self.can_open = can_open
+        self.can_close = can_close
+        self.prev = None
+        self.next = None
+
+
+def _is_punctuation(char: str) -> bool:
+    """Return True for Unicode punctuation and symbols."""
+    return unicodedata.category(char)[0] in "PS"
+
+
+def _flanking(text, start, end):
+    """Return whether the run text[start:end] is (left, right) flanking."""
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    left = not after.isspace() and (
+            not _is_punctuation(after) or before.isspace() or _is_punctuation(before)
+    )
+    right = not before.isspace() and (
+            not _is_punctuation(before) or after.isspace() or _is_punctuation(after)
+    )
+    return left, right, before, after
+
+
+class _InlineParser:
+    """Parses one text into a list of possibly nested TextNodes."""
+
+    def __init__(self, text, references):
+        self.text = text
+        self.references = references
+        self.parens = _Parens(text)
+        self.head = _Item(None)
+        self.tail = self.head
+        # The top of the delimiter stack
+        self.last_delimiter = None
+        # Open brackets as (item, is image, delimiter below, label start)
+        self.brackets = []
+        # Brackets below this depth are inside a link and can't start one
+        self.inactive_depth = 0
+        self._backticks = None
+
+    def parse(self) -> list[TextNode]:
+        """Parse the text and return its nodes."""
+        text = self.text
+        position = 0
+        special_re = _special_re() if INLINE_EXTENSIONS else INLINE_SPECIAL_RE
+        while True:
+            match = special_re.search(text, position)
+            if match is None:
+                break
+            i = match.start()
+            if i > position:
+                self.append(TextNode(text[position:i], TextType.TEXT))
+            special = match.group()
+            if INLINE_EXTENSIONS and text[i] in INLINE_EXTENSIONS:
+                found = match_inline(text, i, self.references)
+                if found is not None:
+                    self.append(found[0])
+                    position = found[1]
+                    continue
+            if special == "`":
+                position = self.code_span(i)
+            elif special in DELIMITER_RUN_RE:
+                position = self.delimiter_run(i, special)
+            elif special in ("[", "!["):
+                item = self.append(TextNode(special, TextType.TEXT))
+                self.brackets.append((item, special == "![", self.last_delimiter, match.end()))
+                position = match.end()
+            elif special == "]":
+                position = self.close_bracket(i)
+            elif special == "<":
+                node, position = _match_autolink(text, i)
+                self.append(node or TextNode("<", TextType.TEXT))
+            else:
+                # A trigger character of an inline extension that didn't match
+                self.append(TextNode(special, TextType.TEXT))
+                position = match.end()
+        if position < len(text):
+            self.append(TextNode(text[position:], TextType.TEXT))
+        self.process_emphasis(None)
+        return _collect(self.head.next, self.tail)
+
+    def append(self, node):
+        """Append a node to the list and return its item."""
+        item = _Item(node)
+        item.prev = self.tail
+        self.tail.next = item
+        self.tail = item
+        return item
+
+    def code_span(self, i):
+        """Parse a run of backticks at text[i] and return where to continue."""
+        if self._backticks is None:
+            # The start of every run, by length, and the next one to try
+            self._backticks = {}
+            for run in BACKTICKS_RE.finditer(self.text):
+                self._backticks.setdefault(len(run.group()), [[], 0])[0].append(run.start())
+        end = BACKTICKS_RE.match(self.text, i).end()
+        length = end - i
+        runs = self._backticks[length]
+        starts, index = runs
+        while index < len(starts) and starts[index] <= i:
+            index += 1
+        runs[1] = index + 1
+        if index == len(starts):
+            self.append(TextNode(self.text[i:end], TextType.TEXT))
+            return end
+        close = starts[index]
+        code = self.text[end:close]
+        if code[:1] == " " and code[-1:] == " " and code.strip():
+            code = code[1:-1]
+        self.append(TextNode(code, TextType.CODE))
+        return close + length
+
+    def delimiter_run(self, i, char):
+        """Parse a run of `*` or `_` at text[i] and return where to continue."""
+        end = DELIMITER_RUN_RE[char].match(self.text, i).end()
+        left, right, before, after = _flanking(self.text, i, end)
+        if char == "*":
+            can_open, can_close = left, right
+        else:
+            # Underscores inside words are not emphasis
+            can_open = left and (not right or _is_punctuation(before))
+            can_close = right and (not left or _is_punctuation(after))
+        item = self.append(TextNode(self.text[i:end], TextType.TEXT))
+        if can_open or can_close:
+            delimiter = _Delimiter(item, char, end - i, can_open, can_close)
+            delimiter.prev = self.last_delimiter
+            if self.last_delimiter is not None:
+                self.last_delimiter.next = delimiter
+            self.last_delimiter = delimiter
+        return end
+
+    def close_bracket(self, i):
+        """Parse the "]" at text[i] and return where to continue."""
+        if not self.brackets:
+            self.append(TextNode("]", TextType.TEXT))
+            return i + 1
+        item, is_image, bottom, label_start = self.brackets.pop()
+        inactive = not is_image and len(self.brackets) < self.inactive_depth
+        self.inactive_depth = min(self.inactive_depth, len(self.brackets))
+        node = None
+        if not inactive:
+            node, end = _match_link(self.text, i, label_start, is_image, self.references, self.parens)
+        if node is None:
+            self.append(TextNode("]", TextType.TEXT))
+            return i + 1
+
+        if node.text_type != TextType.FOOTNOTE:
+            self.process_emphasis(bottom)
+            children = _collect(item.next, self.tail) if item is not self.tail else []
+            if is_image:
+                node.text = _plain_text(children)
+            else:
+                node.text, node.children = "", children
+                # Links may not contain links
+                self.inactive_depth = len(self.brackets)
+        self._remove_delimiters(bottom)
+        self.tail = item.prev
+        self.tail.next = None
+        self.append(node)
+        return end
+
+    def process_emphasis(self, bottom):
+        """Resolve the emphasis among the delimiters above bottom."""
+        closer = bottom.next if bottom is not None else self._first_delimiter()
+        # The lowest opener worth trying, per kind of closer
+        openers_bottom = {}
+        while closer is not None:
+            if not closer.can_close:
+                closer = closer.next
+                continue
+            key = (closer.char, closer.can_open, closer.length % 3)
+            floor = openers_bottom.get(key, bottom)
+            opener = closer.prev
+            while opener is not None and opener is not floor:
+                if opener.char == closer.char and opener.can_open and not (
+                        (opener.can_close or closer.can_open)
+                        and (opener.length + closer.length) % 3 == 0
+                        and not (opener.length % 3 == 0 and closer.length % 3 == 0)
+                ):
+                    break
+                opener = opener.prev
+            else:
+                openers_bottom[key] = closer.prev
+                following = closer.next
+                if not closer.can_open:
+                    self._unlink_delimiter(closer)
+                closer = following
+                continue
+
+            use = 2 if closer.count >= 2 and opener.count >= 2 else 1
+            opener.count -= use
+            closer.count -= use
+            opener.item.node.text = opener.item.node.text[:-use]
+            closer.item.node.text = closer.item.node.text[use:]
+
+            # Wrap the items between the runs in one emphasis node
+            first, last = opener.item.next, closer.item.prev
+            text_type = TextType.BOLD if use == 2 else TextType.ITALIC
+            emphasis = _Item(TextNode("", text_type))
+            emphasis.node.children = _collect(first, last) if first is not closer.item else []
+            emphasis.prev, emphasis.next = opener.item, closer.item
+            opener.item.next = closer.item.prev = emphasis
+
+            # Delimiters between the runs can no longer match
+            opener.next, closer.prev = closer, opener
+            if opener.count == 0:
+                self._remove_item(opener.item)
+                self._unlink_delimiter(opener)
+            if closer.count == 0:
+                following = closer.next
+                self._remove_item(closer.item)
+                self._unlink_delimiter(closer)
+                closer = following
+        self._remove_delimiters(bottom)
+
+    def _first_delimiter(self):
+        """Return the bottom of the delimiter stack."""
+        delimiter = self.last_delimiter
+        while delimiter is not None and delimiter.prev is not None:
+            delimiter = delimiter.prev
+        return delimiter
+
+    def _remove_delimiters(self, bottom):
+        """Drop the delimiters above bottom; their runs stay text."""
+        self.last_delimiter = bottom
+        if bottom is not None:
+            bottom.next = None
+
+    def _unlink_delimiter(self, delimiter):
+        """Remove a delimiter from the stack."""
+        if delimiter.prev is not None:
+            delimiter.prev.next = delimiter.next
+        if delimiter.next is not None:
+            delimiter.next.prev = delimiter.prev
+        if delimiter is self.last_delimiter:
+            self.last_delimiter = delimiter.prev
+
+    def _remove_item(self, item):
+        """Remove an item from the list of nodes."""
+        item.prev.next = item.next
+        if item.next is not None:
+            item.next.prev = item.prev
+        if item is self.tail:
+            self.tail = item.prev
+
+
+def _special_re():
+    """Return the pattern the inline parser stops at, with the extensions' trigger characters."""
+    triggers = "".join(sorted(INLINE_EXTENSIONS))
+    pattern = _SPECIAL_RES.get(triggers)
+    if pattern is None:
+        pattern = _SPECIAL_RES[triggers] = re.compile(f"{INLINE_SPECIAL_RE.pattern}|[{re.escape(triggers)}]")
+    return pattern
+
+
+def _collect(first, last) -> list[TextNode]:
+    """Return the nodes of the items first to last, merging adjacent text.
+
+    An emphasis or link holding only plain text is flattened into a leaf.
+    """
+    nodes = []
+    text = []
+    item = first
+    while item is not None:
+        node = item.node
+        if node.text_type == TextType.TEXT:
+            text.append(node.text)
+        else:
+            if text and "".join(text):
+                nodes.append(TextNode("".join(text), TextType.TEXT))
+            text = []
+            if node.children is not None and len(node.children) <= 1:
+                if not node.children:
+                    node.text, node.children = "", None
+                elif node.children[0].text_type == TextType.TEXT:
+                    node.text, node.children = node.children[0].text, None
+            nodes.append(node)
+        if item is last:
+            break
+        item = item.next
+    if text and "".join(text):
+        nodes.append(TextNode("".join(text), TextType.TEXT))
+    return nodes
+
+
+def _plain_text(nodes) -> str:
+    """Return the text of nodes without their markup, e.g. for alt text."""
+    parts = []
+    for node in nodes:
+        if node.children:
+            parts.append(_plain_text(node.children))
+        elif node.text_type != TextType.IMAGE or node.text:
+            parts.append(node.text)
+    return "".join(parts)
+
+
+def parse_inline(text: str, references: References | None = None) -> list[TextNode]:
+    """Parse inline markdown into TextNodes.
+
+    Bold, italic and link nodes hold their content in `children` when it
+    is more than plain text, e.g. bold text inside italics.
+
+    Args:
+        text: The inline markdown, e.g. the lines of a paragraph
+        references: The document's link and footnote definitions, if any
+    """
+    return _InlineParser(text, references).parse()
@@ -0,0 +1,105 @@
+"""A module for containing pages that fail to generate.
+
+A page that raises, runs past its time limit or, in a worker process, past
+the worker's memory limit is recorded as a page_failed problem in the
+build log instead of aborting the build; the problems are reported
+together at the end. The block a page fails in is found afterwards by
+rendering its blocks one by one, so successful pages pay nothing for the
+line context of failures.
+"""
+import resource
+import signal
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import buildlog
+from helpers import block_to_html_node, extract_front_matter, parse_blocks
+
+
+class PageTimeout(Exception):
+    """Raised in a page that runs past its time limit."""
+
+
+@contextmanager
+def time_limit(seconds):
+    """Raise PageTimeout if the block runs longer than seconds.
+
+    The limit needs SIGALRM, so it only applies in the main thread of a
+    process, e.g. a worker; None or 0 means no limit.
+    """
+    if not seconds or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise PageTimeout(f"took longer than {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def limit_memory(max_bytes):
+    """Limit the address space of the current process, e.g. a worker.
+
+    Allocations beyond the limit raise MemoryError.
+    """
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        max_bytes = min(max_bytes, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (max_bytes, hard))
+
+
+def error_line(source_path):
+    """Return the 1-based line of the innermost block a page fails to render, or None.
+
+    None is also returned if every block renders, e.g. if the page failed
+    for lack of a title or while being written.
+    """
+    with open(source_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    _, markdown = extract_front_matter(text)
+    offset = text.count("\n", 0, len(text) - len(markdown))
+    document = parse_blocks(markdown)
+    references = document.references
+    for block in [*document.children, *references.footnotes.values()]:
+        line = _failing_line(block, references)
+        if line is not None:
+            return line + offset
+    return None
+
+
+def _failing_line(block, references):
+    """Return the line of the innermost failing block in a block, or None if it renders."""
+    try:
+        block_to_html_node(block, references)
+    except Exception:
+        for child in block.children:
+            line = _failing_line(child, references)
+            if line is not None:
+                return line
+        return block.line or None
+    return None
+
+
+def record_failure(source_path, error):
+    """Record a page_failed problem for an exception raised by a page.
+
+    The failing line is looked for unless rendering the page again could
+    take as long, or go as wrong, as it did the first time.
+    """
+    line = None
+    if not isinstance(error, (PageTimeout, MemoryError, OSError, BrokenProcessPool)):
+        try:
+            with time_limit(1):
+                line = error_line(source_path)
+        except Exception:
+            pass
+    location = source_path if line is None else f"{source_path}:{line}"
+    message = f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+    buildlog.record("page_failed", source=source_path, line=line, location=location, error=message)
@@ -0,0 +1,141 @@
+"""A module for generated list, tag and archive pages.
+
+Listings are built from PageSummary objects only, never from the rendered
+trees of the listed pages, and each listing page is rendered and written
+before the next one is built.
+"""
+import os
+import re
+
+from htmlnode import LeafNode, ParentNode
+from pages import write_page
+
+DEFAULT_PER_PAGE = 10
+
+
+def slugify(text):
+    """Return a URL-safe slug for a tag name."""
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "tag"
+
+
+def sort_pages(pages):
+    """Sort summaries newest first, undated pages last, then by title."""
+    pages = sorted(pages, key=lambda page: page.title)
+    dated = sorted((page for page in pages if page.date), key=lambda page: page.date, reverse=True)
+    return dated + [page for page in pages if not page.date]
+
+
+def paginate(items, per_page):
+    """Yield consecutive slices of at most per_page items."""
+    for start in range(0, len(items), per_page):
+        yield items[start:start + per_page]
+
+
+def listing_page_url(base_path, page_number):
+    """Return the URL of the n-th (1-based) page of a listing."""
+    if page_number == 1:
+        return base_path
+    return f"{base_path}page/{page_number}/"
+
+
+def summary_to_html_node(page):
+    """Convert a page summary into a listing item."""
+    children = [LeafNode("a", page.title, {"href": page.url})]
+    if page.date:
+        children.append(LeafNode(None, " "))
+        children.append(LeafNode("time", page.date, {"datetime": page.date}))
+    if page.excerpt:
+        children.append(LeafNode("p", page.excerpt))
+    return ParentNode("li", children)
+
+
+def listing_to_html_node(title, pages, base_path, page_number, page_count):
+    """Build the content of one listing page."""
+    children = [
+        LeafNode("h1", title),
+        ParentNode("ul", [summary_to_html_node(page) for page in pages]),
+    ]
+    nav = []
+    if page_number > 1:
+        nav.append(LeafNode("a", "Newer", {"href": listing_page_url(base_path, page_number - 1), "rel": "prev"}))
+    if page_number < page_count:
+        nav.append(LeafNode("a", "Older", {"href": listing_page_url(base_path, page_number + 1), "rel": "next"}))
+    if nav:
+        children.append(ParentNode("nav", nav))
+    return ParentNode("div", children)
+
+
+def write_listing(title, pages, base_path, template, dest_dir_path, per_page=DEFAULT_PER_PAGE, base_url="/"):
+    """Write a paginated listing of pages under base_path.
+
+    Args:
+        title: Heading and title of the listing
+        pages: Sorted page summaries to list
+        base_path: Site URL of the first listing page, ending in "/"
+        template: The compiled Template
+        dest_dir_path: Root of the generated site
+        per_page: Number of items per listing page
+        base_url: The base URL for the site
+
+    Returns:
+        The site URLs of the written listing pages.
+    """
+    page_count = max(1, -(-len(pages) // per_page))
+    urls = []
+    for page_number, chunk in enumerate(paginate(pages, per_page), start=1):
+        url = listing_page_url(base_path, page_number)
+        content_html = listing_to_html_node(title, chunk, base_path, page_number, page_count).to_html(base_url)
+        page_title = title if page_number == 1 else f"{title} (page {page_number})"
+        dest_path = os.path.join(dest_dir_path, url.strip("/"), "index.html")
+        write_page(dest_path, template.render(page_title, content_html, base_url))
+        urls.append(url)
+    return urls
+
+
+def generate_listings(
+        pages, templates, dest_dir_path, section="/blog/", per_page=DEFAULT_PER_PAGE, base_url="/"
+):
+    """Generate the section index, tag pages and yearly archive pages.
+
+    Args:
+        pages: Page summaries collected by generate_pages_recursive
+        templates: TemplateResolver picking the layout of each listing
+        dest_dir_path: Root of the generated site
+        section: Site URL of the section whose pages are listed
+        per_page: Number of items per listing page
+        base_url: The base URL for the site
+
+    Returns:
+        The site URLs of all written listing pages.
+    """
+    existing = {page.url for page in pages}
+    posts = sort_pages(page for page in pages if page.url.startswith(section) and page.url != section)
+    urls = []
+
+    # A hand-written index page for the section takes precedence
+    if section not in existing:
+        title = section.strip("/").replace("/", " ").title() or "Posts"
+        template = templates.resolve(section)
+        urls += write_listing(title, posts, section, template, dest_dir_path, per_page, base_url)
+
+    by_tag = {}
+    by_year = {}
+    for page in posts:
+        for tag in page.tags:
+            by_tag.setdefault(tag, []).append(page)
+        if page.date:
+            by_year.setdefault(page.date[:4], []).append(page)
+
+    for tag in sorted(by_tag):
+        base_path = f"/tags/{slugify(tag)}/"
+        urls += write_listing(
+            f"Tagged “{tag}”", by_tag[tag], base_path, templates.resolve(base_path), dest_dir_path, per_page,
+            base_url
+        )
+    for year in sorted(by_year, reverse=True):
+        base_path = f"/archive/{year}/"
+        urls += write_listing(
+            f"Archive {year}", by_year[year], base_path, templates.resolve(base_path), dest_dir_path, per_page,
+            base_url
+        )
+    return urls
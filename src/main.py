@@ -1,58 +1,154 @@
 """The main module.
 """
+import argparse
 import os
 import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import archive
+import buildlog
+import extensions
+import highlight
+from archive import SiteArchive
+from buildcache import DEFAULT_MAX_BYTES, DiskPageCache
+from buildlog import logger
+from memory import MemoryBudget, parse_size, peak_rss, reset_peak_rss
 from textnode import TextNode, TextType
-from helpers import markdown_to_html_node, extract_title
-
-
-def copy_directory_contents(source_dir, dest_dir):
+from feeds import generate_feeds, is_absolute
+from listing import DEFAULT_PER_PAGE, generate_listings
+from pages import PageSummary, open_page, write_page
+from publish import Generations, is_unchanged
+from helpers import extract_front_matter
+from isolate import limit_memory, record_failure, time_limit
+from render import page_cache_key, render_markdown, render_markdown_variants
+from search import SearchIndex, source_digest
+from shards import in_shard, load_manifests, parse_shard, write_manifest
+from splitrender import DEFAULT_SPLIT_SIZE, render_markdown_split
+from templates import TemplateResolver
+from wikilinks import TitleIndex, resolving
+
+STATIC_DIR = "./static"
+DOCS_DIR = "./docs"
+CONTENT_DIR = "./content"
+TEMPLATE_PATH = "./template.html"
+LAYOUTS_DIR = "./layouts"
+CACHE_DIR = "./.cache"
+
+
+def copy_directory_contents(source_dir, dest_dir, previous_dir=None):
     """Recursively copy all contents from source_dir to dest_dir.
 
     First, deletes all contents of dest_dir to ensure a clean copy.
-    Copies all files and subdirectories recursively.
+    Copies all files and subdirectories recursively. The files are added to
+    the deploy archive if one is configured, and only there if it doesn't
+    keep files.
 
     Args:
         source_dir: Path to the source directory
         dest_dir: Path to the destination directory
+        previous_dir: Optional earlier copy of source_dir; its unchanged
+            files are hard-linked instead of copied
     """
-    # Delete destination directory if it exists
-    if os.path.exists(dest_dir):
-        print(f"Deleting existing directory: {dest_dir}")
-        shutil.rmtree(dest_dir)
-
-    # Create fresh destination directory
-    print(f"Creating directory: {dest_dir}")
-    os.makedirs(dest_dir)
+    if archive.writes_files():
+        # Delete destination directory if it exists; a symlink to a build
+        # generation is replaced, leaving the generation alone
+        if os.path.islink(dest_dir):
+            os.remove(dest_dir)
+        elif os.path.exists(dest_dir):
+            buildlog.record("delete_dir", path=dest_dir)
+            shutil.rmtree(dest_dir)
+
+        # Create fresh destination directory
+        buildlog.record("create_dir", path=dest_dir)
+        os.makedirs(dest_dir)
 
     # Recursively copy contents
-    _copy_contents_recursive(source_dir, dest_dir)
+    _copy_contents_recursive(source_dir, dest_dir, previous_dir)
 
 
-def _copy_contents_recursive(source_dir, dest_dir):
+def _copy_contents_recursive(source_dir, dest_dir, previous_dir=None):
     """Helper function to recursively copy directory contents.
 
     Args:
         source_dir: Path to the source directory
         dest_dir: Path to the destination directory
+        previous_dir: Optional earlier copy of source_dir
     """
-    for item in os.listdir(source_dir):
+    # Sorted, so archive entries are in a reproducible order
+    for item in sorted(os.listdir(source_dir)):
         source_path = os.path.join(source_dir, item)
         dest_path = os.path.join(dest_dir, item)
+        previous_path = os.path.join(previous_dir, item) if previous_dir is not None else None
 
         if os.path.isfile(source_path):
+            archive.add_copy(dest_path, source_path)
+            if not archive.writes_files():
+                continue
+            if previous_path is not None and is_unchanged(source_path, previous_path):
+                try:
+                    os.link(previous_path, dest_path)
+                    buildlog.record("link_file", source=previous_path, dest=dest_path)
+                    continue
+                except OSError:
+                    # E.g. another file system, fall back to copying
+                    pass
             # Copy file
-            print(f"Copying file: {source_path} -> {dest_path}")
+            buildlog.record("copy_file", source=source_path, dest=dest_path)
             shutil.copy2(source_path, dest_path)
         elif os.path.isdir(source_path):
             # Create subdirectory and recursively copy its contents
-            print(f"Creating directory: {dest_path}")
-            os.makedirs(dest_path)
-            _copy_contents_recursive(source_path, dest_path)
+            if archive.writes_files():
+                buildlog.record("create_dir", path=dest_path)
+                os.makedirs(dest_path)
+            _copy_contents_recursive(source_path, dest_path, previous_path)
+
+
+def update_directory_contents(source_dir, dest_dir):
+    """Recursively copy the new and changed files of source_dir into dest_dir.
+
+    Unlike copy_directory_contents, dest_dir is kept; files that are no
+    longer in source_dir are left to remove_stale_outputs.
+
+    Args:
+        source_dir: Path to the source directory
+        dest_dir: Path to the destination directory
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    for item in sorted(os.listdir(source_dir)):
+        source_path = os.path.join(source_dir, item)
+        dest_path = os.path.join(dest_dir, item)
+
+        if os.path.isfile(source_path):
+            archive.add_copy(dest_path, source_path)
+            if not is_unchanged(source_path, dest_path):
+                buildlog.record("copy_file", source=source_path, dest=dest_path)
+                shutil.copy2(source_path, dest_path)
+        elif os.path.isdir(source_path):
+            update_directory_contents(source_path, dest_path)
+
 
+def remove_stale_outputs(dest_dir, outputs):
+    """Delete the files below dest_dir that aren't outputs of the build, and directories left empty.
 
-def generate_page(from_path, template_path, dest_path, base_url="/"):
+    Args:
+        dest_dir: Path to the output directory
+        outputs: The normalized paths of the build's output files
+    """
+    for dir_path, dir_names, file_names in os.walk(dest_dir, topdown=False):
+        for name in file_names:
+            path = os.path.join(dir_path, name)
+            if os.path.normpath(path) not in outputs:
+                buildlog.record("delete_file", path=path)
+                os.remove(path)
+        if dir_path != dest_dir and not os.listdir(dir_path):
+            os.rmdir(dir_path)
+
+
+def generate_page(
+        from_path, template_path, dest_path, base_url="/", search_index=None, url=None, templates=None,
+        page_cache=None, stream=False, direct=False, variants=(), split_jobs=1, title_index=None, written=None
+):
     """Generate an HTML page from a markdown file and a template.
 
     Args:
@@ -60,82 +156,740 @@ def generate_page(from_path, template_path, dest_path, base_url="/"):
         template_path: Path to the HTML template file
         dest_path: Path to the destination HTML file
         base_url: The base URL for the site
+        search_index: Optional SearchIndex the page's terms are added to
+        url: The site URL of the page, used in its summary and to pick its layout
+        templates: Optional TemplateResolver shared between pages
+        page_cache: Optional cache of rendered pages with get(key) and put(key, value)
+        stream: Write the HTML to the file piece by piece instead of building
+            it in memory, emitted directly unless the search index needs the
+            tree; streamed pages are not put into page_cache
+        direct: Emit the HTML without building an HTMLNode tree, unless the
+            search index needs the tree to tokenize the page
+        variants: (base URL, destination path) pairs of further copies of the
+            page, rendered from the same parse; pages with variants aren't
+            streamed
+        split_jobs: Render the page in parts in this many worker processes,
+            unless it is streamed or has variants
+        title_index: The TitleIndex the page's wiki links are resolved with,
+            if one is registered; their URLs are part of the cache key
+        written: Optional dict of the cache key of the page last written to
+            each destination path, kept between builds that don't delete the
+            output directory; cached pages whose file still holds the same
+            key's page aren't written again
+
+    Returns:
+        The PageSummary of the generated page.
     """
-    print(f"Generating page from {from_path} to {dest_path} using {template_path} (base_url: {base_url})")
+    if templates is None:
+        templates = TemplateResolver(template_path)
 
-    # Read markdown and template files
+    # Read markdown file and resolve its layout
     with open(from_path, "r", encoding="utf-8") as f:
         markdown = f.read()
-    with open(template_path, "r", encoding="utf-8") as f:
-        template = f.read()
-
-    # Convert markdown to HTML
-    html_node = markdown_to_html_node(markdown)
-    content_html = html_node.to_html()
-
-    # Extract title
-    title = extract_title(markdown)
+    metadata, _ = extract_front_matter(markdown)
+    template = templates.resolve(url or "/", metadata)
+    digest = source_digest(markdown)
+
+    targets = [(base_url, dest_path), *variants]
+    if page_cache is not None:
+        links = title_index.resolutions(markdown) if title_index is not None else ""
+        keys = [page_cache_key(markdown, template, target_base_url, url, links) for target_base_url, _ in targets]
+        cached = [page_cache.get(key) for key in keys]
+        # A cached page has no content tree, so it can't be retokenized; its
+        # terms are used if they were cached with it
+        if None not in cached and (
+                search_index is None or search_index.is_current(url, digest) or "terms" in cached[0]
+        ):
+            for (target_base_url, target_path), key, entry in zip(targets, keys, cached):
+                if written is not None and written.get(target_path) == key and os.path.exists(target_path):
+                    archive.keep_output(target_path)
+                else:
+                    write_page(target_path, entry["html"])
+                    if written is not None:
+                        written[target_path] = key
+                buildlog.record(
+                    "page", source=from_path, dest=target_path, template=template.path, base_url=target_base_url,
+                    cached=True
+                )
+            for kind, fields in cached[0].get("reports", []):
+                buildlog.record(kind, source=from_path, **fields)
+            summary = PageSummary.from_dict(cached[0]["summary"])
+            if search_index is not None:
+                search_index.add_page(url, summary.title, digest, None, cached[0].get("terms"))
+            return summary
+
+    tokenize = search_index is not None and not search_index.is_current(url, digest)
+    if direct and tokenize:
+        direct = False
+    if variants:
+        rendered = render_markdown_variants(markdown, template, [target_base_url for target_base_url, _ in targets],
+                                            direct)
+    elif stream:
+        # Only the emitter writes each block as it goes; the tree would be
+        # built whole first
+        with open_page(dest_path) as f:
+            rendered = [render_markdown(markdown, template, base_url, f, not tokenize)]
+    elif split_jobs > 1:
+        rendered = [render_markdown_split(markdown, template, base_url, split_jobs, tokenize)]
+    else:
+        rendered = [render_markdown(markdown, template, base_url, direct=direct)]
+    del markdown
+    reports = _unique_reports(rendered[0].reports)
+    for kind, fields in reports:
+        buildlog.record(kind, source=from_path, **fields)
+    page = rendered[0]
+    summary = PageSummary.from_page(page.title, url, page.metadata, page.content_node, from_path, page.lead_text)
+
+    if search_index is not None:
+        search_index.add_page(url, summary.title, digest, page.content_node, page.terms)
+    # Pages are only counted once they are written; a streamed page already is
+    for i, ((target_base_url, target_path), page) in enumerate(zip(targets, rendered)):
+        if page.html is not None:
+            if page_cache is not None:
+                value = {"html": page.html, "summary": summary.to_dict()}
+                if search_index is not None:
+                    value["terms"] = search_index.pages[url]["terms"]
+                if reports:
+                    value["reports"] = reports
+                page_cache.put(keys[i], value)
+            write_page(target_path, page.html)
+        if written is not None:
+            if page.html is not None and page_cache is not None:
+                written[target_path] = keys[i]
+            else:
+                written.pop(target_path, None)
+        buildlog.record("page", source=from_path, dest=target_path, template=template.path, base_url=target_base_url)
+    return summary
+
+
+def _unique_reports(page_reports):
+    """Return the problems extensions reported while rendering a page, without repeats."""
+    reports = {}
+    for kind, fields in page_reports:
+        reports.setdefault((kind, tuple(sorted(fields.items()))), (kind, fields))
+    return list(reports.values())
+
+
+def _generate_page_contained(fail_fast, page_timeout, from_path, *args, **kwargs):
+    """Generate a page with generate_page under a time limit.
 
-    # Replace placeholders in template
-    # Using .replace() for simplicity, assuming placeholders are exactly as below
-    final_html = template.replace("{{ Title }}", title)
-    final_html = final_html.replace("{{ Content }}", content_html)
-
-    # Handle base_url for absolute links and images
-    if base_url != "/":
-        final_html = final_html.replace('href="/', f'href="{base_url}')
-        final_html = final_html.replace('src="/', f'src="{base_url}')
-
-    # Ensure destination directory exists
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    Args:
+        fail_fast: Raise the page's exception instead of recording a
+            page_failed problem
+        page_timeout: Seconds the page may take, or None
 
-    # Write final HTML to destination
-    with open(dest_path, "w", encoding="utf-8") as f:
-        f.write(final_html)
+    Returns:
+        The PageSummary of the page, or None if it failed.
+    """
+    try:
+        with time_limit(page_timeout):
+            return generate_page(from_path, *args, **kwargs)
+    except Exception as e:
+        if fail_fast:
+            raise
+        record_failure(from_path, e)
+        return None
 
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, base_url="/"):
-    """Recursively generate HTML pages from all markdown files in a directory.
+def discover_pages(dir_path_content, dest_dir_path, url_path="/"):
+    """Recursively find the markdown files in a directory, in a stable order.
 
     Args:
         dir_path_content: Path to the content directory
-        template_path: Path to the HTML template file
         dest_dir_path: Path to the destination directory
-        base_url: The base URL for the site
+        url_path: The site URL corresponding to dest_dir_path
+
+    Returns:
+        A list of (source path, destination path, site URL) tuples.
     """
-    for item in os.listdir(dir_path_content):
+    found = []
+    for item in sorted(os.listdir(dir_path_content)):
         source_path = os.path.join(dir_path_content, item)
 
         if os.path.isfile(source_path):
             if item.endswith(".md"):
                 # Determine destination HTML path
-                dest_path = os.path.join(dest_dir_path, item.replace(".md", ".html"))
-                generate_page(source_path, template_path, dest_path, base_url)
+                html_name = item.replace(".md", ".html")
+                dest_path = os.path.join(dest_dir_path, html_name)
+                url = url_path if html_name == "index.html" else url_path + html_name
+                found.append((source_path, dest_path, url))
         elif os.path.isdir(source_path):
             # Recursively handle subdirectory
             new_dest_dir = os.path.join(dest_dir_path, item)
-            generate_pages_recursive(source_path, template_path, new_dest_dir, base_url)
+            found += discover_pages(source_path, new_dest_dir, f"{url_path}{item}/")
+    return found
 
 
-def main():
-    """The main function."""
-    base_url = "/"
-    if len(sys.argv) > 1:
-        base_url = sys.argv[1]
+def generate_pages_recursive(
+        dir_path_content, template_path, dest_dir_path, base_url="/", search_index=None, url_path="/",
+        templates=None, shard=None, page_cache=None, jobs=1, memory=None, direct=False, variants=(),
+        split_size=DEFAULT_SPLIT_SIZE, fail_fast=True, page_timeout=None, page_memory=None, site=None,
+        written=None
+):
+    """Recursively generate HTML pages from all markdown files in a directory.
 
-    static_dir = "./static"
-    docs_dir = "./docs"
-    content_dir = "./content"
-    template_path = "./template.html"
+    `[[Page Title]]` links in the pages are resolved against the titles of
+    all pages found.
 
-    print(f"Base URL: {base_url}")
+    Args:
+        dir_path_content: Path to the content directory
+        template_path: Path to the HTML template file
+        dest_dir_path: Path to the destination directory
+        base_url: The base URL for the site
+        search_index: Optional SearchIndex collecting the pages' terms
+        url_path: The site URL corresponding to dest_dir_path
+        templates: Optional TemplateResolver, by default only template_path is used
+        shard: Optional (index, count) pair; only pages in that shard are generated
+        page_cache: Optional cache of rendered pages shared between pages, only
+            used by worker processes if it is shared between processes
+        jobs: Number of worker processes generating pages
+        memory: Optional MemoryBudget; pages are then streamed, their peak RSS
+            is recorded and pages too big to share the budget with jobs - 1
+            others are generated one at a time after the others
+        direct: Emit pages without building their HTMLNode trees
+        variants: (base URL, destination directory) pairs the pages are also
+            generated for, from the same parse
+        split_size: Without a memory budget, markdown files of at least this
+            many bytes are generated after the others, each one rendered in
+            parts by jobs worker processes
+        fail_fast: Stop at the first page that fails; otherwise failed pages
+            are recorded as page_failed problems and left out
+        page_timeout: Seconds each page may take before it fails, or None
+        page_memory: Optional address space limit in bytes of the worker
+            processes; pages are generated in workers even with one job, except
+            those generated after the others
+        site: Optional SiteIndex kept between builds, e.g. by the build
+            server; the pages found and their titles are taken from it
+        written: Optional dict of the cache keys of the pages last written,
+            see generate_page; worker processes don't update it, so their
+            pages' entries are dropped
+
+    Returns:
+        The PageSummary of every generated page.
+    """
+    if templates is None:
+        templates = TemplateResolver(template_path)
+    if site is None:
+        found = discover_pages(dir_path_content, dest_dir_path, url_path)
+        # Wiki links resolve against every page, including other shards' pages
+        title_index = TitleIndex.from_pages(found)
+    else:
+        found = site.pages(dir_path_content, dest_dir_path, url_path)
+        title_index = TitleIndex.from_pages(found, site.title)
+    entries = [
+        (source_path, dest_path, url)
+        for source_path, dest_path, url in found
+        if shard is None or in_shard(os.path.relpath(source_path, dir_path_content), shard)
+    ]
+    # The (base URL, destination path) pairs of each page's variants
+    page_variants = [
+        [
+            (variant_base_url, os.path.join(variant_dir, os.path.relpath(dest_path, dest_dir_path)))
+            for variant_base_url, variant_dir in variants
+        ]
+        for _, dest_path, _ in entries
+    ]
+
+    with resolving(title_index):
+        pages = [None] * len(entries)
+        sequential = range(len(entries))
+        split = set()
+        if jobs > 1 or page_memory is not None:
+            oversized = [
+                memory is not None and memory.is_oversized(source_path, jobs) for source_path, _, _ in entries
+            ]
+            if memory is None and jobs > 1:
+                split = {
+                    i for i, (source_path, _, _) in enumerate(entries) if os.path.getsize(source_path) >= split_size
+                }
+                oversized = [i in split for i in range(len(entries))]
+            sequential = [i for i in sequential if oversized[i]]
+            parallel = [i for i in range(len(entries)) if not oversized[i]]
+            _generate_pages_parallel(entries, parallel, pages, template_path, base_url, search_index, templates,
+                                     max(jobs, 1), memory, direct, page_cache, page_variants, title_index,
+                                     fail_fast, page_timeout, page_memory)
+            if written is not None:
+                for i in parallel:
+                    for _, dest_path in [(base_url, entries[i][1]), *page_variants[i]]:
+                        written.pop(dest_path, None)
+
+        for i in sequential:
+            source_path, dest_path, url = entries[i]
+            args = (
+                fail_fast, page_timeout, source_path, template_path, dest_path, base_url, search_index, url,
+                templates, page_cache
+            )
+            if memory is None:
+                pages[i] = _generate_page_contained(
+                    *args, direct=direct, variants=page_variants[i], split_jobs=jobs if i in split else 1,
+                    title_index=title_index, written=written
+                )
+            else:
+                reset_peak_rss()
+                pages[i] = _generate_page_contained(
+                    *args, stream=True, direct=direct, variants=page_variants[i], title_index=title_index,
+                    written=written
+                )
+                if pages[i] is not None:
+                    _record_peak(memory, source_path, peak_rss())
+        return [page for page in pages if page is not None]
+
+
+def _generate_pages_parallel(entries, indexes, pages, template_path, base_url, search_index, templates, jobs,
+                             memory, direct=False, page_cache=None, page_variants=None, title_index=None,
+                             fail_fast=True, page_timeout=None, page_memory=None):
+    """Generate some of the pages in worker processes.
+
+    A worker that dies, e.g. in a C extension at its memory limit, breaks
+    the pool; unless fail_fast, the pages not collected yet are generated
+    again one at a time, and the one a single worker dies on is recorded as
+    failed.
 
-    print("Copying static assets to docs directory...")
-    copy_directory_contents(static_dir, docs_dir)
+    Args:
+        entries: The (source path, destination path, URL) tuples of all pages
+        indexes: The indexes into entries of the pages to generate
+        pages: The list the PageSummary of each page is stored into, None
+            for a failed page
+        template_path: Path to the HTML template file
+        base_url: The base URL for the site
+        search_index: Optional SearchIndex collecting the pages' terms
+        templates: The TemplateResolver whose layouts the workers use
+        jobs: Number of worker processes
+        memory: Optional MemoryBudget the pages' peak RSS is recorded in
+        direct: Emit pages without building their HTMLNode trees
+        page_cache: Optional page cache, passed on to the workers if it is
+            shared between processes
+        page_variants: Optional list of the (base URL, destination path)
+            variants of each page
+        title_index: Optional TitleIndex the workers resolve wiki links with
+        fail_fast: Raise the first page's exception instead of recording it
+        page_timeout: Seconds each page may take, or None
+        page_memory: Optional address space limit in bytes of each worker
+    """
+    site_archive = archive.current()
+    archive_settings = (site_archive.root, site_archive.keep_files) if site_archive is not None else None
+    if not getattr(page_cache, "shared", False):
+        page_cache = None
+    remaining = list(indexes)
+    while remaining:
+        collected = 0
+        broken = None
+        with ProcessPoolExecutor(
+                jobs, initializer=_init_worker,
+                initargs=(
+                    templates.default_path, templates.layouts_dir, archive_settings, page_cache, title_index,
+                    page_memory
+                )
+        ) as pool:
+            futures = []
+            for i in remaining:
+                source_path, dest_path, url = entries[i]
+                page_index = search_index.page_index(url) if search_index is not None else None
+                futures.append(pool.submit(
+                    _generate_page_job, source_path, template_path, dest_path, base_url, page_index, url,
+                    memory is not None, direct, page_variants[i] if page_variants else (), fail_fast, page_timeout
+                ))
+            for i, future in zip(remaining, futures):
+                try:
+                    summary, page_index, events, peak, archived, cache_stats = future.result()
+                except BrokenProcessPool as e:
+                    if fail_fast:
+                        raise
+                    broken = e
+                    break
+                collected += 1
+                for kind, fields in events:
+                    buildlog.record(kind, **fields)
+                for name, data in archived:
+                    site_archive.add(name, data)
+                if cache_stats is not None:
+                    page_cache.add_stats(*cache_stats)
+                if page_index is not None:
+                    search_index.merge(page_index)
+                if peak is not None:
+                    _record_peak(memory, entries[i][0], peak)
+                pages[i] = summary
+        remaining = remaining[collected:]
+        if broken is not None:
+            # With one worker, the pages run in order, so the first one left
+            # is the one the worker died on
+            if jobs == 1:
+                record_failure(entries[remaining.pop(0)][0], broken)
+            jobs = 1
+
+
+# The TemplateResolver, page cache and title index of a worker process
+_worker_templates = None
+_worker_page_cache = None
+_worker_title_index = None
+
+
+def _init_worker(default_path, layouts_dir, archive_settings=None, page_cache=None, title_index=None,
+                 memory_limit=None):
+    """Set up a worker process generating pages.
 
-    print("Generating pages...")
-    generate_pages_recursive(content_dir, template_path, docs_dir, base_url)
+    Args:
+        default_path: Path of the default template
+        layouts_dir: Directory of the layout templates
+        archive_settings: The (root, keep_files) pair of the parent's deploy
+            archive, whose entries the worker buffers, or None
+        page_cache: Optional page cache shared between processes
+        title_index: Optional TitleIndex wiki links are resolved with
+        memory_limit: Optional address space limit of the worker in bytes
+    """
+    global _worker_templates, _worker_page_cache, _worker_title_index
+    if memory_limit is not None:
+        limit_memory(memory_limit)
+    _worker_templates = TemplateResolver(default_path, layouts_dir)
+    _worker_page_cache = page_cache
+    _worker_title_index = title_index
+    if title_index is not None:
+        extensions.register(title_index.extension())
+    buildlog.configure_worker()
+    if archive_settings is None:
+        archive.configure(None)
+    else:
+        archive.configure_worker(*archive_settings)
+
+
+def _generate_page_job(source_path, template_path, dest_path, base_url, search_index, url, measure, direct=False,
+                       variants=(), fail_fast=True, page_timeout=None):
+    """Generate one page in a worker process.
+
+    Returns:
+        A (PageSummary, search index, build events, peak RSS, archive entries,
+        page cache stats) tuple, where the PageSummary is None if the page
+        failed, the peak RSS is None unless measure is set and the stats are
+        the (hits, misses, writes) of the page, or None without a page cache.
+    """
+    if measure:
+        reset_peak_rss()
+    cache = _worker_page_cache
+    before = (cache.hits, cache.misses, cache.writes) if cache is not None else None
+    summary = _generate_page_contained(
+        fail_fast, page_timeout, source_path, template_path, dest_path, base_url, search_index, url,
+        _worker_templates, cache, stream=measure, direct=direct, variants=variants, title_index=_worker_title_index
+    )
+    archived = archive.current().drain() if archive.current() is not None else []
+    cache_stats = None
+    if cache is not None:
+        cache_stats = tuple(after - count for after, count in zip((cache.hits, cache.misses, cache.writes), before))
+    peak = peak_rss() if measure and summary is not None else None
+    if summary is None:
+        search_index = None
+    return summary, search_index, buildlog.current().drain(), peak, archived, cache_stats
+
+
+def _record_peak(memory, source_path, peak):
+    """Record the peak RSS of a page in the budget and the build log."""
+    memory.add(source_path, peak)
+    buildlog.record("page_memory", source=source_path, peak_rss=peak)
+
+
+def generate_site_outputs(pages, templates, docs_dir, base_url, args, search_index=None):
+    """Write the outputs built from all pages: listings, feeds and search index."""
+    if args.listings:
+        logger.info("Generating listing pages...")
+        generate_listings(pages, templates, docs_dir, per_page=args.per_page, base_url=base_url)
+
+    if args.feeds:
+        logger.info("Writing sitemap and feed...")
+        generate_feeds(pages, docs_dir, base_url, args.site_url)
+
+    if search_index is not None:
+        logger.info(f"Writing search index ({search_index.tokenized} pages tokenized)...")
+        search_index.write(os.path.join(docs_dir, "search"))
+
+
+def add_output_arguments(parser):
+    """Add the options shared by builds and merges."""
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("-q", "--quiet", action="store_true", help="Only report warnings and errors")
+    verbosity.add_argument("-v", "--verbose", action="store_true", help="Log every copied file and page")
+    parser.add_argument("--event-log", help="Append a JSON-lines log of build events to this file")
+    parser.add_argument(
+        "--search", action="store_true", help="Also write a client-side search index"
+    )
+    parser.add_argument(
+        "--listings", action="store_true", help="Also write blog index, tag and archive pages"
+    )
+    parser.add_argument(
+        "--per-page", type=int, default=DEFAULT_PER_PAGE, help="Number of items per listing page"
+    )
+    parser.add_argument(
+        "--feeds", action="store_true", help="Also write sitemap.xml and an Atom feed"
+    )
+    parser.add_argument(
+        "--site-url", default="", help="Scheme and host for absolute URLs, e.g. https://example.com"
+    )
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description="Build the static site.")
+    parser.add_argument("base_url", nargs="?", default="/", help="The base URL for the site")
+    add_output_arguments(parser)
+    parser.add_argument(
+        "--shard", type=parse_shard, metavar="I/N",
+        help="Only build shard I of N (1-based) and write its manifest for a later merge"
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1, metavar="N", help="Generate pages in N worker processes"
+    )
+    parser.add_argument(
+        "--max-memory", type=parse_size, metavar="SIZE",
+        help="Memory budget, e.g. 512M: stream pages, report their peak RSS and generate pages too big "
+             "for the budget one at a time"
+    )
+    parser.add_argument(
+        "--split-size", type=parse_size, default=DEFAULT_SPLIT_SIZE, metavar="SIZE",
+        help="With --jobs, render each markdown file of at least SIZE in parts in all worker processes "
+             "(default 8M)"
+    )
+    parser.add_argument(
+        "--fail-fast", action="store_true",
+        help="Stop at the first page that fails instead of building the others and reporting the failures "
+             "at the end"
+    )
+    parser.add_argument(
+        "--page-timeout", type=float, metavar="SECONDS", help="Fail pages that take longer than SECONDS"
+    )
+    parser.add_argument(
+        "--page-memory", type=parse_size, metavar="SIZE",
+        help="Generate pages in worker processes limited to SIZE of address space each, e.g. 1G; pages "
+             "beyond it fail"
+    )
+    parser.add_argument(
+        "--renderer", choices=["tree", "direct"], default="tree",
+        help="Render pages through an HTMLNode tree, or emit their HTML directly (same output, faster)"
+    )
+    parser.add_argument(
+        "--generations", type=int, metavar="N",
+        help="Build into a staging directory and publish it by atomically pointing the docs symlink at it, "
+             "keeping N previous builds for rollback"
+    )
+    parser.add_argument(
+        "--archive", metavar="PATH",
+        help="Also write the site into a reproducible .tar.gz, .tgz or .zip archive while building it"
+    )
+    parser.add_argument(
+        "--archive-only", action="store_true", help="Only write the archive, not the docs directory"
+    )
+    parser.add_argument(
+        "--cache-dir", metavar="PATH",
+        help="Restore rendered pages from, and store them in, a build cache directory shared between builds, "
+             "e.g. one kept by CI"
+    )
+    parser.add_argument(
+        "--cache-size", type=parse_size, default=DEFAULT_MAX_BYTES, metavar="SIZE",
+        help="Prune the build cache to this size, least recently used pages first (default 1G)"
+    )
+    parser.add_argument(
+        "--target", nargs=2, action="append", metavar=("BASE_URL", "DIR"),
+        help="Build the site for BASE_URL into DIR instead of docs/; repeat to build several variants from "
+             "one parse of every page"
+    )
+    args = parser.parse_args(argv)
+    if args.target and args.base_url != "/":
+        parser.error("give either a base URL argument or --target")
+    # The (base URL, output directory) pairs to build; the first one is the
+    # main output, the others are variants rendered from the same parse
+    args.targets = [tuple(target) for target in args.target] if args.target else [(args.base_url, DOCS_DIR)]
+    if args.target and args.shard is not None:
+        parser.error("--target can't be combined with --shard")
+    relative = [target_base_url for target_base_url, _ in args.targets if not is_absolute(target_base_url)]
+    if args.feeds and not args.site_url and relative:
+        parser.error("--feeds needs --site-url unless the base URL is absolute")
+    if len(args.targets) > 1 and (args.generations is not None or args.archive is not None):
+        parser.error("several --target variants can't be combined with --generations or --archive")
+    if args.generations is not None and args.shard is not None:
+        parser.error("--generations can't be combined with --shard, shards are published by merge")
+    if args.archive is not None:
+        try:
+            archive.archive_format(args.archive)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.archive_only and (args.archive is None or args.generations is not None):
+        parser.error("--archive-only needs --archive and can't be combined with --generations")
+    return args
+
+
+def parse_merge_args(argv):
+    """Parse the command line arguments of the merge command."""
+    parser = argparse.ArgumentParser(
+        prog="main.py merge", description="Combine shard builds and write the site-wide outputs."
+    )
+    add_output_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def rollback(argv):
+    """Publish the build before the current one again."""
+    parser = argparse.ArgumentParser(
+        prog="main.py rollback", description="Point docs back at the previous build generation."
+    )
+    parser.parse_args(argv)
+    try:
+        path = Generations(DOCS_DIR).rollback()
+    except ValueError as e:
+        raise SystemExit(f"Cannot roll back: {e}")
+    print(f"Published {path}")
+
+
+def verbosity_of(args):
+    """Return the buildlog verbosity selected by -q/-v."""
+    return buildlog.QUIET if args.quiet else buildlog.VERBOSE if args.verbose else buildlog.NORMAL
+
+
+def merge(argv):
+    """Validate the shard manifests in docs/ and write the site-wide outputs."""
+    args = parse_merge_args(argv)
+    log = buildlog.configure(verbosity_of(args), args.event_log)
+    try:
+        base_url, pages, search_pages = load_manifests(DOCS_DIR)
+    except ValueError as e:
+        raise SystemExit(f"Cannot merge shards: {e}")
+    if args.feeds and not args.site_url and not is_absolute(base_url):
+        raise SystemExit("Cannot merge shards: --feeds needs --site-url unless the base URL is absolute")
+    logger.info(f"Merging {len(pages)} pages (base_url: {base_url})...")
+
+    search_index = None
+    if args.search:
+        if search_pages is None:
+            raise SystemExit("Cannot merge shards: they were built without --search")
+        search_index = SearchIndex(DOCS_DIR)
+        search_index.pages = search_pages
+    templates = TemplateResolver(TEMPLATE_PATH, LAYOUTS_DIR)
+    generate_site_outputs(pages, templates, DOCS_DIR, base_url, args, search_index)
+    log.close()
+
+
+def build(args, templates=None, page_cache=None, site=None):
+    """Build the site into docs/.
+
+    Args:
+        args: The parsed command line arguments
+        templates: Optional TemplateResolver kept between builds
+        page_cache: Optional cache of rendered pages kept between builds; a
+            build cache given with --cache-dir is used instead
+        site: Optional SiteIndex kept between builds; with it, a build into
+            docs/ alone by one process updates docs/ in place instead of
+            deleting it, leaving unchanged pages and static files alone
+
+    Returns:
+        The BuildLog of the build.
+    """
+    (base_url, docs_dir), *variants = args.targets
+
+    log = buildlog.configure(verbosity_of(args), args.event_log)
+    for target_base_url, target_dir in args.targets:
+        logger.info(f"Base URL: {target_base_url}" + (f" ({target_dir})" if variants else ""))
+
+    # With generations the site is built into a staging directory, so the
+    # published one stays intact until the build is complete
+    generations = None
+    output_dir = docs_dir
+    if args.generations is not None:
+        generations = Generations(docs_dir, args.generations)
+        previous = generations.current()
+        output_dir = generations.stage()
+    site_archive = archive.configure(
+        SiteArchive(args.archive, output_dir, keep_files=not args.archive_only) if args.archive else None
+    )
+
+    # Updated in place, the files a build doesn't output are deleted at the end
+    in_place = (
+        site is not None and generations is None and not args.archive and not variants and args.shard is None
+        and args.jobs == 1 and args.page_memory is None and not os.path.islink(docs_dir)
+    )
+    outputs = archive.track_outputs(set() if in_place else None)
+    if site is not None and not in_place:
+        # The pages of other builds are deleted, or written somewhere else
+        site.written.clear()
+
+    if generations is not None:
+        logger.info(f"Copying static assets to {output_dir}...")
+        copy_directory_contents(STATIC_DIR, output_dir, previous)
+    elif in_place:
+        logger.info("Updating static assets in docs directory...")
+        update_directory_contents(STATIC_DIR, docs_dir)
+    else:
+        logger.info("Copying static assets to docs directory...")
+        copy_directory_contents(STATIC_DIR, docs_dir)
+    for _, variant_dir in variants:
+        # The variants share the main output's copies of the static files
+        copy_directory_contents(STATIC_DIR, variant_dir, docs_dir)
+
+    highlight.set_cache_dir(os.path.join(CACHE_DIR, "highlight"))
+    # Written even without Pygments, the template links it
+    for target_dir in [output_dir] + [variant_dir for _, variant_dir in variants]:
+        write_page(os.path.join(target_dir, "highlight.css"), highlight.stylesheet())
+
+    logger.info("Generating pages...")
+    search_index = None
+    if args.search:
+        search_index = SearchIndex(output_dir, os.path.join(CACHE_DIR, "search-terms.json"))
+    if templates is None:
+        templates = TemplateResolver(TEMPLATE_PATH, LAYOUTS_DIR)
+    memory = MemoryBudget(args.max_memory) if args.max_memory else None
+    build_cache = None
+    if args.cache_dir:
+        page_cache = build_cache = DiskPageCache(args.cache_dir, args.cache_size)
+    pages = generate_pages_recursive(
+        CONTENT_DIR, TEMPLATE_PATH, output_dir, base_url, search_index, templates=templates, shard=args.shard,
+        page_cache=page_cache, jobs=args.jobs, memory=memory, direct=args.renderer == "direct", variants=variants,
+        split_size=args.split_size, fail_fast=args.fail_fast, page_timeout=args.page_timeout,
+        page_memory=args.page_memory, site=site, written=site.written if in_place else None
+    )
+    if memory is not None:
+        for line in memory.report():
+            logger.info(line)
+    if build_cache is not None:
+        build_cache.prune()
+        logger.info(build_cache.summary())
+
+    if args.shard is not None:
+        # Site-wide outputs are written by the merge command
+        path = write_manifest(docs_dir, args.shard, base_url, pages, search_index)
+        logger.info(f"Wrote shard manifest {path}")
+    else:
+        generate_site_outputs(pages, templates, output_dir, base_url, args, search_index)
+        for variant_base_url, variant_dir in variants:
+            generate_site_outputs(pages, templates, variant_dir, variant_base_url, args, search_index)
+
+    if site_archive is not None:
+        site_archive.close()
+        archive.configure(None)
+        logger.info(f"Wrote {site_archive.count} files to {site_archive.path}")
+    if in_place:
+        archive.track_outputs(None)
+        remove_stale_outputs(docs_dir, outputs)
+    if generations is not None:
+        if log.count("page_failed"):
+            logger.warning(f"Not publishing {output_dir}, {log.count('page_failed')} pages failed")
+        else:
+            logger.info(f"Published {generations.publish(output_dir)}")
+    log.close()
+    return log
+
+
+def main(argv=None):
+    """The main function.
+
+    Returns:
+        The exit status, 1 if pages failed to generate.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "merge":
+        merge(argv[1:])
+        return
+    if argv and argv[0] == "rollback":
+        rollback(argv[1:])
+        return
+    log = build(parse_args(argv))
+    return 1 if log.count("page_failed") else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""A module for keeping a build within a memory budget.
+
+The peak resident set size of each page is measured by resetting the
+kernel's high-water mark before the page and reading it afterwards. This
+needs Linux's /proc; elsewhere the process-wide peak is reported instead.
+"""
+import os
+import re
+import resource
+import sys
+
+CLEAR_REFS_PATH = "/proc/self/clear_refs"
+STATUS_PATH = "/proc/self/status"
+
+# Rough peak bytes held per byte of markdown: the source, its lines, the
+# block and node trees and the serialized chunks
+EXPANSION_FACTOR = 40
+
+# Number of pages listed in the end-of-build report
+REPORT_SIZE = 10
+
+SIZE_RE = re.compile(r"^(\d+)([KMG]?)B?$", re.IGNORECASE)
+UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(text):
+    """Parse a size such as "512M" or "2G" into bytes."""
+    match = SIZE_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"Invalid size {text!r}, expected e.g. 512M or 2G")
+    return int(match.group(1)) * UNITS[match.group(2).upper()]
+
+
+def format_size(size):
+    """Return a size in bytes as a short human-readable string."""
+    for unit in ("B", "K", "M"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}G"
+
+
+def reset_peak_rss():
+    """Reset the process's peak RSS to its current RSS, if the OS supports it."""
+    try:
+        with open(CLEAR_REFS_PATH, "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def peak_rss():
+    """Return the peak RSS of the process in bytes since the last reset."""
+    try:
+        with open(STATUS_PATH, "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryBudget:
+    """A build's memory limit and the peak RSS measured for each page."""
+
+    def __init__(self, limit):
+        """Create a budget.
+
+        Args:
+            limit: The memory budget in bytes
+        """
+        self.limit = limit
+        self.peaks = {}
+
+    def is_oversized(self, source_path, jobs=1):
+        """Return True if a page may not fit the budget alongside jobs - 1 others."""
+        return os.path.getsize(source_path) * EXPANSION_FACTOR * jobs > self.limit
+
+    def add(self, source_path, peak):
+        """Record the peak RSS of a page."""
+        self.peaks[source_path] = peak
+
+    def offenders(self, count=REPORT_SIZE):
+        """Return the (source path, peak RSS) pairs of the hungriest pages."""
+        return sorted(self.peaks.items(), key=lambda item: (-item[1], item[0]))[:count]
+
+    def report(self):
+        """Return the report lines of the hungriest pages."""
+        lines = [f"Peak RSS by page (budget {format_size(self.limit)}):"]
+        for source_path, peak in self.offenders():
+            marker = " over budget" if peak > self.limit else ""
+            lines.append(f"  {format_size(peak):>8}  {source_path}{marker}")
+        return lines
@@ -0,0 +1,127 @@
+"""A module for generated page metadata and output."""
+import os
+
+from archive import open_output
+from htmlnode import LeafNode
+
+EXCERPT_LENGTH = 200
+
+
+class PageSummary:
+    """The metadata of a generated page, kept instead of its HTML tree."""
+
+    def __init__(self, title, url, source_path=None, date=None, excerpt="", tags=None):
+        self.title = title
+        self.url = url
+        self.source_path = source_path
+        self.date = date
+        self.excerpt = excerpt
+        self.tags = tags or []
+
+    @classmethod
+    def from_page(cls, title, url, metadata, html_node, source_path=None, lead_text=None):
+        """Build a summary from a page's front matter and rendered tree.
+
+        Pages rendered without a tree pass html_node=None and the text of
+        their first prose paragraph as lead_text instead.
+        """
+        if metadata.get("excerpt"):
+            excerpt = metadata["excerpt"]
+        elif html_node is None:
+            excerpt = truncate_excerpt((lead_text or "").strip())
+        else:
+            excerpt = extract_excerpt(html_node)
+        tags = [tag.strip() for tag in metadata.get("tags", "").split(",") if tag.strip()]
+        return cls(
+            title=metadata.get("title", title),
+            url=url,
+            source_path=source_path,
+            date=metadata.get("date") or None,
+            excerpt=excerpt,
+            tags=tags,
+        )
+
+    def to_dict(self):
+        """Return the summary as a JSON-serializable dict."""
+        return {
+            "title": self.title,
+            "url": self.url,
+            "source_path": self.source_path,
+            "date": self.date,
+            "excerpt": self.excerpt,
+            "tags": self.tags,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a summary from the output of to_dict."""
+        return cls(**data)
+
+    def __repr__(self):
+        """Return a string representation of the summary."""
+        return f"PageSummary(title={self.title!r}, url={self.url!r}, date={self.date!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, PageSummary):
+            return False
+        return self.to_dict() == other.to_dict()
+
+
+def page_url(dest_path, output_dir):
+    """Return the site-relative URL of a generated HTML file."""
+    rel_path = os.path.relpath(dest_path, output_dir).replace(os.sep, "/")
+    if rel_path == "index.html":
+        return "/"
+    if rel_path.endswith("/index.html"):
+        return "/" + rel_path[: -len("index.html")]
+    return "/" + rel_path
+
+
+def extract_excerpt(html_node, length=EXCERPT_LENGTH):
+    """Return the text of the first paragraph that contains plain prose.
+
+    Paragraphs holding only links or images (such as a "Back Home" link)
+    are skipped.
+    """
+    return truncate_excerpt((lead_text(html_node) or "").strip(), length)
+
+
+def lead_text(html_node):
+    """Return the untruncated text of the first paragraph that contains plain prose, or None."""
+    for node in html_node.children:
+        if node.tag != "p":
+            continue
+        if not any(child.tag is None and child.value.strip() for child in node.children):
+            continue
+        return _text_content(node)
+    return None
+
+
+def truncate_excerpt(text, length=EXCERPT_LENGTH):
+    """Shorten text to at most length characters at a word boundary."""
+    if len(text) > length:
+        text = text[:length].rsplit(" ", 1)[0] + "…"
+    return text
+
+
+def _text_content(node):
+    """Return the text of a node's leaves, without footnote references."""
+    if isinstance(node, LeafNode):
+        return node.value
+    return "".join(_text_content(child) for child in node.children if child.tag != "sup")
+
+
+def write_page(dest_path, html):
+    """Write an HTML page, creating its directory if needed."""
+    # Write final HTML to destination
+    with open_page(dest_path) as f:
+        f.write(html)
+
+
+def open_page(dest_path):
+    """Open an HTML page for writing in a with block, creating its directory if needed.
+
+    The page goes into the deploy archive too, if one is configured; if
+    the block raises, no partial page is kept.
+    """
+    return open_output(dest_path)
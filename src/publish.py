@@ -0,0 +1,126 @@
+"""A module for building the site into a staging directory and publishing it atomically.
+
+The output directory is a symlink to the newest of a few numbered
+generation directories kept beside it, e.g. docs -> .docs-generations/000012.
+A build writes into a staging directory there and is published by
+replacing the symlink with one rename, so the served site is never empty
+or half-written and a failed build leaves it untouched. The previous
+generations are kept for an instant rollback.
+"""
+import os
+import shutil
+
+# Number of generations kept besides the published one
+DEFAULT_KEEP = 3
+
+STAGING_NAME = "staging"
+
+
+class Generations:
+    """The numbered generation directories of an output directory."""
+
+    def __init__(self, output_dir, keep=DEFAULT_KEEP):
+        """Create the generations of an output directory.
+
+        Args:
+            output_dir: The published path, e.g. ./docs
+            keep: Number of previous generations kept for rollback
+        """
+        self.output_dir = output_dir.rstrip("/") or output_dir
+        self.parent = os.path.dirname(self.output_dir) or "."
+        self.root = os.path.join(self.parent, f".{os.path.basename(self.output_dir)}-generations")
+        self.keep = keep
+
+    def numbers(self):
+        """Return the numbers of the complete generations, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(int(name) for name in os.listdir(self.root) if name.isdigit())
+
+    def path(self, number):
+        """Return the directory of a generation."""
+        return os.path.join(self.root, f"{number:06d}")
+
+    def current(self):
+        """Return the directory currently published, or None."""
+        if os.path.islink(self.output_dir):
+            return os.path.realpath(self.output_dir)
+        if os.path.isdir(self.output_dir):
+            return self.output_dir
+        return None
+
+    def stage(self):
+        """Return the path of the staging directory, removing one left by a failed build."""
+        staging = os.path.join(self.root, STAGING_NAME)
+        if os.path.exists(staging):
+            shutil.rmtree(staging)
+        os.makedirs(self.root, exist_ok=True)
+        return staging
+
+    def publish(self, staging):
+        """Turn a staging directory into the published generation.
+
+        An output directory that is still a plain directory, from a build
+        without generations, is moved in as the previous generation first;
+        only that one-time move is not atomic.
+
+        Returns:
+            The directory of the new generation.
+        """
+        if os.path.isdir(self.output_dir) and not os.path.islink(self.output_dir):
+            os.rename(self.output_dir, self.path(self._next_number()))
+        generation = self.path(self._next_number())
+        os.rename(staging, generation)
+        self._point_to(generation)
+        self.prune()
+        return generation
+
+    def rollback(self):
+        """Publish the generation before the current one again.
+
+        Returns:
+            The directory of the published generation.
+
+        Raises:
+            ValueError: If there is no earlier generation
+        """
+        name = os.path.basename(self.current()) if os.path.islink(self.output_dir) else ""
+        earlier = [number for number in self.numbers() if name.isdigit() and number < int(name)]
+        if not earlier:
+            raise ValueError(f"No earlier generation of {self.output_dir} to roll back to")
+        generation = self.path(earlier[-1])
+        self._point_to(generation)
+        return generation
+
+    def prune(self):
+        """Remove all but the published generation and the keep newest others."""
+        current = self.current()
+        others = [number for number in self.numbers() if os.path.realpath(self.path(number)) != current]
+        for number in others[:max(len(others) - self.keep, 0)]:
+            shutil.rmtree(self.path(number))
+
+    def _next_number(self):
+        """Return the number of the next generation."""
+        numbers = self.numbers()
+        return numbers[-1] + 1 if numbers else 1
+
+    def _point_to(self, generation):
+        """Atomically point the output directory's symlink at a generation."""
+        link = os.path.join(self.parent, f".{os.path.basename(self.output_dir)}.link")
+        if os.path.lexists(link):
+            os.remove(link)
+        os.symlink(os.path.relpath(generation, self.parent), link)
+        os.replace(link, self.output_dir)
+
+
+def is_unchanged(source_path, previous_path):
+    """Return True if a previously copied file still matches its source.
+
+    Copies keep the modification time of their source, so a file with the
+    same size and modification time is assumed to be unchanged.
+    """
+    try:
+        source, previous = os.stat(source_path), os.stat(previous_path)
+    except OSError:
+        return False
+    return source.st_size == previous.st_size and source.st_mtime_ns == previous.st_mtime_ns
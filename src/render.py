@@ -0,0 +1,233 @@
+"""A module for rendering markdown to HTML in memory.
+
+Nothing here reads or writes files or logs, and no state is shared between
+calls, so the functions can be used from request handlers and threads.
+"""
+import functools
+import hashlib
+import re
+
+import extensions
+import highlight
+from emit import HTMLEmitter, emit_markdown
+from helpers import extract_front_matter, extract_title, markdown_to_html_node, parse_blocks
+from htmlnode import escape_text
+
+PLACEHOLDER_RE = re.compile(r"\{\{ (Title|Content) \}\}")
+
+# Bump whenever a change to the renderer changes its output
+RENDERER_VERSION = "4"
+
+# Stands for the leading "/" of root-relative URLs in content rendered once
+# for several base URLs; markdown containing it is rendered per base URL
+URL_SLOT = "\0"
+
+
+class Template:
+    """A page template compiled into literal parts and placeholders."""
+
+    def __init__(self, source, path=None):
+        self.source = source
+        self.path = path
+        self.digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        # Odd indexes hold placeholder names, even indexes literal HTML
+        self.parts = PLACEHOLDER_RE.split(source)
+        # The parts with the base URL applied to the literal HTML, by base URL
+        self._prefixed = {"/": self.parts}
+
+    def parts_for(self, base_url):
+        """Return the parts with the base URL applied to the literal HTML."""
+        parts = self._prefixed.get(base_url)
+        if parts is None:
+            parts = [apply_base_url(part, base_url) if i % 2 == 0 else part for i, part in enumerate(self.parts)]
+            self._prefixed[base_url] = parts
+        return parts
+
+    def render(self, title, content_html, base_url="/"):
+        """Substitute a page into the template.
+
+        The base URL is applied to the template's own HTML; the content
+        must have been rendered for the same base URL.
+
+        Args:
+            title: The page title, escaped before substitution
+            content_html: The rendered page content
+            base_url: The base URL for the site
+        """
+        values = {"Title": escape_text(title), "Content": content_html}
+        parts = self.parts_for(base_url)[:]
+        for i in range(1, len(parts), 2):
+            parts[i] = values[parts[i]]
+        return "".join(parts)
+
+    def write(self, stream, title, content_chunks, base_url="/"):
+        """Write a page to a stream without building its HTML string.
+
+        Args:
+            stream: A text stream, e.g. an open file
+            title: The page title, escaped before substitution
+            content_chunks: Iterable of the rendered page content's pieces
+            base_url: The base URL for the site
+        """
+        for i, part in enumerate(self.parts_for(base_url)):
+            if i % 2 == 0:
+                stream.write(part)
+            elif part == "Title":
+                stream.write(escape_text(title))
+            else:
+                for chunk in content_chunks:
+                    stream.write(chunk)
+
+    def __repr__(self):
+        """Return a string representation of the template."""
+        return f"Template(placeholders={self.parts[1::2]})"
+
+
+def apply_base_url(html, base_url):
+    """Prefix root-relative href and src attributes with the base URL.
+
+    Only used for the literal HTML of templates; rendered content has its
+    URLs prefixed while it is serialized.
+    """
+    # Handle base_url for absolute links and images
+    if base_url != "/":
+        html = html.replace('href="/', f'href="{base_url}')
+        html = html.replace('src="/', f'src="{base_url}')
+    return html
+
+
+class RenderedPage:
+    """The result of rendering one markdown document."""
+
+    def __init__(self, html, title, metadata, content_node, lead_text=None, terms=None):
+        self.html = html
+        self.title = title
+        self.metadata = metadata
+        # None if the page was rendered without a tree; lead_text then
+        # holds the text of its first prose paragraph
+        self.content_node = content_node
+        self.lead_text = lead_text
+        # The search terms of a page rendered without a tree, if collected
+        self.terms = terms
+        # The (kind, fields) problems extensions reported while rendering it
+        self.reports = []
+
+    def to_bytes(self):
+        """Return the page HTML encoded as UTF-8, unless it was streamed."""
+        return self.html.encode("utf-8")
+
+    def __repr__(self):
+        """Return a string representation of the page."""
+        size = "streamed" if self.html is None else len(self.html)
+        return f"RenderedPage(title={self.title!r}, size={size})"
+
+
+def collects_reports(render):
+    """Decorate a render function to set the reports of the RenderedPage, or list of them, it returns."""
+    @functools.wraps(render)
+    def wrapper(*args, **kwargs):
+        with extensions.collecting() as reports:
+            result = render(*args, **kwargs)
+        for page in result if isinstance(result, list) else [result]:
+            page.reports = reports
+        return result
+    return wrapper
+
+
+@collects_reports
+def render_markdown(markdown, template, base_url="/", stream=None, direct=False):
+    """Render a markdown document into a full HTML page.
+
+    Args:
+        markdown: The markdown source, optionally starting with front matter
+        template: A compiled Template
+        base_url: The base URL for the site
+        stream: Optional text stream the HTML is written to piece by piece
+            instead of being returned. With direct, each top-level block is
+            written as soon as it is emitted; otherwise the whole tree is
+            built first and only the HTML string is avoided
+        direct: Emit the HTML straight from the parser instead of building
+            an HTMLNode tree; the page then has no content_node
+
+    Returns:
+        A RenderedPage with the HTML (None if streamed), the title, the
+        front matter and the problems reported by extensions.
+    """
+    metadata, markdown = extract_front_matter(markdown)
+
+    # Extract title
+    title = metadata.get("title") or extract_title(markdown)
+
+    if direct:
+        if stream is not None:
+            emitter = HTMLEmitter(base_url)
+            template.write(stream, title, emitter.stream_document(parse_blocks(markdown)), base_url)
+            return RenderedPage(None, title, metadata, None, emitter.lead_text)
+        emitter = emit_markdown(markdown, base_url)
+        html = template.render(title, emitter.to_html(), base_url)
+        return RenderedPage(html, title, metadata, None, emitter.lead_text)
+
+    # Convert markdown to HTML
+    html_node = markdown_to_html_node(markdown)
+
+    if stream is not None:
+        template.write(stream, title, html_node.to_html_chunks(base_url), base_url)
+        return RenderedPage(None, title, metadata, html_node)
+    return RenderedPage(template.render(title, html_node.to_html(base_url), base_url), title, metadata, html_node)
+
+
+@collects_reports
+def render_markdown_variants(markdown, template, base_urls, direct=False):
+    """Render a markdown document into one full HTML page per base URL.
+
+    The document is parsed and rendered once, with URL_SLOT in place of
+    the leading "/" of root-relative URLs; each variant fills in its base
+    URL there.
+
+    Args:
+        markdown: The markdown source, optionally starting with front matter
+        template: A compiled Template
+        base_urls: The base URLs to render the page for
+        direct: Emit the HTML without building an HTMLNode tree
+
+    Returns:
+        A RenderedPage per base URL, in order, sharing the content tree.
+    """
+    if len(base_urls) == 1 or URL_SLOT in markdown:
+        return [render_markdown(markdown, template, base_url, direct=direct) for base_url in base_urls]
+    metadata, markdown = extract_front_matter(markdown)
+    title = metadata.get("title") or extract_title(markdown)
+
+    html_node = lead_text = None
+    if direct:
+        emitter = emit_markdown(markdown, URL_SLOT)
+        content_html, lead_text = emitter.to_html(), emitter.lead_text
+    else:
+        html_node = markdown_to_html_node(markdown)
+        content_html = html_node.to_html(URL_SLOT)
+    pieces = content_html.split(URL_SLOT)
+    return [
+        RenderedPage(template.render(title, base_url.join(pieces), base_url), title, metadata, html_node, lead_text)
+        for base_url in base_urls
+    ]
+
+
+def page_cache_key(markdown, template, base_url, url=None, links=""):
+    """Return the key a rendered page is cached under.
+
+    The key covers everything the output depends on: the markdown source,
+    the template, the base URL, the page URL, the renderer version, the
+    Pygments version used for highlighting, if any, the names and versions
+    of the registered extensions and the URLs of the page's wiki links,
+    given by TitleIndex.resolutions.
+    """
+    h = hashlib.sha256()
+    for part in (
+            RENDERER_VERSION, highlight.fingerprint(), extensions.fingerprint(), template.digest, base_url, url or "",
+            markdown
+    ):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    if links:
+        h.update(links.encode("utf-8"))
+    return h.hexdigest()
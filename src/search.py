@@ -0,0 +1,144 @@
+"""A module for building the client-side search index.
+
+The index is built from per-page term lists. Term lists are cached between
+builds keyed by a digest of the page source, so rebuilding one page only
+retokenizes that page.
+"""
+import hashlib
+import json
+import os
+import re
+
+from archive import open_output
+from htmlnode import LeafNode
+
+TOKEN_RE = re.compile(r"\w+")
+MIN_TOKEN_LENGTH = 2
+
+
+def source_digest(markdown: str) -> str:
+    """Return a stable digest of a page's markdown source."""
+    return hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase search terms."""
+    return [
+        token for token in TOKEN_RE.findall(text.lower())
+        if len(token) >= MIN_TOKEN_LENGTH
+    ]
+
+
+def extract_terms(html_node) -> list[str]:
+    """Return the sorted unique terms of a rendered page.
+
+    Every leaf of the tree corresponds to one TextNode of the inline
+    stream, so the terms are collected without re-parsing the markdown.
+    """
+    terms = set()
+    stack = [html_node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, LeafNode):
+            if node.value:
+                terms.update(tokenize(node.value))
+            if node.props and "alt" in node.props:
+                terms.update(tokenize(node.props["alt"]))
+        else:
+            stack.extend(node.children)
+    return sorted(terms)
+
+
+def shard_key(term: str) -> str:
+    """Return the name of the shard a term belongs to."""
+    first = term[0]
+    if "a" <= first <= "z":
+        return first
+    if "0" <= first <= "9":
+        return "0"
+    return "_"
+
+
+class SearchIndex:
+    """Collects per-page term lists and writes a sharded JSON index."""
+
+    def __init__(self, output_dir, cache_path=None):
+        """Create an index for pages generated into output_dir.
+
+        Args:
+            output_dir: Root directory of the generated site
+            cache_path: Path of the JSON file holding cached term lists
+        """
+        self.output_dir = output_dir
+        self.cache_path = cache_path
+        self.pages = {}
+        self.tokenized = 0
+        self._cached = {}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "r", encoding="utf-8") as f:
+                self._cached = json.load(f)
+
+    def add_page(self, url, title, digest, html_node, terms=None):
+        """Record the terms of a generated page.
+
+        The page is only tokenized if its digest differs from the cached one
+        and its terms aren't given, e.g. by the build cache.
+        """
+        if terms is None and self.is_current(url, digest):
+            terms = self._cached[url]["terms"]
+        elif terms is None:
+            terms = extract_terms(html_node)
+            self.tokenized += 1
+        self.pages[url] = {"digest": digest, "title": title, "terms": terms}
+
+    def is_current(self, url, digest):
+        """Return True if the cached terms of a page match its digest."""
+        cached = self._cached.get(url)
+        return cached is not None and cached["digest"] == digest
+
+    def page_index(self, url):
+        """Return an empty index that only knows the cached terms of one page.
+
+        Pages generated in worker processes are added to such an index, which
+        is then merged back with merge().
+        """
+        index = SearchIndex(self.output_dir)
+        if url in self._cached:
+            index._cached[url] = self._cached[url]
+        return index
+
+    def merge(self, other):
+        """Add the pages of another index to this one."""
+        self.pages.update(other.pages)
+        self.tokenized += other.tokenized
+
+    def write(self, index_dir=None):
+        """Write the page table and the term shards to index_dir.
+
+        Args:
+            index_dir: Destination directory, defaults to output_dir/search
+        """
+        if index_dir is None:
+            index_dir = os.path.join(self.output_dir, "search")
+
+        urls = sorted(self.pages)
+        shards = {}
+        for page_id, url in enumerate(urls):
+            for term in self.pages[url]["terms"]:
+                shards.setdefault(shard_key(term), {}).setdefault(term, []).append(page_id)
+
+        pages = [[url, self.pages[url]["title"]] for url in urls]
+        _write_json(os.path.join(index_dir, "pages.json"), pages)
+        for key, terms in shards.items():
+            _write_json(os.path.join(index_dir, f"terms-{key}.json"), terms)
+        _write_json(os.path.join(index_dir, "shards.json"), sorted(shards))
+
+        if self.cache_path:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            _write_json(self.cache_path, self.pages)
+
+
+def _write_json(path, data):
+    """Write data as compact JSON."""
+    with open_output(path) as f:
+        json.dump(data, f, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
@@ -0,0 +1,132 @@
+"""A module for splitting a build across machines.
+
+Pages are assigned to shards by a stable hash of their source path relative
+to the content directory, so every runner computes the same partition.
+Each shard build writes a manifest next to its output; the merge step
+validates the manifests of all shards before the site-wide outputs are
+generated from them.
+"""
+import hashlib
+import json
+import os
+
+from archive import open_output
+from pages import PageSummary
+
+MANIFEST_DIR = ".shards"
+
+
+def parse_shard(text):
+    """Parse a "I/N" shard specification into an (index, count) pair."""
+    index, sep, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard {text!r}, expected I/N") from None
+    if not sep or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {text!r}, expected 1 <= I <= N")
+    return index, count
+
+
+def shard_of(rel_path, count):
+    """Return the 1-based shard a source path belongs to."""
+    key = rel_path.replace(os.sep, "/").encode("utf-8")
+    return int(hashlib.sha1(key).hexdigest(), 16) % count + 1
+
+
+def in_shard(rel_path, shard):
+    """Return True if a source path belongs to the (index, count) shard."""
+    index, count = shard
+    return shard_of(rel_path, count) == index
+
+
+def url_to_path(url):
+    """Return the output path, relative to the site root, of a page URL."""
+    rel_path = url.lstrip("/")
+    if rel_path == "" or rel_path.endswith("/"):
+        rel_path += "index.html"
+    return rel_path
+
+
+def manifest_path(docs_dir, shard):
+    """Return the path of a shard's manifest."""
+    index, count = shard
+    return os.path.join(docs_dir, MANIFEST_DIR, f"shard-{index}-of-{count}.json")
+
+
+def write_manifest(docs_dir, shard, base_url, pages, search_index=None):
+    """Write the manifest of a shard build and return its path.
+
+    Args:
+        docs_dir: Root of the generated site
+        shard: The (index, count) pair of the shard
+        base_url: The base URL the shard was built with
+        pages: The summaries of the pages the shard generated
+        search_index: Optional SearchIndex holding the pages' terms
+    """
+    index, count = shard
+    manifest = {
+        "shard": index,
+        "count": count,
+        "base_url": base_url,
+        "pages": [page.to_dict() for page in pages],
+        "search": search_index.pages if search_index is not None else None,
+    }
+    path = manifest_path(docs_dir, shard)
+    with open_output(path) as f:
+        json.dump(manifest, f, sort_keys=True)
+    return path
+
+
+def load_manifests(docs_dir):
+    """Load and validate the manifests of all shards of a build.
+
+    Returns:
+        A (base_url, pages, search pages) tuple, where search pages is None
+        unless every shard was built with a search index.
+
+    Raises:
+        ValueError: If shards are missing, inconsistent or overlap, or a
+            page listed in a manifest is missing from the output.
+    """
+    directory = os.path.join(docs_dir, MANIFEST_DIR)
+    names = sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+    if not names:
+        raise ValueError(f"No shard manifests found in {directory}")
+
+    manifests = []
+    for name in names:
+        with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+            manifests.append(json.load(f))
+
+    counts = {manifest["count"] for manifest in manifests}
+    if len(counts) != 1:
+        raise ValueError(f"Manifests disagree on the number of shards: {sorted(counts)}")
+    count = counts.pop()
+    base_urls = {manifest["base_url"] for manifest in manifests}
+    if len(base_urls) != 1:
+        raise ValueError(f"Manifests disagree on base_url: {sorted(base_urls)}")
+    shards = sorted(manifest["shard"] for manifest in manifests)
+    if shards != list(range(1, count + 1)):
+        missing = sorted(set(range(1, count + 1)) - set(shards))
+        raise ValueError(f"Expected shards 1..{count}, missing {missing}, found {shards}")
+
+    pages = []
+    seen = {}
+    search_pages = {}
+    for manifest in manifests:
+        for data in manifest["pages"]:
+            page = PageSummary.from_dict(data)
+            if page.url in seen:
+                raise ValueError(f"{page.url} was built by shards {seen[page.url]} and {manifest['shard']}")
+            seen[page.url] = manifest["shard"]
+            if not os.path.isfile(os.path.join(docs_dir, url_to_path(page.url))):
+                raise ValueError(f"{page.url} from shard {manifest['shard']} is missing from {docs_dir}")
+            pages.append(page)
+        if search_pages is not None:
+            if manifest["search"] is None:
+                search_pages = None
+            else:
+                search_pages.update(manifest["search"])
+
+    return base_urls.pop(), pages, search_pages
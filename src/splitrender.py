@@ -0,0 +1,132 @@
+"""A module for rendering one very large markdown document in several processes.
+
+Once the link reference definitions of a document are known, its top-level
+blocks render independently of each other. The document is parsed once to
+collect the definitions and find where its top-level blocks start; it is
+then cut into line ranges of similar size, each range is parsed and
+rendered in a worker process, and the HTML of the ranges is joined in
+order. The output is identical to render_markdown's.
+
+Ranges are only cut before a top-level block that follows a blank line,
+where the parser starts afresh. Footnotes are numbered in the order they
+are referenced across the whole document, so documents with footnotes are
+rendered in one process.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+
+import extensions
+from emit import HTMLEmitter
+from helpers import block_to_html_node, extract_front_matter, extract_title, parse_blocks
+from htmlnode import ParentNode
+from pages import lead_text
+from render import RenderedPage, collects_reports
+from search import extract_terms
+
+# Markdown files at least this many bytes large are rendered in parts
+DEFAULT_SPLIT_SIZE = 8 * 1024 ** 2
+
+# Ranges per worker process, so that a slow range doesn't leave the others idle
+RANGES_PER_JOB = 4
+
+
+def split_ranges(lines, document, count):
+    """Cut a parsed document into at most count line ranges of similar size.
+
+    Args:
+        lines: The lines of the markdown document
+        document: The document Block parsed from the lines
+        count: The number of ranges wanted
+
+    Returns:
+        A list of (start, end) line indexes covering all lines, in order.
+    """
+    # Character offset of the start of each line
+    offsets = [0, *accumulate(len(line) + 1 for line in lines)]
+    target = offsets[-1] / max(count, 1)
+    ranges = []
+    start = 0
+    for child in document.children:
+        cut = child.line - 1
+        if cut <= start or lines[cut - 1].strip():
+            continue
+        if offsets[cut] - offsets[start] >= target:
+            ranges.append((start, cut))
+            start = cut
+    ranges.append((start, len(lines)))
+    return ranges
+
+
+@collects_reports
+def render_markdown_split(markdown, template, base_url="/", jobs=2, terms=False):
+    """Render a markdown document into a full HTML page in several processes.
+
+    Args:
+        markdown: The markdown source, optionally starting with front matter
+        template: A compiled Template
+        base_url: The base URL for the site
+        jobs: Number of worker processes
+        terms: Also collect the page's search terms
+
+    Returns:
+        A RenderedPage. If terms is set, either its terms or, for a page
+        rendered in one process, its content tree are set.
+    """
+    metadata, markdown = extract_front_matter(markdown)
+    title = metadata.get("title") or extract_title(markdown)
+
+    document = parse_blocks(markdown)
+    references = document.references
+    if references.footnotes:
+        # Rendered here, from the parse at hand
+        if terms:
+            content_node = block_to_html_node(document)
+            html = template.render(title, content_node.to_html(base_url), base_url)
+            return RenderedPage(html, title, metadata, content_node)
+        emitter = HTMLEmitter(base_url)
+        emitter.block(document)
+        return RenderedPage(template.render(title, emitter.to_html(), base_url), title, metadata, None,
+                            emitter.lead_text)
+
+    lines = markdown.split("\n")
+    ranges = split_ranges(lines, document, jobs * RANGES_PER_JOB)
+    del document
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = [
+            pool.submit(_render_range, "\n".join(lines[start:end]), references, base_url, terms)
+            for start, end in ranges
+        ]
+        del lines
+        results = [future.result() for future in futures]
+
+    for *_, reports in results:
+        for kind, fields in reports:
+            extensions.report(kind, **fields)
+    page_lead_text = next((text for _, text, _, _ in results if text is not None), None)
+    page_terms = sorted(set().union(*(range_terms for _, _, range_terms, _ in results))) if terms else None
+    content_html = "".join(["<div>", *(html for html, _, _, _ in results), "</div>"])
+    html = template.render(title, content_html, base_url)
+    return RenderedPage(html, title, metadata, None, page_lead_text, page_terms)
+
+
+def _render_range(markdown, references, base_url, terms):
+    """Render the top-level blocks of a range of a document in a worker process.
+
+    Returns:
+        An (HTML, lead text, search terms, extension reports) tuple; the lead
+        text is None if the range has no prose paragraph, the terms are None
+        unless terms is set.
+    """
+    children = parse_blocks(markdown).children
+    if not children:
+        return "", None, [] if terms else None, []
+    with extensions.collecting() as reports:
+        if terms:
+            # The search terms are collected from the tree
+            content_node = ParentNode("div", [block_to_html_node(child, references) for child in children])
+            html = "".join(node.to_html(base_url) for node in content_node.children)
+            return html, lead_text(content_node), extract_terms(content_node), reports
+        emitter = HTMLEmitter(base_url)
+        for child in children:
+            emitter.block(child, references, True)
+        return emitter.to_html(), emitter.lead_text, None, reports
@@ -0,0 +1,123 @@
+"""A module for resolving page layouts.
+
+A page uses the layout named by its `layout` front matter key, or else the
+most specific layout matching its directory: /blog/tom/ tries
+layouts/blog/tom.html, then layouts/blog.html, then the default template.
+Layouts may include partials from layouts/partials with `{{> name }}`.
+Every layout is read and compiled once per resolver.
+"""
+import os
+import re
+
+from render import Template
+
+PARTIAL_RE = re.compile(r"\{\{> *([\w-]+) *\}\}")
+
+
+class TemplateResolver:
+    """Resolves and caches the compiled layout of each page."""
+
+    def __init__(self, default_path, layouts_dir=None):
+        """Create a resolver.
+
+        Args:
+            default_path: Path to the template used when no layout matches
+            layouts_dir: Directory holding layouts and a partials/ subdirectory
+        """
+        self.default_path = default_path
+        self.layouts_dir = layouts_dir
+        self._compiled = {}
+        self._by_directory = {}
+        self._last_fingerprint = None
+
+    def resolve(self, url, metadata=None):
+        """Return the compiled Template for a page.
+
+        Args:
+            url: The site URL of the page
+            metadata: The page's front matter
+        """
+        layout = (metadata or {}).get("layout")
+        if layout:
+            path = self._layout_path(layout)
+            if path is None or not os.path.isfile(path):
+                raise ValueError(f"Unknown layout: {layout}")
+            return self.compile(path)
+
+        directory = url.rsplit("/", 1)[0].strip("/")
+        if directory not in self._by_directory:
+            self._by_directory[directory] = self._find_directory_layout(directory)
+        return self.compile(self._by_directory[directory])
+
+    def compile(self, path):
+        """Return the compiled Template of a layout file, reading it only once."""
+        template = self._compiled.get(path)
+        if template is None:
+            template = Template(self._expand_partials(_read(path), ()), path)
+            self._compiled[path] = template
+        return template
+
+    def refresh(self):
+        """Drop compiled layouts if any template or layout file changed.
+
+        Returns:
+            True if the cache was dropped.
+        """
+        fingerprint = self._fingerprint()
+        if fingerprint == self._last_fingerprint:
+            return False
+        self._last_fingerprint = fingerprint
+        self._compiled.clear()
+        self._by_directory.clear()
+        return True
+
+    def _fingerprint(self):
+        """Return the paths and modification times of all template files."""
+        paths = [self.default_path]
+        if self.layouts_dir is not None and os.path.isdir(self.layouts_dir):
+            for root, _, names in os.walk(self.layouts_dir):
+                paths += [os.path.join(root, name) for name in names]
+        return sorted((path, os.stat(path).st_mtime_ns) for path in paths if os.path.exists(path))
+
+    @property
+    def compiled_count(self):
+        """Return the number of layouts compiled so far."""
+        return len(self._compiled)
+
+    def _layout_path(self, name):
+        """Return the path of a named layout."""
+        if self.layouts_dir is None:
+            return None
+        return os.path.join(self.layouts_dir, f"{name}.html")
+
+    def _find_directory_layout(self, directory):
+        """Return the most specific layout path for a content directory."""
+        parts = directory.split("/") if directory else []
+        while parts:
+            path = self._layout_path("/".join(parts))
+            if path is not None and os.path.isfile(path):
+                return path
+            parts.pop()
+        return self.default_path
+
+    def _expand_partials(self, source, including):
+        """Replace `{{> name }}` references with the partials' contents."""
+
+        def replace(match):
+            name = match.group(1)
+            if name in including:
+                raise ValueError(f"Partial includes itself: {' -> '.join(including + (name,))}")
+            if self.layouts_dir is None:
+                raise ValueError(f"Unknown partial: {name}")
+            path = os.path.join(self.layouts_dir, "partials", f"{name}.html")
+            if not os.path.isfile(path):
+                raise ValueError(f"Unknown partial: {name}")
+            return self._expand_partials(_read(path), including + (name,))
+
+        return PARTIAL_RE.sub(replace, source)
+
+
+def _read(path):
+    """Return the contents of a template file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
@@ -0,0 +1,86 @@
+"""Test writing the site into a deploy archive."""
+
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+import archive
+from archive import SiteArchive, open_output
+from main import copy_directory_contents
+
+
+class TestSiteArchive(unittest.TestCase):
+    """Test archiving output files as they are written."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(archive.configure, None)
+        self.root = os.path.join(self.tmp.name, "docs")
+        self.static = os.path.join(self.tmp.name, "static")
+        os.makedirs(os.path.join(self.static, "images"))
+        with open(os.path.join(self.static, "images", "a.png"), "wb") as f:
+            f.write(b"\x89PNG")
+
+    def build(self, path, keep_files=True):
+        """Write a small site into an archive and return its bytes."""
+        archive.configure(SiteArchive(path, self.root, keep_files))
+        copy_directory_contents(self.static, self.root)
+        with open_output(os.path.join(self.root, "blog", "index.html")) as f:
+            f.write("<p>é</p>")
+        with open_output(os.path.join(self.tmp.name, "cache.json")) as f:
+            f.write("{}")
+        archive.current().close()
+        archive.configure(None)
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_tar_entries(self):
+        """Test that output files become entries with fixed metadata."""
+        data = self.build(os.path.join(self.tmp.name, "site.tar.gz"))
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            self.assertEqual(tar.getnames(), ["images/a.png", "blog/index.html"])
+            self.assertEqual(tar.extractfile("blog/index.html").read(), "<p>é</p>".encode("utf-8"))
+            self.assertEqual({(m.mtime, m.uid, m.mode) for m in tar.getmembers()}, {(archive.DEFAULT_EPOCH, 0, 0o644)})
+        self.assertTrue(os.path.exists(os.path.join(self.root, "blog", "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "cache.json")))
+
+    def test_zip_only(self):
+        """Test that without keep_files only the archive is written."""
+        data = self.build(os.path.join(self.tmp.name, "site.zip"), keep_files=False)
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            self.assertEqual(zf.namelist(), ["images/a.png", "blog/index.html"])
+            self.assertEqual(zf.read("images/a.png"), b"\x89PNG")
+        self.assertFalse(os.path.exists(self.root))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "cache.json")))
+
+    def test_reproducible(self):
+        """Test that the same site gives the same archive bytes."""
+        for name in ("site.tar.gz", "site.zip"):
+            with self.subTest(name=name):
+                path = os.path.join(self.tmp.name, name)
+                self.assertEqual(self.build(path), self.build(path))
+
+    def test_failed_write_is_discarded(self):
+        """Test that a file whose writing raised is neither archived nor written."""
+        site_archive = archive.configure(SiteArchive(os.path.join(self.tmp.name, "site.zip"), self.root))
+        path = os.path.join(self.root, "broken.html")
+        with self.assertRaises(ValueError):
+            with open_output(path) as f:
+                f.write("<p>half")
+                raise ValueError("failed")
+        self.assertEqual(site_archive.count, 0)
+        self.assertFalse(os.path.exists(path))
+        site_archive.close()
+
+    def test_unsupported_format(self):
+        """Test that other extensions are rejected."""
+        with self.assertRaises(ValueError):
+            archive.archive_format("site.rar")
+
+
+if __name__ == "__main__":
+    unittest.main()
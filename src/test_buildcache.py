@@ -0,0 +1,76 @@
+"""Test the shared build cache."""
+
+import os
+import tempfile
+import unittest
+
+from buildcache import DiskPageCache
+from main import generate_page
+from search import SearchIndex
+
+
+class TestDiskPageCache(unittest.TestCase):
+    """Test storing, restoring and evicting pages."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.directory = os.path.join(self.tmp.name, "cache")
+
+    def test_get_put(self):
+        """Test that a stored value is restored by another cache on the directory."""
+        DiskPageCache(self.directory).put("ab12", {"html": "<p>x</p>"})
+        cache = DiskPageCache(self.directory)
+        self.assertEqual(cache.get("ab12"), {"html": "<p>x</p>"})
+        self.assertIsNone(cache.get("cd34"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_corrupt_entry_is_a_miss(self):
+        """Test that an unreadable entry is treated as missing."""
+        cache = DiskPageCache(self.directory)
+        cache.put("ab12", {})
+        with open(cache.path("ab12"), "w", encoding="utf-8") as f:
+            f.write("{")
+        self.assertIsNone(cache.get("ab12"))
+
+    def test_prune_evicts_least_recently_used(self):
+        """Test that the oldest entries are evicted first and reads count as uses."""
+        cache = DiskPageCache(self.directory, max_bytes=250)
+        for age, key in enumerate(["aa", "bb", "cc"]):
+            cache.put(key, {"html": "x" * 90})
+            os.utime(cache.path(key), (1000 + age, 1000 + age))
+        cache.get("aa")
+        self.assertEqual(cache.prune(), 1)
+        self.assertIsNone(cache.get("bb"))
+        self.assertIsNotNone(cache.get("aa"))
+        self.assertIsNotNone(cache.get("cc"))
+        self.assertIn("1 evicted", cache.summary())
+
+
+class TestRestoredPages(unittest.TestCase):
+    """Test generating pages from a build cache."""
+
+    def test_restored_page_keeps_search_terms(self):
+        """Test that a page restored in a fresh build isn't rendered or tokenized."""
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "index.md")
+            template = os.path.join(tmp, "template.html")
+            with open(source, "w", encoding="utf-8") as f:
+                f.write("# Hello\n\nSome words")
+            with open(template, "w", encoding="utf-8") as f:
+                f.write("{{ Title }}{{ Content }}")
+            directory = os.path.join(tmp, "cache")
+
+            for run in ("first", "second"):
+                cache = DiskPageCache(directory)
+                index = SearchIndex(os.path.join(tmp, run))
+                dest = os.path.join(tmp, run, "index.html")
+                generate_page(source, template, dest, search_index=index, url="/", page_cache=cache)
+            self.assertEqual((cache.hits, index.tokenized), (1, 0))
+            self.assertEqual(index.pages["/"]["terms"], ["hello", "some", "words"])
+            with open(dest, "r", encoding="utf-8") as f:
+                self.assertEqual(f.read(), "Hello<div><h1>Hello</h1><p>Some words</p></div>")
+
+
+if __name__ == "__main__":
+    unittest.main()
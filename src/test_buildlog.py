@@ -0,0 +1,63 @@
+"""Test the build log."""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import buildlog
+
+
+class TestBuildLog(unittest.TestCase):
+    """Test the buildlog module."""
+
+    def test_counters(self):
+        """Test that events are counted by kind."""
+        log = buildlog.BuildLog(buildlog.QUIET, stream=io.StringIO())
+        log.record("page", source="a.md", dest="a.html", template="t.html", base_url="/")
+        log.record("copy_file", source="a.png", dest="b.png")
+        log.record("copy_file", source="c.png", dest="d.png")
+        self.assertEqual(log.count("page"), 1)
+        self.assertEqual(log.progress_line(), "1 pages, 2 files copied")
+
+    def test_no_progress_line_without_tty(self):
+        """Test that nothing is drawn when the stream is not a terminal."""
+        stream = io.StringIO()
+        log = buildlog.BuildLog(buildlog.NORMAL, stream=stream)
+        log.record("copy_file", source="a", dest="b")
+        log.close()
+        self.assertEqual(stream.getvalue(), "")
+
+    def test_verbose_messages(self):
+        """Test that verbose mode logs a line per event."""
+        log = buildlog.BuildLog(buildlog.VERBOSE, stream=io.StringIO())
+        with self.assertLogs("ssg", level="DEBUG") as captured:
+            log.record("copy_file", source="a.png", dest="docs/a.png")
+        self.assertEqual(captured.records[0].getMessage(), "Copying file: a.png -> docs/a.png")
+
+    def test_problems_reported_at_close(self):
+        """Test that problems are counted and logged as warnings at the end."""
+        log = buildlog.BuildLog(buildlog.QUIET, stream=io.StringIO())
+        log.record("unresolved_link", source="a.md", target="Tom")
+        self.assertEqual(log.progress_line(), "0 pages, 0 files copied, 1 problems")
+        with self.assertLogs("ssg", level="WARNING") as captured:
+            log.close()
+        self.assertEqual(captured.records[0].getMessage(), "Unresolved link [[Tom]] in a.md")
+
+    def test_event_log(self):
+        """Test that events are written as JSON lines."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "events.jsonl")
+            log = buildlog.BuildLog(buildlog.QUIET, events_path=path, stream=io.StringIO())
+            log.record("create_dir", path="docs")
+            log.close()
+            with open(path, encoding="utf-8") as f:
+                events = [json.loads(line) for line in f]
+        self.assertEqual(events[0]["event"], "create_dir")
+        self.assertEqual(events[0]["path"], "docs")
+        self.assertEqual(events[1], {"event": "summary", "counters": {"create_dir": 1}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Test the build server."""
+
+import os
+import tempfile
+import threading
+import unittest
+
+import daemon
+import highlight
+
+
+class TestMemoryPageCache(unittest.TestCase):
+    """Test the in-memory page cache."""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = daemon.MemoryPageCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+
+class TestBuildServer(unittest.TestCase):
+    """Test builds through the server."""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        os.makedirs("content/blog")
+        os.makedirs("static")
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home\n\nHello")
+        self.write("content/blog/index.md", "# Blog\n\nPosts")
+        self.socket_path = os.path.join(self.tmp.name, "ssg.sock")
+        self.thread = threading.Thread(target=daemon.serve, args=(self.socket_path,))
+        self.thread.start()
+        while not os.path.exists(self.socket_path):
+            self.thread.join(0.01)
+
+    def tearDown(self):
+        daemon.request({"command": "stop"}, self.socket_path)
+        self.thread.join()
+        # Builds point highlighting at ./.cache, which is relative to the cwd
+        highlight.set_cache_dir(None)
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    @staticmethod
+    def write(path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def build(self):
+        return daemon.request({"command": "build", "args": ["-q"]}, self.socket_path)
+
+    def test_socket_is_private(self):
+        """Test that only the owner can connect to the socket."""
+        self.assertEqual(os.stat(self.socket_path).st_mode & 0o777, 0o600)
+
+    def test_rebuild_uses_memory(self):
+        """Test that only changed pages are rendered again."""
+        first = self.build()
+        self.assertTrue(first["ok"], first)
+        self.assertEqual((first["rendered"], first["cached"]), (2, 0))
+
+        self.write("content/index.md", "# Home\n\nChanged")
+        second = self.build()
+        self.assertEqual((second["rendered"], second["cached"]), (1, 1))
+        with open("docs/index.html", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "<title>Home</title><div><h1>Home</h1><p>Changed</p></div>")
+
+        # A template change invalidates every page
+        self.write("template.html", "{{ Content }}")
+        os.utime("template.html", ns=(0, 0))
+        third = self.build()
+        self.assertEqual((third["rendered"], third["cached"]), (2, 0))
+
+    def test_rebuild_in_place(self):
+        """Test that unchanged pages are left alone and stale files deleted."""
+        self.write("static/style.css", "body {}")
+        self.build()
+        os.utime("docs/blog/index.html", ns=(0, 0))
+        os.utime("docs/style.css", ns=(0, 0))
+
+        self.write("content/index.md", "# Home\n\nSee [[Blog]]")
+        response = self.build()
+        self.assertTrue(response["ok"], response)
+        self.assertEqual(os.stat("docs/blog/index.html").st_mtime_ns, 0)
+        with open("docs/index.html", encoding="utf-8") as f:
+            self.assertIn('<a href="/blog/">Blog</a>', f.read())
+        with open("docs/style.css", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "body {}")
+
+        os.remove("content/blog/index.md")
+        os.rmdir("content/blog")
+        os.remove("static/style.css")
+        self.build()
+        self.assertEqual(sorted(os.listdir("docs")), ["highlight.css", "index.html"])
+
+    def test_server_already_running(self):
+        """Test that a second server doesn't take over the socket of a running one."""
+        with self.assertRaisesRegex(RuntimeError, "already listens"):
+            daemon.serve(self.socket_path)
+        self.assertEqual(daemon.request({"command": "ping"}, self.socket_path), {"ok": True})
+
+    def test_build_error(self):
+        """Test that a failing build is reported, not fatal to the server."""
+        self.write("content/broken.md", "no title")
+        response = self.build()
+        self.assertFalse(response["ok"])
+        self.assertIn("No h1 header found", response["error"])
+        self.assertEqual(daemon.request({"command": "ping"}, self.socket_path), {"ok": True})
+
+
+if __name__ == "__main__":
+    unittest.main()
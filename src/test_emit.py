@@ -0,0 +1,69 @@
+"""Test the direct HTML emitter."""
+
+import io
+import unittest
+
+import golden
+from emit import HTMLEmitter, emit_markdown, markdown_to_html
+from helpers import markdown_to_html_node, parse_blocks
+from pages import extract_excerpt, truncate_excerpt
+from render import Template, render_markdown
+
+
+class TestEmit(unittest.TestCase):
+    """Test that emitted HTML and excerpts match the node tree's."""
+
+    def test_matches_tree(self):
+        """Test byte-identical output on nesting, footnotes and ordered lists."""
+        markdown = (
+            "# A *b*\n\n"
+            "Some ***nested** text* with [a **link**](/x?a=1&b=\"2\") and ![alt <i>](/i.png)[^n].\n\n"
+            "3. three\n4. four\n\n"
+            "> quoted `code`\n> line\n\n"
+            "- item\n\n  para\n\n"
+            "[^n]: The note."
+        )
+        self.assertEqual(markdown_to_html(markdown), markdown_to_html_node(markdown).to_html())
+
+    def test_lead_text_matches_tree_excerpt(self):
+        """Test that the lead text gives each corpus page the tree's excerpt."""
+        for name, source_path, _ in golden.corpus():
+            with open(source_path, "r", encoding="utf-8") as f:
+                markdown = f.read()
+            with self.subTest(name=name), golden.no_highlighting():
+                expected = extract_excerpt(markdown_to_html_node(markdown))
+                self.assertEqual(truncate_excerpt((emit_markdown(markdown).lead_text or "").strip()), expected)
+
+    def test_lead_text_skips_link_only_paragraphs(self):
+        """Test that paragraphs without plain prose are skipped."""
+        emitter = emit_markdown("[Back](/)\n\n- not *top* level\n\nFirst **real**[^1] ![x](/x) text\n\n[^1]: n")
+        self.assertEqual(emitter.lead_text, "First real  text")
+
+    def test_render_markdown_direct(self):
+        """Test that direct rendering gives the same page, returned or streamed."""
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        markdown = "---\nexcerpt: Set\n---\n# Hi\n\n[home](/)"
+        tree = render_markdown(markdown, template, "/base/")
+        direct = render_markdown(markdown, template, "/base/", direct=True)
+        self.assertEqual(direct.html, tree.html)
+        self.assertIsNone(direct.content_node)
+        stream = io.StringIO()
+        render_markdown(markdown, template, "/base/", stream, direct=True)
+        self.assertEqual(stream.getvalue(), tree.html)
+
+    def test_stream_document(self):
+        """Test that a document streamed block by block matches each corpus page, footnotes included."""
+        for name, source_path, _ in golden.corpus():
+            with open(source_path, "r", encoding="utf-8") as f:
+                markdown = f.read()
+            with self.subTest(name=name), golden.no_highlighting():
+                emitter = HTMLEmitter("/base/")
+                chunks = list(emitter.stream_document(parse_blocks(markdown)))
+                expected = emit_markdown(markdown, "/base/")
+                self.assertEqual("".join(chunks), expected.to_html())
+                self.assertEqual(emitter.lead_text, expected.lead_text)
+                self.assertEqual(emitter.parts, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""Test custom block and inline extensions."""
+
+import unittest
+
+import extensions
+from emit import emit_markdown, markdown_to_html
+from extensions import BlockExtension, InlineExtension
+from helpers import BlockType, block_to_block_type, markdown_to_html_node, text_to_children
+from htmlnode import LeafNode, ParentNode
+from pages import extract_excerpt
+from render import Template, page_cache_key
+from textnode import TextNode, TextType
+
+
+def render_table(lines, references):
+    """Render `| a | b |` rows, the first one as the header."""
+    rows = [[cell.strip() for cell in line.strip("|").split("|")] for line in lines if not set(line) <= set("|-: ")]
+    header = ParentNode("tr", [ParentNode("th", text_to_children(cell, references)) for cell in rows[0]])
+    body = [
+        ParentNode("tr", [ParentNode("td", text_to_children(cell, references)) for cell in row]) for row in rows[1:]
+    ]
+    return ParentNode("table", [header, *body])
+
+
+def render_note(lines, references):
+    """Render `!!! note` and the lines after it as an admonition."""
+    kind = lines[0][4:].strip() or "note"
+    return ParentNode("div", [ParentNode("p", text_to_children(" ".join(lines[1:]) or kind, references))],
+                      {"class": f"admonition {kind}"})
+
+
+def render_kbd(match, references):
+    """Render `{{kbd Ctrl}}` as a <kbd> element."""
+    return TextNode(LeafNode("kbd", match.group(1)).to_html(), TextType.HTML)
+
+
+class TestExtensions(unittest.TestCase):
+    """Test registering extensions and the output of extension syntax."""
+
+    def setUp(self):
+        extensions.register(BlockExtension("table", r"\|", render_table, continuation=r"\|"))
+        extensions.register(BlockExtension("note", r"!!!( |$)", render_note, continuation=""))
+        extensions.register(InlineExtension("kbd", r"\{\{kbd ([^}]+)\}\}", render_kbd))
+
+    def tearDown(self):
+        extensions.clear()
+
+    def assert_renders(self, markdown, html):
+        """Assert the tree and the direct emitter give the HTML."""
+        self.assertEqual(markdown_to_html_node(markdown).to_html(), html)
+        self.assertEqual(markdown_to_html(markdown), html)
+
+    def test_block_extensions(self):
+        """Test tables and admonitions, interrupting a paragraph and ended by a blank line."""
+        self.assert_renders(
+            "Text\n| a | *b* |\n|---|---|\n| 1 | 2 |\nafter\n\n!!! warning\nMind [this](/x).\n\nend",
+            "<div><p>Text</p><table><tr><th>a</th><th><i>b</i></th></tr><tr><td>1</td><td>2</td></tr></table>"
+            '<p>after</p><div class="admonition warning"><p>Mind <a href="/x">this</a>.</p></div><p>end</p></div>',
+        )
+        self.assertEqual(block_to_block_type("| a |\n| b |"), BlockType.EXTENSION)
+
+    def test_inline_extension(self):
+        """Test a span inside emphasis, and a trigger character that isn't a span."""
+        self.assert_renders(
+            "Press *{{kbd Ctrl}} + {{kbd C}}* {not a span",
+            "<div><p>Press <i><kbd>Ctrl</kbd> + <kbd>C</kbd></i> {not a span</p></div>",
+        )
+
+    def test_excerpt_matches_tree(self):
+        """Test that extension markup counts as prose in both renderers' excerpts."""
+        markdown = "[Back](/)\n\n{{kbd K}} is a key"
+        self.assertEqual(emit_markdown(markdown).lead_text, "<kbd>K</kbd> is a key")
+        self.assertEqual(extract_excerpt(markdown_to_html_node(markdown)), "<kbd>K</kbd> is a key")
+
+    def test_unregister(self):
+        """Test that unregistered syntax is plain markdown again."""
+        extensions.unregister("table")
+        extensions.unregister("kbd")
+        self.assertEqual(extensions.INLINE_EXTENSIONS, {})
+        self.assertEqual(markdown_to_html("| a |\n\n{{kbd C}}"), "<div><p>| a |</p><p>{{kbd C}}</p></div>")
+
+    def test_register_replaces_name(self):
+        """Test that registering a name again replaces the extension."""
+        extension = extensions.register(InlineExtension("kbd", r"@(\w+)", render_kbd))
+        self.assertEqual(extensions.INLINE_EXTENSIONS, {"@": [extension]})
+        self.assertEqual(markdown_to_html("@Esc"), "<div><p><kbd>Esc</kbd></p></div>")
+
+    def test_cache_key_covers_extensions(self):
+        """Test that registering, changing or removing an extension changes the cache key."""
+        template = Template("{{ Content }}")
+        keys = {page_cache_key("text", template, "/")}
+        extensions.register(InlineExtension("kbd", r"\{\{kbd ([^}]+)\}\}", render_kbd, version="2"))
+        keys.add(page_cache_key("text", template, "/"))
+        extensions.unregister("table")
+        keys.add(page_cache_key("text", template, "/"))
+        self.assertEqual(len(keys), 3)
+
+    def test_chars_needed(self):
+        """Test that a pattern without a literal first character needs chars."""
+        with self.assertRaises(ValueError):
+            BlockExtension("x", r"[ab]", render_table)
+        self.assertEqual(BlockExtension("x", r"[ab]", render_table, chars="ab").chars, "ab")
+
+
+if __name__ == "__main__":
+    unittest.main()
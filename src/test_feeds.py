@@ -0,0 +1,71 @@
+"""Test the sitemap and feed generation."""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from feeds import absolute_url, feed_entries, generate_feeds, write_sitemaps
+from main import parse_args
+from pages import PageSummary
+
+
+class TestFeeds(unittest.TestCase):
+    """Test the feeds module."""
+
+    def setUp(self):
+        self.pages = [
+            PageSummary("Home", "/"),
+            PageSummary("Tom & Co", "/blog/tom/", date="2023-02-01", excerpt="Merry <fellow>"),
+            PageSummary("Glorfindel", "/blog/glorfindel/", date="2024-03-01"),
+        ]
+
+    def test_absolute_url(self):
+        """Test absolute URLs from absolute and path-only base URLs."""
+        self.assertEqual(absolute_url("https://x.dev/", "/blog/"), "https://x.dev/blog/")
+        self.assertEqual(absolute_url("/sub/", "/blog/", "https://x.dev"), "https://x.dev/sub/blog/")
+        with self.assertRaises(ValueError):
+            absolute_url("/", "/blog/")
+
+    def test_feed_entries(self):
+        """Test that feed entries are section posts, newest first."""
+        entries = feed_entries(self.pages)
+        self.assertEqual([entry[0] for entry in entries], ["/blog/glorfindel/", "/blog/tom/"])
+
+    def test_sitemap_split(self):
+        """Test that large sitemaps are split into parts plus an index."""
+        with tempfile.TemporaryDirectory() as tmp:
+            entries = [(f"/p{i}/", None) for i in range(5)]
+            paths = write_sitemaps(entries, tmp, "https://x.dev/", limit=2)
+            self.assertEqual(
+                [os.path.basename(path) for path in paths],
+                ["sitemap.xml", "sitemap-1.xml", "sitemap-2.xml", "sitemap-3.xml"],
+            )
+            with open(paths[0], encoding="utf-8") as f:
+                index = f.read()
+            self.assertIn("<sitemap><loc>https://x.dev/sitemap-3.xml</loc></sitemap>", index)
+            with open(paths[3], encoding="utf-8") as f:
+                self.assertIn("<url><loc>https://x.dev/p4/</loc></url>", f.read())
+
+    def test_generate_feeds(self):
+        """Test the written sitemap and feed."""
+        with tempfile.TemporaryDirectory() as tmp:
+            written = generate_feeds(self.pages, tmp, "https://x.dev/")
+            self.assertEqual(written, [os.path.join(tmp, "sitemap.xml"), os.path.join(tmp, "atom.xml")])
+            with open(os.path.join(tmp, "atom.xml"), encoding="utf-8") as f:
+                feed = f.read()
+            self.assertIn("<title>Tom &amp; Co</title>", feed)
+            self.assertIn("<summary>Merry &lt;fellow&gt;</summary>", feed)
+            self.assertIn("<updated>2024-03-01T00:00:00Z</updated>", feed)
+
+    def test_feeds_need_site_url(self):
+        """Test that --feeds with a path-only base URL and no --site-url is an argument error."""
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            parse_args(["--feeds"])
+        self.assertTrue(parse_args(["--feeds", "--site-url", "https://x.dev"]).feeds)
+        self.assertTrue(parse_args(["https://x.dev/", "--feeds"]).feeds)
+
+
+if __name__ == "__main__":
+    unittest.main()
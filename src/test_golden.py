@@ -0,0 +1,43 @@
+"""Test the renderer against the golden corpus."""
+
+import random
+import unittest
+
+import golden
+
+
+class TestGolden(unittest.TestCase):
+    """Test rendered HTML against stored goldens and alternate renderers."""
+
+    def test_corpus_matches_goldens(self):
+        """Test that every corpus page renders to its stored golden HTML."""
+        corpus = golden.corpus()
+        self.assertGreater(len(corpus), 30)
+        for name, difference in golden.check():
+            with self.subTest(name=name):
+                self.fail(f"{name} differs from its golden, check the change and run "
+                          f"python3 src/golden.py update if intended:\n{difference}")
+
+    def test_renderers_match_on_corpus(self):
+        """Test that every alternate renderer matches the goldens too."""
+        for renderer in golden.RENDERERS:
+            with self.subTest(renderer=renderer):
+                self.assertEqual(golden.check(renderer), [])
+
+    def test_fuzz(self):
+        """Test that the renderers agree, and don't fail, on random markdown."""
+        self.assertEqual(golden.fuzz(count=300), [])
+
+    def test_shrink(self):
+        """Test that a mismatch is shrunk to a small reproducer."""
+        golden.RENDERERS["broken"] = lambda markdown: golden.RENDERERS["tree"](markdown.replace("*", ""))
+        try:
+            markdown = golden.random_markdown(random.Random(1)) + "\n\n*a*"
+            self.assertIsNotNone(golden.compare(markdown, "broken"))
+            self.assertEqual(golden.shrink(markdown, "broken"), "*")
+        finally:
+            del golden.RENDERERS["broken"]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,8 +5,9 @@ from helpers import (
     extract_markdown_links,
     split_nodes_image,
     split_nodes_link,
-    text_to_textnodes, markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node,
+    text_to_textnodes, markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node, MAX_NESTING_DEPTH,
 )
+import time
 import unittest
 
 
@@ -83,11 +84,17 @@ class TestHelpers(unittest.TestCase):
         new_nodes = split_nodes_delimiter([], "`", TextType.CODE)
         self.assertEqual(new_nodes, [])
 
-    def test_split_nodes_delimiter_unmatched_raises(self):
-        """Test that unmatched delimiter raises ValueError."""
-        node = TextNode("This has `unmatched delimiter", TextType.TEXT)
-        with self.assertRaises(ValueError):
-            split_nodes_delimiter([node], "`", TextType.CODE)
+    def test_split_nodes_delimiter_unmatched_is_text(self):
+        """Test that an unmatched delimiter is kept as text."""
+        node = TextNode("This has `code` and `unmatched delimiter", TextType.TEXT)
+        self.assertEqual(
+            split_nodes_delimiter([node], "`", TextType.CODE),
+            [
+                TextNode("This has ", TextType.TEXT),
+                TextNode("code", TextType.CODE),
+                TextNode(" and `unmatched delimiter", TextType.TEXT),
+            ],
+        )
 
     def test_split_nodes_delimiter_at_start(self):
         """Test delimiter at start of text."""
@@ -353,17 +360,13 @@ class TestHelpers(unittest.TestCase):
         )
 
     def test_text_to_textnodes_order_link_protection(self):
-        """Ensure links/images don't get split by earlier text delimiters incorrectly, 
-        or rather how the current order handles them.
-        In current order (Bold then Link), **[link](url)** becomes BOLD node.
-        If Link was first, it would be LINK node.
-        """
+        """Ensure a link inside bold text becomes a LINK nested in a BOLD node."""
         text = "This is **[link](url)**"
         nodes = text_to_textnodes(text)
         self.assertListEqual(
             [
                 TextNode("This is ", TextType.TEXT),
-                TextNode("[link](url)", TextType.BOLD),
+                TextNode("", TextType.BOLD, children=[TextNode("link", TextType.LINK, "url")]),
             ],
             nodes,
         )
@@ -375,11 +378,61 @@ class TestHelpers(unittest.TestCase):
         self.assertListEqual(
             [
                 TextNode("This is ", TextType.TEXT),
-                TextNode("[link](url)", TextType.ITALIC),
+                TextNode("", TextType.ITALIC, children=[TextNode("link", TextType.LINK, "url")]),
             ],
             nodes,
         )
 
+    def test_text_to_textnodes_nested_emphasis(self):
+        """Test bold inside italics and the other way round."""
+        self.assertListEqual(
+            text_to_textnodes("*a **b** c*"),
+            [
+                TextNode("", TextType.ITALIC, children=[
+                    TextNode("a ", TextType.TEXT),
+                    TextNode("b", TextType.BOLD),
+                    TextNode(" c", TextType.TEXT),
+                ]),
+            ],
+        )
+        html = markdown_to_html_node("***both*** and **a *b* c**").to_html()
+        self.assertEqual(html, "<div><p><i><b>both</b></i> and <b>a <i>b</i> c</b></p></div>")
+
+    def test_text_to_textnodes_tolerates_stray_delimiters(self):
+        """Test that intraword underscores and lone asterisks stay text."""
+        for text in ("snake_case_name", "2 * 3 = 6", "a ** b", "x_", "`open code"):
+            with self.subTest(text=text):
+                self.assertListEqual(text_to_textnodes(text), [TextNode(text, TextType.TEXT)])
+        self.assertListEqual(
+            text_to_textnodes("_a_b_ and *foo*bar"),
+            [
+                TextNode("a_b", TextType.ITALIC),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("foo", TextType.ITALIC),
+                TextNode("bar", TextType.TEXT),
+            ],
+        )
+
+    def test_text_to_textnodes_link_text_markup(self):
+        """Test emphasis inside link text and plain alt text of images."""
+        self.assertListEqual(
+            text_to_textnodes("[a *b*](u) ![a *b*](i) [w](/Foo_(bar))"),
+            [
+                TextNode("", TextType.LINK, "u", [TextNode("a ", TextType.TEXT), TextNode("b", TextType.ITALIC)]),
+                TextNode(" ", TextType.TEXT),
+                TextNode("a b", TextType.IMAGE, "i"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("w", TextType.LINK, "/Foo_(bar)"),
+            ],
+        )
+
+    def test_pathological_delimiters_are_fast(self):
+        """Test that emphasis and code spans are parsed in linear time."""
+        started = time.perf_counter()
+        for unit in ("*a", "_a ", "**a *", "`a ``", "a_", "*[a*](b"):
+            text_to_textnodes(unit * 10000)
+        self.assertLess(time.perf_counter() - started, 5)
+
     def test_markdown_to_blocks(self):
         md = """
 This is **bolded** paragraph
@@ -484,6 +537,152 @@ This is the same paragraph on a new line
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_codeblock_preserves_indentation(self):
+        md = "```\ndef main():\n    if True:\n        return 1\n```"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            "<div><pre><code>def main():\n    if True:\n        return 1\n</code></pre></div>",
+        )
+
+    def test_codeblock_language(self):
+        md = "```python\nx = 1\n```"
+        node = markdown_to_html_node(md).children[0]
+        code = node.children[0]
+        self.assertEqual(code.tag, "code")
+        self.assertEqual(code.props, {"class": "language-python"})
+        self.assertIn("x", code.value)
+
+    def test_flat_quote_keeps_line_breaks(self):
+        md = "> \"I am in fact a Hobbit.\"\n>\n> -- J.R.R. Tolkien"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            "<div><blockquote>\"I am in fact a Hobbit.\"\n\n-- J.R.R. Tolkien</blockquote></div>",
+        )
+
+    def test_nested_lists(self):
+        md = "- one\n  - one.a\n  - one.b\n    1. deep\n- two"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            "<div><ul><li>one<ul><li>one.a</li><li>one.b<ol><li>deep</li></ol></li></ul></li>"
+            "<li>two</li></ul></div>",
+        )
+
+    def test_list_item_wrapped_lines(self):
+        md = "1. **First** item\nwraps here\n2. Second"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(html, "<div><ol><li><b>First</b> item wraps here</li><li>Second</li></ol></div>")
+
+    def test_list_item_multiple_paragraphs(self):
+        md = "- first\n\n  second\n\n  ```\n  code\n  ```"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            "<div><ul><li><p>first</p><p>second</p><pre><code>code\n</code></pre></li></ul></div>",
+        )
+
+    def test_blank_line_between_items_starts_new_list(self):
+        md = "- a\n\n- b"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(html, "<div><ul><li>a</li></ul><ul><li>b</li></ul></div>")
+
+    def test_quote_with_inner_blocks(self):
+        md = "> Intro\n>\n> - a\n> - b\n>\n> > nested"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            "<div><blockquote><p>Intro</p><ul><li>a</li><li>b</li></ul>"
+            "<blockquote>nested</blockquote></blockquote></div>",
+        )
+
+    def test_codeblock_with_blank_lines(self):
+        md = "```\na\n\nb\n```\n\nafter"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(html, "<div><pre><code>a\n\nb\n</code></pre><p>after</p></div>")
+
+    def test_ordered_list_start(self):
+        html = markdown_to_html_node("3. c\n4. d").to_html()
+        self.assertEqual(html, '<div><ol start="3"><li>c</li><li>d</li></ol></div>')
+
+    def test_ordered_marker_does_not_interrupt_paragraph(self):
+        html = markdown_to_html_node("In the year\n2024. nothing happened").to_html()
+        self.assertEqual(html, "<div><p>In the year 2024. nothing happened</p></div>")
+
+    def test_nested_brackets_in_links(self):
+        """Test that link text and URLs may hold balanced brackets."""
+        self.assertEqual(
+            extract_markdown_links("[a [b] c](/u) and [w](/wiki/Foo(bar))"),
+            [("a [b] c", "/u"), ("w", "/wiki/Foo(bar)")],
+        )
+        self.assertEqual(extract_markdown_links("[a] b [c](d)"), [("c", "d")])
+
+    def test_autolinks(self):
+        """Test URL and email autolinks."""
+        nodes = split_nodes_link([TextNode("See <https://boot.dev> or <me@boot.dev>", TextType.TEXT)])
+        self.assertEqual(
+            nodes,
+            [
+                TextNode("See ", TextType.TEXT),
+                TextNode("https://boot.dev", TextType.LINK, "https://boot.dev"),
+                TextNode(" or ", TextType.TEXT),
+                TextNode("me@boot.dev", TextType.LINK, "mailto:me@boot.dev"),
+            ],
+        )
+
+    def test_reference_links(self):
+        """Test full, collapsed and shortcut reference links."""
+        md = "[Boot][b], [Dev][] and [dev] but not [none]\n\n[B]: https://boot.dev\n[dev]: <https://dev.to> 'Dev'"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            '<div><p><a href="https://boot.dev">Boot</a>, <a href="https://dev.to">Dev</a> and '
+            '<a href="https://dev.to">dev</a> but not [none]</p></div>',
+        )
+
+    def test_deep_nesting_is_capped(self):
+        """Test that quotes and lists nested past MAX_NESTING_DEPTH render, with the deeper markers as text."""
+        html = markdown_to_html_node("> " * 800 + "x").to_html()
+        self.assertEqual(html.count("<blockquote>"), MAX_NESTING_DEPTH - 1)
+        self.assertIn("<blockquote>" + "&gt; " * (801 - MAX_NESTING_DEPTH) + "x</blockquote>", html)
+        html = markdown_to_html_node("\n".join("  " * i + "- x" for i in range(800))).to_html()
+        self.assertEqual(html.count("<ul>"), (MAX_NESTING_DEPTH - 1) // 2)
+
+    def test_long_reference_labels(self):
+        """Test that labels over 999 characters aren't looked up, unless a full reference names one."""
+        long = "x" * 1000
+        md = f"[{long}] [{long}][b]\n\n[{long}]: /long\n[b]: /b"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(html, f'<div><p>[{long}] <a href="/b">{long}</a></p></div>')
+
+    def test_reference_definition_does_not_interrupt_paragraph(self):
+        """Test that a definition line inside a paragraph stays text."""
+        html = markdown_to_html_node("Text\n[a]: /b").to_html()
+        self.assertEqual(html, "<div><p>Text [a]: /b</p></div>")
+
+    def test_footnotes(self):
+        """Test footnotes numbered by first reference and listed at the end."""
+        md = "One[^b] two[^a] again[^b] none[^x]\n\n[^a]: First\n[^b]: Second\n  continued"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            '<div><p>One<sup id="fnref-1" class="footnote-ref"><a href="#fn-1">1</a></sup>'
+            ' two<sup id="fnref-2" class="footnote-ref"><a href="#fn-2">2</a></sup>'
+            ' again<sup id="fnref-1-2" class="footnote-ref"><a href="#fn-1">1</a></sup> none[^x]</p>'
+            '<section class="footnotes"><ol>'
+            '<li id="fn-1">Second continued <a href="#fnref-1" class="footnote-backref">\u21a9</a></li>'
+            '<li id="fn-2">First <a href="#fnref-2" class="footnote-backref">\u21a9</a></li>'
+            '</ol></section></div>',
+        )
+
+    def test_pathological_brackets_are_fast(self):
+        """Test that unbalanced brackets don't make the link scanner backtrack."""
+        started = time.perf_counter()
+        for unit in ("[a](b", "[[", "![a]", "]("):
+            extract_markdown_links(unit * 20000)
+        self.assertLess(time.perf_counter() - started, 2)
+
     def test_extract_title(self):
         from helpers import extract_title
         markdown = "# Hello"
@@ -498,6 +697,19 @@ This is the same paragraph on a new line
         with self.assertRaises(ValueError):
             extract_title("Hello")
 
+    def test_extract_front_matter(self):
+        from helpers import extract_front_matter
+        markdown = "---\ndate: 2024-05-01\nTags: elves, heroes\n---\n# Title\n"
+        self.assertEqual(
+            extract_front_matter(markdown),
+            ({"date": "2024-05-01", "tags": "elves, heroes"}, "# Title\n"),
+        )
+
+    def test_extract_front_matter_absent(self):
+        from helpers import extract_front_matter
+        self.assertEqual(extract_front_matter("# Title\n---\n"), ({}, "# Title\n---\n"))
+        self.assertEqual(extract_front_matter("---\nno end"), ({}, "---\nno end"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,67 @@
+"""Test the code highlighting."""
+
+import os
+import tempfile
+import unittest
+
+import highlight
+
+
+@unittest.skipUnless(highlight.is_available(), "Pygments is not installed")
+class TestHighlight(unittest.TestCase):
+    """Test the highlight module."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        highlight.set_cache_dir(self.tmp.name)
+        highlight._memory.clear()
+
+    def tearDown(self):
+        highlight.set_cache_dir(None)
+        highlight._memory.clear()
+        self.tmp.cleanup()
+
+    def test_highlight_code(self):
+        """Test that known languages are highlighted into spans."""
+        html = highlight.highlight_code("def f():\n    return 1\n", "python")
+        self.assertIn('<span class="k">def</span>', html)
+        self.assertIn("\n    ", html)
+
+    def test_unknown_language(self):
+        """Test that unknown languages are not highlighted."""
+        self.assertIsNone(highlight.highlight_code("x", "no-such-language"))
+        self.assertIsNone(highlight.highlight_code("x", None))
+
+    def test_memory_is_bounded(self):
+        """Test that the least recently used blocks are dropped from memory."""
+        self.addCleanup(setattr, highlight, "MAX_MEMORY_ENTRIES", highlight.MAX_MEMORY_ENTRIES)
+        highlight.MAX_MEMORY_ENTRIES = 2
+        for code in ("a = 1\n", "b = 2\n", "a = 1\n", "c = 3\n"):
+            highlight.highlight_code(code, "python")
+        expected = [highlight.cache_key("python", "a = 1\n"), highlight.cache_key("python", "c = 3\n")]
+        self.assertEqual(list(highlight._memory), expected)
+
+    def test_disk_cache(self):
+        """Test that highlighted blocks are reused from the disk cache."""
+        html = highlight.highlight_code("x = 1\n", "python")
+        files = [name for _, _, names in os.walk(self.tmp.name) for name in names]
+        self.assertEqual(len(files), 1)
+
+        highlight._memory.clear()
+        hits = highlight.stats["hits"]
+        self.assertEqual(highlight.highlight_code("x = 1\n", "python"), html)
+        self.assertEqual(highlight.stats["hits"], hits + 1)
+
+
+class TestStylesheet(unittest.TestCase):
+    """Test the stylesheet templates link."""
+
+    def test_stylesheet_without_pygments(self):
+        """Test that a stylesheet is returned even without Pygments."""
+        self.addCleanup(setattr, highlight, "pygments", highlight.pygments)
+        highlight.pygments = None
+        self.assertTrue(highlight.stylesheet().startswith("/*"))
+
+
+if __name__ == "__main__":
+    unittest.main()
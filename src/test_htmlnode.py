@@ -2,7 +2,7 @@
 
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, escape_attribute, escape_text
 from textnode import TextNode, TextType
 
 
@@ -164,3 +164,34 @@ class TestHTMLNode(unittest.TestCase):
         self.assertEqual(
             html_node.props["href"], "https://example.com/search?q=test&page=1"
         )
+
+    # Escaping tests
+    def test_escape_text(self):
+        """Test escaping of text content."""
+        self.assertEqual(escape_text('a < b && "c" > d'), 'a &lt; b &amp;&amp; "c" &gt; d')
+
+    def test_escape_text_fast_path(self):
+        """Test that strings without special characters are returned as is."""
+        value = "plain text"
+        self.assertIs(escape_text(value), value)
+
+    def test_escape_attribute(self):
+        """Test escaping of attribute values."""
+        self.assertEqual(escape_attribute('say "hi" & <go>'), "say &quot;hi&quot; &amp; &lt;go&gt;")
+
+    def test_leaf_to_html_escapes_value(self):
+        """Test that leaf values and props are escaped when rendered."""
+        node = LeafNode("a", "Fish & <Chips>", {"href": 'https://x.dev/?q="a"&b=1'})
+        self.assertEqual(
+            node.to_html(),
+            '<a href="https://x.dev/?q=&quot;a&quot;&amp;b=1">Fish &amp; &lt;Chips&gt;</a>',
+        )
+
+    def test_leaf_to_html_escaped_value(self):
+        """Test that already escaped values are not escaped again."""
+        node = LeafNode("code", '<span class="k">def</span> a &lt; b', escaped=True)
+        self.assertEqual(node.to_html(), '<code><span class="k">def</span> a &lt; b</code>')
+
+
+if __name__ == "__main__":
+    unittest.main()
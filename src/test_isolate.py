@@ -0,0 +1,109 @@
+"""Test containing pages that fail to generate."""
+
+import os
+import tempfile
+import time
+import unittest
+
+import buildlog
+import extensions
+from extensions import BlockExtension
+from htmlnode import LeafNode
+from isolate import PageTimeout, error_line, time_limit
+from main import generate_pages_recursive
+from memory import MemoryBudget
+
+
+def render_broken(lines, references):
+    """Render `!!! broken` blocks by failing."""
+    raise ValueError("broken block")
+
+
+def render_slow(lines, references):
+    """Render `!!! slow` blocks too slowly."""
+    time.sleep(2)
+    return LeafNode("p", "slow")
+
+
+class TestIsolation(unittest.TestCase):
+    """Test that failed pages are reported while the others are generated."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.write("template.html", "{{ Content }}")
+        self.write("content/index.md", "# Home\n\nWelcome.")
+        self.write("content/notitle.md", "No title here.")
+        self.write("content/blog/broken.md", "---\ntitle: Broken\n---\n# Broken\n\n- fine\n- !!! broken\n")
+        extensions.register(BlockExtension("broken", r"!!! broken", render_broken))
+        extensions.register(BlockExtension("slow", r"!!! slow", render_slow))
+        self.addCleanup(extensions.clear)
+        self.log = buildlog.configure_worker()
+
+    def write(self, name, text):
+        """Write a file below the temporary directory."""
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def failures(self):
+        """Return the (location, error) pairs of the recorded failures."""
+        return [(fields["location"], fields["error"]) for kind, fields in self.log.problems if kind == "page_failed"]
+
+    def test_error_line(self):
+        """Test the line of the innermost failing block, after the front matter."""
+        self.assertEqual(error_line(os.path.join(self.content, "blog", "broken.md")), 7)
+        self.assertIsNone(error_line(os.path.join(self.content, "notitle.md")))
+
+    def test_failures_are_contained(self):
+        """Test that failed pages are reported with their location and the others generated."""
+        pages = generate_pages_recursive(self.content, self.template, self.docs, fail_fast=False)
+        self.assertEqual([page.url for page in pages], ["/"])
+        self.assertEqual(os.listdir(self.docs), ["index.html"])
+        self.assertEqual(self.log.count("page"), 1)
+        self.assertEqual(self.failures(), [
+            (os.path.join(self.content, "blog", "broken.md") + ":7", "ValueError: broken block"),
+            (os.path.join(self.content, "notitle.md"), "ValueError: No h1 header found"),
+        ])
+
+    def test_streamed_failure_leaves_no_file(self):
+        """Test that a page failing while it is streamed to disk leaves nothing behind."""
+        self.write("content/blog/broken.md", "# Broken\n\nWritten first.\n\n!!! broken\n")
+        generate_pages_recursive(self.content, self.template, self.docs, memory=MemoryBudget(2**30), fail_fast=False)
+        self.assertEqual(sorted(os.listdir(self.docs)), ["blog", "index.html"])
+        self.assertEqual(os.listdir(os.path.join(self.docs, "blog")), [])
+        self.assertEqual(self.log.count("page"), 1)
+
+    def test_fail_fast(self):
+        """Test that fail_fast raises the first failure."""
+        with self.assertRaisesRegex(ValueError, "broken block"):
+            generate_pages_recursive(self.content, self.template, self.docs)
+
+    def test_timeout(self):
+        """Test that a page over its time limit fails."""
+        self.write("content/notitle.md", "# Slow\n\n!!! slow\n")
+        self.write("content/blog/broken.md", "# Fine")
+        started = time.monotonic()
+        pages = generate_pages_recursive(self.content, self.template, self.docs, fail_fast=False, page_timeout=0.2)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(
+            self.failures(), [(os.path.join(self.content, "notitle.md"), "PageTimeout: took longer than 0.2s")]
+        )
+
+    def test_time_limit(self):
+        """Test that a block within its time limit finishes and the timer is cleared."""
+        with time_limit(1):
+            pass
+        time.sleep(1.1)
+        with self.assertRaises(PageTimeout):
+            with time_limit(0.05):
+                time.sleep(1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Test the listing pages."""
+
+import os
+import tempfile
+import unittest
+
+from listing import generate_listings, listing_page_url, slugify, sort_pages
+from pages import PageSummary
+from templates import TemplateResolver
+
+
+class TestListing(unittest.TestCase):
+    """Test the listing module."""
+
+    def setUp(self):
+        self.pages = [
+            PageSummary("Home", "/"),
+            PageSummary("Tom", "/blog/tom/", date="2023-02-01", tags=["Hobbits"]),
+            PageSummary("Glorfindel", "/blog/glorfindel/", date="2024-03-01", tags=["Elves"]),
+            PageSummary("Majesty", "/blog/majesty/"),
+            PageSummary("Legolas", "/blog/legolas/", date="2024-01-01", tags=["Elves"]),
+        ]
+
+    def test_sort_pages(self):
+        """Test that pages are sorted newest first with undated pages last."""
+        titles = [page.title for page in sort_pages(self.pages[1:])]
+        self.assertEqual(titles, ["Glorfindel", "Legolas", "Tom", "Majesty"])
+
+    def test_slugify(self):
+        """Test tag slugs."""
+        self.assertEqual(slugify("Middle Earth!"), "middle-earth")
+        self.assertEqual(slugify("!!!"), "tag")
+
+    def test_listing_page_url(self):
+        """Test the URLs of paginated listing pages."""
+        self.assertEqual(listing_page_url("/blog/", 1), "/blog/")
+        self.assertEqual(listing_page_url("/blog/", 3), "/blog/page/3/")
+
+    def test_generate_listings(self):
+        """Test that section, tag and archive pages are paginated and written."""
+        with tempfile.TemporaryDirectory() as tmp:
+            template_path = os.path.join(tmp, "template.html")
+            with open(template_path, "w", encoding="utf-8") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            urls = generate_listings(self.pages, TemplateResolver(template_path), tmp, per_page=2)
+            self.assertEqual(
+                urls,
+                [
+                    "/blog/", "/blog/page/2/",
+                    "/tags/elves/", "/tags/hobbits/",
+                    "/archive/2024/", "/archive/2023/",
+                ],
+            )
+            with open(os.path.join(tmp, "blog", "page", "2", "index.html"), encoding="utf-8") as f:
+                html = f.read()
+            self.assertIn("<title>Blog (page 2)</title>", html)
+            self.assertIn('<a href="/blog/tom/">Tom</a>', html)
+            self.assertIn('<a href="/blog/" rel="prev">Newer</a>', html)
+
+    def test_existing_section_index_is_kept(self):
+        """Test that a hand-written section index is not overwritten."""
+        with tempfile.TemporaryDirectory() as tmp:
+            template_path = os.path.join(tmp, "template.html")
+            with open(template_path, "w", encoding="utf-8") as f:
+                f.write("{{ Content }}")
+            urls = generate_listings(self.pages, TemplateResolver(template_path), tmp, section="/")
+            self.assertNotIn("/", urls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Test the memory-bounded build mode."""
+
+import os
+import tempfile
+import unittest
+
+from main import generate_pages_recursive
+from memory import MemoryBudget, format_size, parse_size, peak_rss
+from search import SearchIndex
+
+
+class TestMemory(unittest.TestCase):
+    """Test the memory module."""
+
+    def test_parse_size(self):
+        """Test parsing of memory sizes."""
+        self.assertEqual(parse_size("512"), 512)
+        self.assertEqual(parse_size("64k"), 64 * 1024)
+        self.assertEqual(parse_size("2GB"), 2 * 1024 ** 3)
+        with self.assertRaises(ValueError):
+            parse_size("lots")
+
+    def test_format_size(self):
+        """Test human-readable sizes."""
+        self.assertEqual(format_size(100), "100B")
+        self.assertEqual(format_size(3 * 1024 ** 2 // 2), "1.5M")
+
+    def test_peak_rss(self):
+        """Test that the peak RSS is measured."""
+        self.assertGreater(peak_rss(), 0)
+
+    def test_report(self):
+        """Test that the hungriest pages are reported first."""
+        budget = MemoryBudget(2048)
+        budget.add("small.md", 1024)
+        budget.add("big.md", 4096)
+        self.assertEqual(budget.offenders(1), [("big.md", 4096)])
+        self.assertEqual(budget.report()[1:], ["      4.0K  big.md over budget", "      1.0K  small.md"])
+
+
+class TestBoundedBuild(unittest.TestCase):
+    """Test streamed and parallel page generation."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template_path = os.path.join(self.tmp.name, "template.html")
+        self.write(self.template_path, '<title>{{ Title }}</title><a href="/">Home</a>{{ Content }}')
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome **home**")
+        for i in range(4):
+            self.write(os.path.join(self.content, "blog", f"post-{i}", "index.md"), f"# Post {i}\n\nText {i}")
+        self.write(os.path.join(self.content, "blog", "huge", "index.md"), "# Huge\n\n" + "word " * 2000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @staticmethod
+    def write(path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def generate(self, name, **kwargs):
+        dest = os.path.join(self.tmp.name, name)
+        search_index = SearchIndex(dest)
+        pages = generate_pages_recursive(
+            self.content, self.template_path, dest, "/site/", search_index, **kwargs
+        )
+        files = {}
+        for root, _, names in os.walk(dest):
+            for file_name in names:
+                path = os.path.join(root, file_name)
+                with open(path, encoding="utf-8") as f:
+                    files[os.path.relpath(path, dest)] = f.read()
+        return pages, search_index.pages, files
+
+    def test_bounded_build_matches_default(self):
+        """Test that streamed and parallel builds write the same pages."""
+        expected = self.generate("default")
+        memory = MemoryBudget(parse_size("200K"))
+        self.assertEqual(self.generate("streamed", memory=memory), expected)
+        self.assertEqual(len(memory.peaks), 6)
+        self.assertEqual(self.generate("parallel", jobs=2), expected)
+        self.assertEqual(self.generate("bounded", jobs=2, memory=memory), expected)
+
+    def test_oversized_pages_are_sequential(self):
+        """Test that pages too big for the budget are not sent to workers."""
+        memory = MemoryBudget(parse_size("200K"))
+        huge = os.path.join(self.content, "blog", "huge", "index.md")
+        self.assertTrue(memory.is_oversized(huge, jobs=2))
+        self.assertFalse(memory.is_oversized(os.path.join(self.content, "index.md"), jobs=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
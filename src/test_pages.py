@@ -0,0 +1,48 @@
+"""Test the page summaries."""
+
+import unittest
+
+from helpers import markdown_to_html_node
+from pages import PageSummary, extract_excerpt, page_url
+
+
+class TestPages(unittest.TestCase):
+    """Test the pages module."""
+
+    def test_page_url(self):
+        """Test the conversion of output paths to site URLs."""
+        self.assertEqual(page_url("docs/index.html", "docs"), "/")
+        self.assertEqual(page_url("docs/blog/tom/index.html", "docs"), "/blog/tom/")
+        self.assertEqual(page_url("docs/about.html", "docs"), "/about.html")
+
+    def test_extract_excerpt_skips_link_paragraphs(self):
+        """Test that paragraphs with only links or images are not excerpts."""
+        node = markdown_to_html_node(
+            "# Tom\n\n[< Back Home](/)\n\n![Tom](/tom.png)\n\nTom is **merry** indeed.\n\nMore."
+        )
+        self.assertEqual(extract_excerpt(node), "Tom is merry indeed.")
+
+    def test_extract_excerpt_nested_markup(self):
+        """Test that text inside nested emphasis is part of the excerpt."""
+        node = markdown_to_html_node("Tom is *very **merry***.[^1]\n\n[^1]: Indeed.")
+        self.assertEqual(extract_excerpt(node), "Tom is very merry.")
+
+    def test_extract_excerpt_truncates(self):
+        """Test that long excerpts are cut at a word boundary."""
+        node = markdown_to_html_node("one two three four")
+        self.assertEqual(extract_excerpt(node, length=10), "one two…")
+
+    def test_summary_from_page(self):
+        """Test that front matter fills in the summary."""
+        node = markdown_to_html_node("# Tom\n\nHello there.")
+        summary = PageSummary.from_page(
+            "Tom", "/blog/tom/", {"date": "2024-01-02", "tags": "elves, , hobbits"}, node
+        )
+        self.assertEqual(summary.date, "2024-01-02")
+        self.assertEqual(summary.tags, ["elves", "hobbits"])
+        self.assertEqual(summary.excerpt, "Hello there.")
+        self.assertEqual(PageSummary.from_dict(summary.to_dict()), summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Test staged builds and their atomic publishing."""
+
+import os
+import tempfile
+import unittest
+
+from main import copy_directory_contents
+from publish import Generations
+
+
+class TestGenerations(unittest.TestCase):
+    """Test publishing, pruning and rolling back generations."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.generations = Generations(self.docs, keep=1)
+
+    def build(self, text):
+        """Stage a site holding one file and publish it."""
+        staging = self.generations.stage()
+        os.makedirs(staging)
+        with open(os.path.join(staging, "index.html"), "w", encoding="utf-8") as f:
+            f.write(text)
+        return self.generations.publish(staging)
+
+    def published(self):
+        """Return the published index.html."""
+        with open(os.path.join(self.docs, "index.html"), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def test_publish_points_symlink_at_generation(self):
+        """Test that the output directory becomes a symlink to the newest build."""
+        self.build("one")
+        generation = self.build("two")
+        self.assertTrue(os.path.islink(self.docs))
+        self.assertEqual(os.path.realpath(self.docs), os.path.realpath(generation))
+        self.assertEqual(self.published(), "two")
+
+    def test_prune_keeps_previous_generations(self):
+        """Test that only the published and keep previous generations are kept."""
+        for text in ("one", "two", "three"):
+            self.build(text)
+        self.assertEqual(self.generations.numbers(), [2, 3])
+
+    def test_rollback(self):
+        """Test that a rollback publishes the previous build."""
+        self.build("one")
+        self.build("two")
+        self.generations.rollback()
+        self.assertEqual(self.published(), "one")
+        with self.assertRaises(ValueError):
+            self.generations.rollback()
+
+    def test_plain_directory_becomes_a_generation(self):
+        """Test that a docs directory from an unstaged build is kept for rollback."""
+        os.makedirs(self.docs)
+        with open(os.path.join(self.docs, "index.html"), "w", encoding="utf-8") as f:
+            f.write("plain")
+        self.build("staged")
+        self.assertEqual(self.published(), "staged")
+        self.generations.rollback()
+        self.assertEqual(self.published(), "plain")
+
+    def test_failed_build_leaves_site_alone(self):
+        """Test that an unpublished staging directory is replaced by the next build."""
+        self.build("one")
+        staging = self.generations.stage()
+        os.makedirs(staging)
+        self.assertEqual(self.published(), "one")
+        self.build("two")
+        self.assertFalse(os.path.exists(staging))
+        self.assertEqual(self.published(), "two")
+
+
+class TestSeededCopy(unittest.TestCase):
+    """Test copying static files next to an earlier copy."""
+
+    def test_unchanged_files_are_hard_linked(self):
+        """Test that only changed files are copied again."""
+        with tempfile.TemporaryDirectory() as tmp:
+            static, old, new = (os.path.join(tmp, name) for name in ("static", "old", "new"))
+            os.makedirs(os.path.join(static, "images"))
+            for name, text in (("a.css", "a"), ("images/b.png", "b")):
+                with open(os.path.join(static, name), "w", encoding="utf-8") as f:
+                    f.write(text)
+            copy_directory_contents(static, old)
+            with open(os.path.join(static, "a.css"), "w", encoding="utf-8") as f:
+                f.write("changed")
+
+            copy_directory_contents(static, new, old)
+            old_png, new_png = (os.path.join(d, "images", "b.png") for d in (old, new))
+            self.assertTrue(os.path.samefile(old_png, new_png))
+            self.assertFalse(os.path.samefile(os.path.join(old, "a.css"), os.path.join(new, "a.css")))
+            with open(os.path.join(new, "a.css"), "r", encoding="utf-8") as f:
+                self.assertEqual(f.read(), "changed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""Test the in-memory render API."""
+
+import io
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import highlight
+from render import Template, page_cache_key, render_markdown, render_markdown_variants
+
+
+class TestRender(unittest.TestCase):
+    """Test the render module."""
+
+    def setUp(self):
+        self.template = Template(
+            '<title>{{ Title }}</title><link href="/index.css">{{ Content }}'
+        )
+
+    @unittest.skipUnless(highlight.is_available(), "Pygments is not installed")
+    def test_cache_key_covers_highlighting(self):
+        """Test that pages cached with and without Pygments have different keys."""
+        key = page_cache_key("# T", self.template, "/")
+        highlight.set_enabled(False)
+        self.addCleanup(highlight.set_enabled, True)
+        self.assertNotEqual(page_cache_key("# T", self.template, "/"), key)
+
+    def test_template_base_url(self):
+        """Test that the template's root-relative URLs are prefixed, not the content's."""
+        html = self.template.render("T", '<img src="/a.png">', "/site/")
+        self.assertEqual(html, '<title>T</title><link href="/site/index.css"><img src="/a.png">')
+
+    def test_content_base_url(self):
+        """Test that content URLs are prefixed while serializing, not in text."""
+        markdown = '# T\n\n[a](/a) ![b](/b.png) [c](https://c/) `href="/x"`'
+        for direct in (False, True):
+            with self.subTest(direct=direct):
+                html = render_markdown(markdown, self.template, "/site/", direct=direct).html
+                self.assertIn(
+                    '<a href="/site/a">a</a> <img src="/site/b.png" alt="b"></img> <a href="https://c/">c</a> '
+                    '<code>href="/x"</code>', html
+                )
+
+    def test_render_variants(self):
+        """Test that variants rendered from one parse match separate renders."""
+        markdown = "# Hi\n\n[a](/a) and ![b](/b.png)[^1]\n\n[^1]: [n](/n)"
+        base_urls = ["/", "/site/", "https://example.com/"]
+        for direct in (False, True):
+            with self.subTest(direct=direct):
+                pages = render_markdown_variants(markdown, self.template, base_urls, direct)
+                self.assertEqual(
+                    [page.html for page in pages],
+                    [render_markdown(markdown, self.template, base_url).html for base_url in base_urls],
+                )
+
+    def test_template_escapes_title(self):
+        """Test that the title is escaped as text."""
+        html = self.template.render("a < b", "", "/")
+        self.assertTrue(html.startswith("<title>a &lt; b</title>"))
+
+    def test_render_markdown_to_stream(self):
+        """Test that a streamed page matches the rendered one."""
+        markdown = "# Hello\n\n- [a](/a)\n- **b**"
+        stream = io.StringIO()
+        page = render_markdown(markdown, self.template, "/site/", stream)
+        self.assertIsNone(page.html)
+        self.assertEqual(stream.getvalue(), render_markdown(markdown, self.template, "/site/").html)
+
+    def test_render_markdown(self):
+        """Test rendering a document with front matter."""
+        page = render_markdown("---\ndate: 2024-01-01\n---\n# Hello\n\nWorld", self.template)
+        self.assertEqual(page.title, "Hello")
+        self.assertEqual(page.metadata, {"date": "2024-01-01"})
+        self.assertEqual(
+            page.html,
+            '<title>Hello</title><link href="/index.css"><div><h1>Hello</h1><p>World</p></div>',
+        )
+        self.assertEqual(page.to_bytes(), page.html.encode("utf-8"))
+
+    def test_front_matter_title(self):
+        """Test that a front matter title replaces the h1 requirement."""
+        page = render_markdown("---\ntitle: Preview\n---\nNo heading", self.template)
+        self.assertEqual(page.title, "Preview")
+
+    def test_render_is_reentrant(self):
+        """Test rendering the same template from several threads."""
+        documents = [f"# Page {i}\n\n- item **{i}**" for i in range(50)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            pages = list(pool.map(lambda md: render_markdown(md, self.template), documents))
+        for i, page in enumerate(pages):
+            self.assertIn(f"<h1>Page {i}</h1><ul><li>item <b>{i}</b></li></ul>", page.html)
+
+
+if __name__ == "__main__":
+    unittest.main()
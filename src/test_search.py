@@ -0,0 +1,57 @@
+"""Test the search index."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from helpers import markdown_to_html_node
+from search import SearchIndex, extract_terms, shard_key, tokenize
+
+
+class TestSearch(unittest.TestCase):
+    """Test the search module."""
+
+    def test_tokenize(self):
+        """Test that text is lowercased and short tokens are dropped."""
+        self.assertEqual(tokenize("Tom Bombadil is a Mistake!"), ["tom", "bombadil", "is", "mistake"])
+
+    def test_extract_terms(self):
+        """Test that terms come from every inline node, including image alt text."""
+        node = markdown_to_html_node("# Title\n\nSome **bold** text ![Tom image](/tom.png)")
+        self.assertEqual(extract_terms(node), ["bold", "image", "some", "text", "title", "tom"])
+
+    def test_shard_key(self):
+        """Test the assignment of terms to shards."""
+        self.assertEqual(shard_key("tolkien"), "t")
+        self.assertEqual(shard_key("1954"), "0")
+        self.assertEqual(shard_key("émile"), "_")
+
+    def test_write_index(self):
+        """Test that the written index maps terms to page ids."""
+        with tempfile.TemporaryDirectory() as tmp:
+            index = SearchIndex(tmp)
+            index.add_page("/", "Home", "a", markdown_to_html_node("Hello world"))
+            index.add_page("/b/", "B", "b", markdown_to_html_node("Hello there"))
+            index.write()
+            with open(os.path.join(tmp, "search", "pages.json"), encoding="utf-8") as f:
+                self.assertEqual(json.load(f), [["/", "Home"], ["/b/", "B"]])
+            with open(os.path.join(tmp, "search", "terms-h.json"), encoding="utf-8") as f:
+                self.assertEqual(json.load(f), {"hello": [0, 1]})
+
+    def test_incremental_reuses_cached_terms(self):
+        """Test that unchanged pages are not retokenized."""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, "cache", "terms.json")
+            index = SearchIndex(tmp, cache_path)
+            index.add_page("/", "Home", "digest", markdown_to_html_node("Hello world"))
+            index.write()
+
+            index = SearchIndex(tmp, cache_path)
+            index.add_page("/", "Home", "digest", markdown_to_html_node("Changed"))
+            self.assertEqual(index.tokenized, 0)
+            self.assertEqual(index.pages["/"]["terms"], ["hello", "world"])
+
+
+if __name__ == "__main__":
+    unittest.main()
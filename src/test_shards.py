@@ -0,0 +1,79 @@
+"""Test the sharded builds."""
+
+import os
+import tempfile
+import unittest
+
+from pages import PageSummary
+from shards import in_shard, load_manifests, parse_shard, shard_of, url_to_path, write_manifest
+
+
+class TestShards(unittest.TestCase):
+    """Test the shards module."""
+
+    def test_parse_shard(self):
+        """Test parsing of shard specifications."""
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for text in ("0/4", "5/4", "1", "a/b", "1/0"):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_partition(self):
+        """Test that every path lands in exactly one, stable shard."""
+        paths = [f"blog/post-{i}/index.md" for i in range(200)]
+        for path in paths:
+            owners = [i for i in range(1, 5) if in_shard(path, (i, 4))]
+            self.assertEqual(owners, [shard_of(path, 4)])
+        sizes = [sum(in_shard(path, (i, 4)) for path in paths) for i in range(1, 5)]
+        self.assertTrue(all(size > 20 for size in sizes), sizes)
+        self.assertEqual(shard_of("blog/tom/index.md", 4), shard_of("blog/tom/index.md", 4))
+
+    def test_url_to_path(self):
+        """Test output paths of page URLs."""
+        self.assertEqual(url_to_path("/"), "index.html")
+        self.assertEqual(url_to_path("/blog/tom/"), "blog/tom/index.html")
+        self.assertEqual(url_to_path("/about.html"), "about.html")
+
+    def write_shard(self, docs, index, count, urls, base_url="/"):
+        pages = []
+        for url in urls:
+            path = os.path.join(docs, url_to_path(url))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("<html></html>")
+            pages.append(PageSummary(url.strip("/") or "Home", url))
+        write_manifest(docs, (index, count), base_url, pages)
+
+    def test_load_manifests(self):
+        """Test merging the manifests of all shards."""
+        with tempfile.TemporaryDirectory() as docs:
+            self.write_shard(docs, 1, 2, ["/", "/blog/tom/"])
+            self.write_shard(docs, 2, 2, ["/contact/"])
+            base_url, pages, search_pages = load_manifests(docs)
+            self.assertEqual(base_url, "/")
+            self.assertEqual(sorted(page.url for page in pages), ["/", "/blog/tom/", "/contact/"])
+            self.assertIsNone(search_pages)
+
+    def test_load_manifests_validates(self):
+        """Test that incomplete or inconsistent shard sets are rejected."""
+        with tempfile.TemporaryDirectory() as docs:
+            with self.assertRaises(ValueError):
+                load_manifests(docs)
+            self.write_shard(docs, 1, 3, ["/"])
+            self.write_shard(docs, 3, 3, ["/b/"])
+            with self.assertRaisesRegex(ValueError, "missing \\[2\\]"):
+                load_manifests(docs)
+            self.write_shard(docs, 2, 3, ["/b/"])
+            with self.assertRaisesRegex(ValueError, "built by shards"):
+                load_manifests(docs)
+            self.write_shard(docs, 2, 3, ["/c/"], base_url="/other/")
+            with self.assertRaisesRegex(ValueError, "base_url"):
+                load_manifests(docs)
+            self.write_shard(docs, 2, 3, ["/c/"])
+            os.remove(os.path.join(docs, "c", "index.html"))
+            with self.assertRaisesRegex(ValueError, "missing from"):
+                load_manifests(docs)
+
+
+if __name__ == "__main__":
+    unittest.main()
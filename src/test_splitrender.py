@@ -0,0 +1,66 @@
+"""Test rendering large documents in parts."""
+
+import random
+import unittest
+
+import golden
+from helpers import parse_blocks
+from pages import lead_text
+from render import Template, render_markdown
+from search import extract_terms
+from splitrender import render_markdown_split, split_ranges
+
+
+class TestSplitRender(unittest.TestCase):
+    """Test that documents rendered in parts match the sequential renderer."""
+
+    def setUp(self):
+        self.template = Template("<title>{{ Title }}</title>{{ Content }}")
+
+    def assert_matches(self, markdown):
+        """Assert that the split page has the sequential page's HTML, lead text and terms."""
+        with golden.no_highlighting():
+            expected = render_markdown(markdown, self.template, "/site/")
+        for terms in (False, True):
+            with self.subTest(terms=terms), golden.no_highlighting():
+                page = render_markdown_split(markdown, self.template, "/site/", jobs=2, terms=terms)
+                self.assertEqual(page.html, expected.html)
+                if page.content_node is not None:
+                    continue
+                self.assertEqual(page.lead_text, lead_text(expected.content_node))
+                self.assertEqual(page.terms, extract_terms(expected.content_node) if terms else None)
+
+    def test_split_ranges(self):
+        """Test that ranges are only cut before top-level blocks after a blank line."""
+        lines = ["# T", "", "- a", "- b", "", "para", "lazy", "", "```", "", "code", "```", "", "end", "## h"]
+        ranges = split_ranges(lines, parse_blocks("\n".join(lines)), 100)
+        self.assertEqual(ranges, [(0, 2), (2, 5), (5, 8), (8, 13), (13, 15)])
+
+    def test_matches_sequential(self):
+        """Test a document with references defined after their use, lists and code."""
+        markdown = (
+            "---\ntitle: API\n---\n# Reference\n\n[Back](/)\n\n"
+            + "\n\n".join(
+                f"## `f{i}()`\n\nCalls [g][g{i % 3}] on *x*.\n\n- one\n- two\n\n  more\n\n```python\nf{i}()\n```"
+                for i in range(40)
+            )
+            + "\n\n[g0]: /g0\n[G1]: /g1"
+        )
+        self.assert_matches(markdown)
+
+    def test_random_documents(self):
+        """Test random documents without footnotes."""
+        for seed in range(20):
+            rng = random.Random(seed)
+            markdown = "# T\n\n" + "\n\n".join(golden.random_markdown(rng, 12) for _ in range(4))
+            with self.subTest(seed=seed):
+                self.assert_matches(markdown.replace("[^", "["))
+
+    def test_footnotes_render_in_one_process(self):
+        """Test that documents with footnotes are rendered from the whole parse."""
+        markdown = "# T\n\nA[^1].\n\nB[^2].\n\n[^2]: two\n[^1]: one"
+        self.assert_matches(markdown)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Test the layout resolution."""
+
+import os
+import tempfile
+import unittest
+
+from templates import TemplateResolver
+
+
+class TestTemplates(unittest.TestCase):
+    """Test the templates module."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.layouts = os.path.join(root, "layouts")
+        self.default = os.path.join(root, "template.html")
+        self.write(self.default, "default {{ Content }}")
+        self.write(os.path.join(self.layouts, "blog.html"), "{{> header }}blog {{ Content }}{{> footer }}")
+        self.write(os.path.join(self.layouts, "blog", "tom.html"), "tom {{ Content }}")
+        self.write(os.path.join(self.layouts, "landing.html"), "landing {{ Content }}")
+        self.write(os.path.join(self.layouts, "partials", "header.html"), "<header>{{> nav }}</header>")
+        self.write(os.path.join(self.layouts, "partials", "nav.html"), "<nav></nav>")
+        self.write(os.path.join(self.layouts, "partials", "footer.html"), "<footer></footer>")
+        self.resolver = TemplateResolver(self.default, self.layouts)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @staticmethod
+    def write(path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_resolve_by_directory(self):
+        """Test that the most specific directory layout is used."""
+        self.assertEqual(self.resolver.resolve("/").path, self.default)
+        self.assertEqual(self.resolver.resolve("/contact/").path, self.default)
+        self.assertEqual(self.resolver.resolve("/blog/").path, os.path.join(self.layouts, "blog.html"))
+        self.assertEqual(self.resolver.resolve("/blog/glorfindel/").path, os.path.join(self.layouts, "blog.html"))
+        self.assertEqual(self.resolver.resolve("/blog/tom/").path, os.path.join(self.layouts, "blog", "tom.html"))
+
+    def test_resolve_by_front_matter(self):
+        """Test that a layout named in front matter wins."""
+        template = self.resolver.resolve("/blog/tom/", {"layout": "landing"})
+        self.assertEqual(template.render("T", "x"), "landing x")
+        with self.assertRaises(ValueError):
+            self.resolver.resolve("/", {"layout": "missing"})
+
+    def test_partials(self):
+        """Test that partials are expanded recursively."""
+        template = self.resolver.resolve("/blog/a/")
+        self.assertEqual(template.render("T", "x"), "<header><nav></nav></header>blog x<footer></footer>")
+
+    def test_partial_cycle(self):
+        """Test that a partial including itself is an error."""
+        self.write(os.path.join(self.layouts, "partials", "nav.html"), "{{> header }}")
+        with self.assertRaises(ValueError):
+            self.resolver.resolve("/blog/a/")
+
+    def test_layouts_compiled_once(self):
+        """Test that each layout is compiled once however many pages use it."""
+        first = self.resolver.resolve("/blog/a/")
+        for i in range(10):
+            self.assertIs(self.resolver.resolve(f"/blog/post-{i}/"), first)
+        self.resolver.resolve("/")
+        self.assertEqual(self.resolver.compiled_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Test wiki links between pages."""
+
+import os
+import tempfile
+import unittest
+
+import buildlog
+from daemon import MemoryPageCache
+from emit import markdown_to_html
+from helpers import markdown_to_html_node
+from main import generate_pages_recursive
+from render import Template, render_markdown
+from wikilinks import TitleIndex, page_title, resolving
+
+
+class TestTitleIndex(unittest.TestCase):
+    """Test resolving titles and rendering wiki links."""
+
+    def setUp(self):
+        self.index = TitleIndex()
+        self.index.add("Tom Bombadil", "/blog/tom.html")
+        self.index.add("Glorfindel", "/blog/glorfindel.html")
+
+    def test_resolve_normalizes_titles(self):
+        """Test that case and whitespace don't matter, and first titles win."""
+        self.assertEqual(self.index.resolve("tom  BOMBADIL"), "/blog/tom.html")
+        self.assertFalse(self.index.add("TOM BOMBADIL", "/other.html"))
+        self.assertEqual(self.index.resolve("Tom Bombadil"), "/blog/tom.html")
+        self.assertIsNone(self.index.resolve("Sauron"))
+
+    def test_render(self):
+        """Test links, custom text and unresolved targets in both renderers."""
+        markdown = "See [[Tom Bombadil]], [[glorfindel|the elf]] and [[Sauron]]."
+        with resolving(self.index):
+            expected = markdown_to_html_node(markdown).to_html("/site/")
+            html = markdown_to_html(markdown)
+        self.assertEqual(
+            expected,
+            '<div><p>See <a href="/site/blog/tom.html">Tom Bombadil</a>, '
+            '<a href="/site/blog/glorfindel.html">the elf</a> and Sauron.</p></div>',
+        )
+        self.assertEqual(html, expected.replace("/site/", "/"))
+        self.assertEqual(markdown_to_html("[[Tom Bombadil]]"), "<div><p>[[Tom Bombadil]]</p></div>")
+
+    def test_reports_per_render(self):
+        """Test that each render returns its own reports and nothing is kept between renders."""
+        template = Template("{{ Content }}")
+        with resolving(self.index):
+            page = render_markdown("# T\n\n[[Sauron]] and [[Tom Bombadil]]", template, direct=True)
+            markdown_to_html("[[Nobody]]")
+            other = render_markdown("# T\n\n[[Tom Bombadil]]", template)
+        self.assertEqual(page.reports, [("unresolved_link", {"target": "Sauron"})])
+        self.assertEqual(other.reports, [])
+
+    def test_resolutions(self):
+        """Test the cache key part of a document's targets."""
+        self.assertEqual(self.index.resolutions("no links"), "")
+        self.assertEqual(
+            self.index.resolutions("[[Sauron]] [[tom bombadil|Tom]] `[[Tom Bombadil]]`"),
+            "sauron\0\ntom bombadil\0/blog/tom.html",
+        )
+
+
+class TestSiteLinks(unittest.TestCase):
+    """Test wiki links in a generated site."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.write("template.html", "{{ Content }}")
+        self.write("content/index.md", "# Home\n\nRead [[Tom]] and [[Nobody]].")
+        self.write("content/other.md", "# Other\n\nNo wiki links.")
+        self.write("content/blog/tom.md", "---\ntitle: Tom\n---\n# Tom Bombadil\n\nHey dol!")
+        self.log = buildlog.configure_worker()
+
+    def write(self, name, text):
+        """Write a file below the temporary directory."""
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def build(self, cache):
+        """Generate the site and return the HTML of its home page."""
+        docs = os.path.join(self.tmp.name, "docs")
+        generate_pages_recursive(self.content, self.template, docs, page_cache=cache)
+        with open(os.path.join(docs, "index.html"), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def test_page_title(self):
+        """Test that the front matter title comes before the h1."""
+        self.assertEqual(page_title(os.path.join(self.content, "blog", "tom.md")), "Tom")
+        self.assertEqual(page_title(os.path.join(self.content, "other.md")), "Other")
+
+    def test_links_and_reports(self):
+        """Test resolved links and the report of unresolved targets, also from the cache."""
+        cache = MemoryPageCache()
+        self.assertEqual(
+            self.build(cache), '<div><h1>Home</h1><p>Read <a href="/blog/tom.html">Tom</a> and Nobody.</p></div>'
+        )
+        self.build(cache)
+        unresolved = [fields for kind, fields in self.log.problems if kind == "unresolved_link"]
+        source = os.path.join(self.content, "index.md")
+        self.assertEqual(unresolved, [{"source": source, "target": "Nobody"}] * 2)
+
+    def test_moved_page_rerenders_only_linking_pages(self):
+        """Test that moving a page only invalidates the pages linking to it."""
+        cache = MemoryPageCache()
+        self.build(cache)
+        os.rename(os.path.join(self.content, "blog"), os.path.join(self.content, "people"))
+        cache.hits = cache.misses = 0
+        self.assertIn('<a href="/people/tom.html">Tom</a>', self.build(cache))
+        # The home page and the moved page itself are rendered again
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,23 +11,31 @@ class TextType(Enum):
     CODE = "code"
     LINK = "link"
     IMAGE = "image"
+    FOOTNOTE = "footnote"
+    # Markup from an inline extension, output as is
+    HTML = "html"
 
 class TextNode:
     """A node in the text tree.
     """
-    def __init__(self, text: str, text_type: TextType, url: str = None):
+    def __init__(self, text: str, text_type: TextType, url: str = None, children: list = None):
         self.text = text
         self.text_type = text_type
         self.url = url
+        # Nested nodes of bold, italic and link text that isn't plain text
+        self.children = children
 
     def  __eq__(self, other):
         """Check if two text nodes are equal.
         """
         return self.text == other.text and \
             self.text_type == other.text_type and \
-                self.url == other.url
+                self.url == other.url and \
+                    self.children == other.children
 
     def __repr__(self):
         """Return a string representation of the text node.
         """
+        if self.children is not None:
+            return f"TextNode({self.text_type.value}, {self.url}, children={self.children})"
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
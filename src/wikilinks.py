@@ -0,0 +1,144 @@
+"""A module for `[[Page Title]]` links between pages.
+
+Before pages are rendered, the title of every page (its front matter title
+or first h1) is read into a TitleIndex, keyed like link references, so
+`[[page title]]` and `[[Page  Title]]` find the same page in one dict
+lookup. While the index is registered, wiki links render as links to the
+page's URL; `[[Page Title|text]]` links with its own text. Links to unknown
+titles render as their text and are reported to the build log.
+
+A page's output depends on the URLs its wiki links resolve to, so those
+are part of its cache key: when a page is renamed or moved, only the pages
+linking to it are rendered again.
+"""
+import re
+from contextlib import contextmanager
+from itertools import chain
+
+import buildlog
+import extensions
+from extensions import InlineExtension
+from helpers import extract_front_matter
+from inline import References
+from textnode import TextNode, TextType
+
+WIKI_LINK_RE = re.compile(r"\[\[([^\[\]|\n]+)(?:\|([^\[\]\n]+))?\]\]")
+
+EXTENSION_NAME = "wikilink"
+
+
+class TitleIndex:
+    """The site URLs of pages by their normalized titles."""
+
+    def __init__(self):
+        self.urls = {}
+        # The source path of the page each title was found in
+        self.sources = {}
+
+    def add(self, title, url, source_path=None):
+        """Add a page; a title already taken by another page keeps its first URL.
+
+        Returns:
+            False if the title was already taken by another page.
+        """
+        key = References.normalize(title)
+        if key in self.urls:
+            return self.urls[key] == url
+        self.urls[key] = url
+        self.sources[key] = source_path
+        return True
+
+    def resolve(self, title):
+        """Return the URL of the page with a title, or None."""
+        return self.urls.get(References.normalize(title))
+
+    def resolutions(self, markdown):
+        """Return the wiki link targets of a document and their URLs as one string.
+
+        Every `[[...]]` in the text counts, even inside code, so the result
+        changes whenever a rendered link could.
+        """
+        if "[[" not in markdown:
+            return ""
+        targets = {References.normalize(match.group(1)) for match in WIKI_LINK_RE.finditer(markdown)}
+        return "\n".join(f"{target}\0{self.urls.get(target, '')}" for target in sorted(targets))
+
+    def extension(self):
+        """Return the InlineExtension rendering wiki links against the index."""
+        return InlineExtension(EXTENSION_NAME, WIKI_LINK_RE, self._render)
+
+    def _render(self, match, references):
+        """Return the node of a wiki link, reporting unknown targets."""
+        target = match.group(1).strip()
+        text = (match.group(2) or target).strip()
+        url = self.resolve(target)
+        if url is None:
+            extensions.report("unresolved_link", target=target)
+            return TextNode(text, TextType.TEXT)
+        return TextNode(text, TextType.LINK, url)
+
+    @classmethod
+    def from_pages(cls, pages, title_of=None):
+        """Build the index of discovered pages.
+
+        Args:
+            pages: (source path, destination path, URL) tuples
+            title_of: Optional function returning the title of a source
+                path, e.g. a cached one; page_title by default
+
+        Pages without a title are left out; titles used by two pages are
+        reported to the build log.
+        """
+        index = cls()
+        title_of = title_of or page_title
+        for source_path, _, url in pages:
+            title = title_of(source_path)
+            if title is not None and not index.add(title, url, source_path):
+                buildlog.record(
+                    "duplicate_title", title=title, source=source_path,
+                    other=index.sources[References.normalize(title)]
+                )
+        return index
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __repr__(self):
+        """Return a string representation of the index."""
+        return f"TitleIndex(titles={len(self.urls)})"
+
+
+def page_title(source_path):
+    """Return the title a page is rendered with, or None if it has none.
+
+    Only the front matter and the lines up to the first h1 are read.
+    """
+    with open(source_path, "r", encoding="utf-8") as f:
+        lines = []
+        line = f.readline()
+        if line == "---\n":
+            lines.append(line)
+            for line in f:
+                lines.append(line)
+                if line.rstrip("\n") == "---":
+                    metadata, _ = extract_front_matter("".join(lines))
+                    if metadata.get("title"):
+                        return metadata["title"]
+                    lines = []
+                    break
+        else:
+            lines.append(line)
+        for line in chain(lines, f):
+            if line.startswith("# "):
+                return line[2:].strip()
+    return None
+
+
+@contextmanager
+def resolving(index):
+    """Render wiki links against a TitleIndex for the duration of the block."""
+    extensions.register(index.extension())
+    try:
+        yield index
+    finally:
+        extensions.unregister(EXTENSION_NAME)